@@ -50,7 +50,14 @@ class KFFile:
     def load_kf(file_path):
         """Loads a Kf file from the given path"""
         NifLog.info("Loading {0}".format(file_path))
+        NifLog.info("Reading keyframe file")
+        kf_file = KFFile.read_kf(file_path)
+        NifLog.info("KF file version: {0}".format(kf_file.version, "x"))
+        return kf_file
 
+    @staticmethod
+    def read_kf(file_path):
+        """Reads a Kf file from the given path without reporting, the caller logs the outcome"""
         kf_file = NifFormat.Data()
 
         # open keyframe file for binary reading
@@ -59,8 +66,6 @@ class KFFile:
             kf_file.inspect_version_only(kf_stream)
             if kf_file.version >= 0:
                 # it is valid, so read the file
-                NifLog.info("KF file version: {0}".format(kf_file.version, "x"))
-                NifLog.info("Reading keyframe file")
                 kf_file.read(kf_stream)
             elif kf_file.version == -1:
                 raise NifError("Unsupported KF version.")
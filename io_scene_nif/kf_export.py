@@ -0,0 +1,166 @@
+"""This script exports the actions of an armature to Netimmerse/Gamebryo kf files."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+
+import bpy
+import pyffi.spells.nif.fix
+
+from io_scene_nif.modules import armature
+from io_scene_nif.modules.animation.animation_export import Animation
+from io_scene_nif.modules.object.block_registry import block_store
+from io_scene_nif.modules.object.object_export import Object
+from io_scene_nif.modules.scene import scene_export
+from io_scene_nif.nif_common import NifCommon
+from io_scene_nif.utility import nif_utils
+from io_scene_nif.utility.util_global import NifOp, NifData
+from io_scene_nif.utility.util_logging import NifLog
+
+# number of finished kf trees waiting to be written, which bounds the trees held in memory
+MAX_WRITES_IN_FLIGHT = 2
+
+
+class KfExport(NifCommon):
+
+    def __init__(self, operator, context):
+        NifCommon.__init__(self, operator, context)
+
+        # Helper systems
+        self.animationhelper = Animation(parent=self)
+        self.objecthelper = Object(parent=self)
+        self.version = None
+
+    def execute(self):
+        """Main export function, writes one kf file per matching action of the armature."""
+        try:
+            directory = os.path.dirname(NifOp.props.filepath)
+            b_armature = armature.get_armature()
+            if not b_armature:
+                raise nif_utils.NifError("No armature was found in scene, can not export KF animation!")
+
+            # the axes used for bone correction depend on the armature in our scene
+            armature.set_bone_orientation(b_armature.data.niftools.axis_forward, b_armature.data.niftools.axis_up)
+
+            b_actions = self.get_actions(b_armature)
+            if not b_actions:
+                NifLog.warn("No actions match '{0}', nothing to export".format(NifOp.props.action_filter))
+                return {'FINISHED'}
+
+            # get nif space bind pose of armature here for all anims
+            bind_data = {b_bone.name: nif_utils.decompose_srt(armature.get_bind_matrix(b_bone)) for b_bone in b_armature.data.bones}
+
+            # blender data is only read from this thread, scaling and writing the finished trees happens in the background
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                pending = deque()
+                for b_action, file_name in zip(b_actions, self.get_file_names(b_actions)):
+                    NifLog.info("Exporting action {0}".format(b_action.name))
+                    block_store.block_to_obj = {}
+                    self.version, data = scene_export.get_version_data()
+                    NifData.init(data)
+                    data.roots = [self.animationhelper.export_kf_root(b_armature, b_action, bind_data)]
+                    data.neosteam = (NifOp.props.game == 'NEOSTEAM')
+                    kf_file = os.path.join(directory, file_name + ".kf")
+                    pending.append(executor.submit(self.write_kf, data, kf_file, NifOp.props.scale_correction_export))
+                    # only keep a few finished trees in memory
+                    while len(pending) > MAX_WRITES_IN_FLIGHT:
+                        pending.popleft().result()
+                while pending:
+                    pending.popleft().result()
+            NifLog.info("Exported {0} KF files".format(len(b_actions)))
+        finally:
+            self.end_session()
+        return {'FINISHED'}
+
+    @staticmethod
+    def get_actions(b_armature):
+        """Actions that animate bones of the armature and whose names match the action filter,
+        or the active action of the armature if there is no filter."""
+        if not NifOp.props.action_filter:
+            b_action = b_armature.animation_data.action if b_armature.animation_data else None
+            return [b_action] if b_action else []
+        bone_names = set(b_armature.data.bones.keys())
+        return [b_action for b_action in bpy.data.actions
+                if fnmatchcase(b_action.name, NifOp.props.action_filter) and KfExport.animates_bones(b_action, bone_names)]
+
+    @staticmethod
+    def animates_bones(b_action, bone_names):
+        """Whether any fcurve of the action targets a pose bone of the given names."""
+        for fcu in b_action.fcurves:
+            match = re.match(r'pose\.bones\["(.+?)"\]', fcu.data_path)
+            if match and match.group(1) in bone_names:
+                return True
+        return False
+
+    @staticmethod
+    def get_file_name(action_name):
+        """A file name for an action, without characters that file systems do not allow."""
+        return re.sub(r'[<>:"/\\|?*]', "_", action_name)
+
+    @staticmethod
+    def get_file_names(b_actions):
+        """File names for the actions, numbered where different action names give the same file name."""
+        file_names = []
+        # file systems may ignore case
+        used = set()
+        for b_action in b_actions:
+            file_name = base_name = KfExport.get_file_name(b_action.name)
+            index = 1
+            while file_name.lower() in used:
+                file_name = "{0}.{1:03d}".format(base_name, index)
+                index += 1
+            if file_name != base_name:
+                NifLog.warn("Action {0} would overwrite the file of another action, exporting it to {1}.kf".format(b_action.name, file_name))
+            used.add(file_name.lower())
+            file_names.append(file_name)
+        return file_names
+
+    @staticmethod
+    def write_kf(data, kf_file, scale):
+        """Scale and write a kf tree. Does not access blender data nor report, so it can run in a worker."""
+        if scale != 1.0:
+            # use pyffi toaster to scale the tree
+            toaster = pyffi.spells.nif.NifToaster()
+            toaster.scale = scale
+            pyffi.spells.nif.fix.SpellScale(data=data, toaster=toaster).recurse()
+        with open(kf_file, "wb") as stream:
+            data.write(stream)
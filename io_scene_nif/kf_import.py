@@ -39,6 +39,7 @@
 
 import os
 
+import bpy
 import pyffi.spells.nif.fix
 
 from io_scene_nif.io.kf import KFFile
@@ -47,6 +48,7 @@ from io_scene_nif.modules.animation.transform_import import TransformAnimation
 from io_scene_nif.nif_common import NifCommon
 from io_scene_nif.utility import nif_utils
 from io_scene_nif.utility.util_global import NifOp
+from io_scene_nif.utility.util_logging import NifLog
 
 
 class KfImport(NifCommon):
@@ -71,14 +73,56 @@ class KfImport(NifCommon):
 
         # get nif space bind pose of armature here for all anims
         bind_data = armature.get_bind_data(b_armature)
-        for kf_file in kf_files:
-            kfdata = KFFile.load_kf(kf_file)
-            # use pyffi toaster to scale the tree
-            toaster = pyffi.spells.nif.NifToaster()
-            toaster.scale = NifOp.props.scale_correction_import
-            pyffi.spells.nif.fix.SpellScale(data=kfdata, toaster=toaster).recurse()
-            # calculate and set frames per second
-            self.tranform_anim.set_frames_per_second(kfdata.roots)
-            for kf_root in kfdata.roots:
-                self.tranform_anim.import_kf_root(kf_root, b_armature, bind_data)
+
+        b_window_manager = NifOp.context.window_manager
+        b_window_manager.progress_begin(0, len(kf_files))
+        num_failed = 0
+        try:
+            for i, kf_file in enumerate(kf_files, start=1):
+                # a broken file should not abort the whole library
+                animation_state = self.get_animation_state()
+                try:
+                    kfdata = self.load_kf(kf_file, NifOp.props.scale_correction_import)
+                    NifLog.info("Loaded {0}, KF file version: {1}".format(kf_file, kfdata.version))
+                    # calculate and set frames per second
+                    self.tranform_anim.set_frames_per_second(kfdata.roots)
+                    for kf_root in kfdata.roots:
+                        self.tranform_anim.import_kf_root(kf_root, b_armature, bind_data)
+                except (OSError, ValueError, nif_utils.NifError) as err:
+                    num_failed += 1
+                    NifLog.warn("Failed to import {0}: {1}".format(kf_file, err))
+                    self.remove_animation_since(animation_state)
+                b_window_manager.progress_update(i)
+                NifLog.info("Imported {0} of {1} KF files".format(i, len(kf_files)))
+            if num_failed:
+                NifLog.warn("{0} of {1} KF files could not be imported".format(num_failed, len(kf_files)))
+        finally:
+            b_window_manager.progress_end()
+            self.end_session()
         return {'FINISHED'}
+
+    @staticmethod
+    def get_animation_state():
+        """The fcurves of every action by action name, to undo the import of a file that fails."""
+        return {b_action.name: {fcu.as_pointer() for fcu in b_action.fcurves} for b_action in bpy.data.actions}
+
+    @staticmethod
+    def remove_animation_since(animation_state):
+        """Remove the actions and fcurves created after animation_state was taken."""
+        for b_action in list(bpy.data.actions):
+            fcurve_pointers = animation_state.get(b_action.name)
+            if fcurve_pointers is None:
+                bpy.data.actions.remove(b_action)
+                continue
+            for fcu in [fcu for fcu in b_action.fcurves if fcu.as_pointer() not in fcurve_pointers]:
+                b_action.fcurves.remove(fcu)
+
+    @staticmethod
+    def load_kf(kf_file, scale):
+        """Read a kf file and scale its tree."""
+        kfdata = KFFile.read_kf(kf_file)
+        # use pyffi toaster to scale the tree
+        toaster = pyffi.spells.nif.NifToaster()
+        toaster.scale = scale
+        pyffi.spells.nif.fix.SpellScale(data=kfdata, toaster=toaster).recurse()
+        return kfdata
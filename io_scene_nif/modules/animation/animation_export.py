@@ -100,7 +100,8 @@ class Animation:
                 if b_action.fcurves:
                     return b_action
 
-    def export_kf_root(self, b_armature = None):
+    def export_kf_root(self, b_armature = None, b_action = None, bind_data = None):
+        """Export a keyframe tree for b_action, or for the active action if None. Bind data of the bones can be shared across actions."""
         # todo [anim] export them properly, in the right tree to begin with
         # find all nodes and relevant controllers
         # node_kfctrls = self.get_controllers( root_block.tree() )
@@ -137,9 +138,11 @@ class Animation:
 
             # per-node animation
             if b_armature:
-                b_action = self.get_active_action(b_armature)
+                if not b_action:
+                    b_action = self.get_active_action(b_armature)
                 for b_bone in b_armature.data.bones:
-                    self.transform.export_transforms(kf_root, b_armature, b_action, b_bone)
+                    bind = bind_data.get(b_bone.name) if bind_data else None
+                    self.transform.export_transforms(kf_root, b_armature, b_action, b_bone, bind)
                 # quick hack to set correct target name
                 if "Bip01" in b_armature.data.bones:
                     targetname = "Bip01"
@@ -160,8 +163,9 @@ class Animation:
             kf_root.text_keys = anim_textextra
             kf_root.cycle_type = NifFormat.CycleType.CYCLE_CLAMP
             kf_root.frequency = 1.0
-            kf_root.start_time = bpy.context.scene.frame_start * bpy.context.scene.render.fps
-            kf_root.stop_time = (bpy.context.scene.frame_end - bpy.context.scene.frame_start) * bpy.context.scene.render.fps
+            start_frame, stop_frame = b_action.frame_range
+            kf_root.start_time = start_frame / self.fps
+            kf_root.stop_time = stop_frame / self.fps
 
             kf_root.target_name = targetname
             kf_root.string_palette = NifFormat.NiStringPalette()
@@ -225,11 +229,11 @@ class Animation:
                 node_kfctrls[node].append(ctrl)
         return node_kfctrls
     
-    def create_controller(self, parent_block, target_name, priority = 0):
+    def create_controller(self, parent_block, target_name, priority = 0, interpolator_type="NiTransformInterpolator"):
         n_kfi = None
         n_kfc = None
         
-        if NifOp.props.animation == 'GEOM_NIF' and NifOp.props.version < 0x0A020000:
+        if NifOp.props.animation == 'GEOM_NIF' and self.nif_export.version < 0x0A020000:
             # keyframe controllers are not present in geometry only files
             # for more recent versions, the controller and interpolators are
             # present, only the data is not present (see further on)
@@ -237,11 +241,11 @@ class Animation:
 
         # add a KeyframeController block, and refer to this block in the
         # parent's time controller
-        if NifOp.props.version < 0x0A020000:
+        if self.nif_export.version < 0x0A020000:
             n_kfc = block_store.create_block("NiKeyframeController", None)
         else:
             n_kfc = block_store.create_block("NiTransformController", None)
-            n_kfi = block_store.create_block("NiTransformInterpolator", None)
+            n_kfi = block_store.create_block(interpolator_type, None)
             # link interpolator from the controller
             n_kfc.interpolator = n_kfi
         # if parent is a node, attach controller to that node
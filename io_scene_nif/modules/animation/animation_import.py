@@ -37,12 +37,16 @@
 #
 # ***** END LICENSE BLOCK *****
 import bpy
+import numpy as np
 
 from pyffi.formats.nif import NifFormat
 
 from io_scene_nif.modules import animation
 from io_scene_nif.utility.util_logging import NifLog
 
+# enum values of blender's keyframe interpolation
+B_INTERPOLATIONS = {"CONSTANT": 0, "LINEAR": 1, "BEZIER": 2}
+
 
 class Animation:
 
@@ -134,13 +138,40 @@ class Animation:
             for fcurve in fcurves:
                 fcurve.extrapolation = 'CONSTANT'
 
-    def add_key(self, fcurves, t, key, interp):
+    def add_keys(self, fcurves, times, keys, interp):
         """
-        Add a key (len=n) to a set of fcurves (len=n) at the given frame. Set the key's interpolation to interp.
+        Add keys (shape m x n) to a set of fcurves (len=n) at the given times (len=m). Set the keys' interpolation to interp.
+        All keys of an empty fcurve are added in one go, rather than inserting them one by one.
         """
-        frame = round(t * animation.FPS)
-        for fcurve, k in zip(fcurves, key):
-            fcurve.keyframe_points.insert(frame, k).interpolation = interp
+        frames = np.round(np.asarray(times, dtype=np.float64) * animation.FPS)
+        if not len(frames):
+            return
+        keys = np.asarray(keys, dtype=np.float64).reshape(len(frames), len(fcurves))
+        # as with keyframe_points.insert, the last key on a frame wins; also sorts the keys by frame
+        _, last = np.unique(frames[::-1], return_index=True)
+        indices = len(frames) - 1 - last
+        frames = frames[indices]
+        keys = keys[indices]
+
+        for fcurve, values in zip(fcurves, keys.T):
+            b_points = fcurve.keyframe_points
+            if len(b_points):
+                # insert replaces existing keys on the same frame
+                for frame, value in zip(frames.tolist(), values.tolist()):
+                    b_points.insert(frame, value).interpolation = interp
+                continue
+            b_points.add(len(frames))
+            co = np.column_stack((frames, values)).astype(np.float32).ravel()
+            # handles start on the key, update() recalculates them
+            for attr in ("co", "handle_left", "handle_right"):
+                b_points.foreach_set(attr, co)
+            try:
+                b_points.foreach_set("interpolation", np.full(len(frames), B_INTERPOLATIONS[interp], dtype=np.int32))
+            except TypeError:
+                # enums do not support raw array access in all blender versions
+                for b_point in b_points:
+                    b_point.interpolation = interp
+            fcurve.update()
 
     # import animation groups
     def import_text_keys(self, n_block, b_action):
@@ -0,0 +1,268 @@
+"""This script contains helper methods to decode B-spline interpolator data in bulk."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import weakref
+
+import numpy as np
+
+from pyffi.formats.nif import NifFormat
+
+# nif B-splines are open uniform cubic B-splines
+DEGREE = 3
+# offset value of a channel without data
+NO_DATA = 65535
+# shorts map onto [-1, 1] after dividing by this
+SHORT_MAX = 32767.0
+
+# control points of an NiBSplineData, converted to arrays once as it is shared by all interpolators of a sequence
+_CONTROL_POINTS = weakref.WeakKeyDictionary()
+
+
+def get_knots(num_control_points, degree=DEGREE):
+    """The clamped, uniform knot vector for num_control_points, ranging from 0 to num_control_points - degree."""
+    return np.concatenate((np.zeros(degree),
+                           np.arange(num_control_points - degree + 1),
+                           np.full(degree, num_control_points - degree))).astype(np.float64)
+
+
+def get_basis(num_control_points, params, degree=DEGREE):
+    """
+    Evaluate all basis functions at all params (in [0, 1]) at once, with the Cox-de Boor recursion.
+    Returns a (len(params), num_control_points) matrix, so that the curve samples are basis @ control_points.
+    """
+    # splines with too few points fall back to lower degrees
+    degree = max(min(degree, num_control_points - 1), 0)
+    knots = get_knots(num_control_points, degree)
+    u = np.clip(np.asarray(params, dtype=np.float64), 0.0, 1.0) * knots[-1]
+    # degree 0: each sample lies in exactly one knot span, the end point belongs to the last span
+    spans = degree + np.clip(np.floor(u).astype(int), 0, num_control_points - degree - 1)
+    basis = np.zeros((len(u), num_control_points + degree))
+    basis[np.arange(len(u)), spans] = 1.0
+    u = u[:, np.newaxis]
+    for p in range(1, degree + 1):
+        count = num_control_points + degree - p
+        i = np.arange(count)
+        left_den = knots[i + p] - knots[i]
+        right_den = knots[i + p + 1] - knots[i + 1]
+        # repeated knots give empty spans, whose terms vanish
+        left = np.divide(u - knots[i], left_den, out=np.zeros((len(u), count)), where=left_den > 0)
+        right = np.divide(knots[i + p + 1] - u, right_den, out=np.zeros((len(u), count)), where=right_den > 0)
+        basis = left * basis[:, :count] + right * basis[:, 1:count + 1]
+    return basis
+
+
+def get_control_points(n_spline_data):
+    """Float and short control points of a NiBSplineData as arrays."""
+    points = _CONTROL_POINTS.get(n_spline_data)
+    # convert again if points were appended since
+    if points is None or (len(points[0]), len(points[1])) != (n_spline_data.num_float_control_points,
+                                                               n_spline_data.num_short_control_points):
+        points = (np.array(list(n_spline_data.float_control_points), dtype=np.float64),
+                  np.array(list(n_spline_data.short_control_points), dtype=np.float64))
+        _CONTROL_POINTS[n_spline_data] = points
+    return points
+
+
+def get_times(n_interp, fps):
+    """Sample times for an interpolator, one per frame from its start to its stop time."""
+    num_frames = max(int(round((n_interp.stop_time - n_interp.start_time) * fps)), 1)
+    return np.linspace(n_interp.start_time, n_interp.stop_time, num_frames + 1)
+
+
+def get_keys(n_interp, times, offset, element_size, bias=None, multiplier=None):
+    """
+    Evaluate a channel of a B-spline interpolator at all times in one go.
+    Compressed channels are given by their bias and multiplier. Returns an (n, element_size) array, empty without data.
+    """
+    if offset == NO_DATA or not n_interp.basis_data or not n_interp.spline_data:
+        return np.empty((0, element_size))
+    num_control_points = n_interp.basis_data.num_control_points
+    float_points, short_points = get_control_points(n_interp.spline_data)
+    if bias is None:
+        points = float_points[offset:offset + num_control_points * element_size]
+    else:
+        # dequantize the whole channel at once
+        points = bias + short_points[offset:offset + num_control_points * element_size] * (multiplier / SHORT_MAX)
+    points = points.reshape(num_control_points, element_size)
+    duration = n_interp.stop_time - n_interp.start_time
+    if duration > 0:
+        params = (np.asarray(times, dtype=np.float64) - n_interp.start_time) / duration
+    else:
+        params = np.zeros(len(times))
+    return get_basis(num_control_points, params) @ points
+
+
+def get_translations(n_interp, times):
+    """Translation samples of a (compressed) NiBSplineTransformInterpolator, shape (n, 3)."""
+    if isinstance(n_interp, NifFormat.NiBSplineCompTransformInterpolator):
+        return get_keys(n_interp, times, n_interp.translation_offset, 3, n_interp.translation_bias, n_interp.translation_multiplier)
+    return get_keys(n_interp, times, n_interp.translation_offset, 3)
+
+
+def get_rotations(n_interp, times):
+    """Rotation samples (w, x, y, z) of a (compressed) NiBSplineTransformInterpolator, shape (n, 4)."""
+    if isinstance(n_interp, NifFormat.NiBSplineCompTransformInterpolator):
+        keys = get_keys(n_interp, times, n_interp.rotation_offset, 4, n_interp.rotation_bias, n_interp.rotation_multiplier)
+    else:
+        keys = get_keys(n_interp, times, n_interp.rotation_offset, 4)
+    # blending quaternion components does not preserve unit length
+    if len(keys):
+        keys /= np.linalg.norm(keys, axis=-1, keepdims=True)
+    return keys
+
+
+def get_scales(n_interp, times):
+    """Scale samples of a (compressed) NiBSplineTransformInterpolator, shape (n,)."""
+    if isinstance(n_interp, NifFormat.NiBSplineCompTransformInterpolator):
+        keys = get_keys(n_interp, times, n_interp.scale_offset, 1, n_interp.scale_bias, n_interp.scale_multiplier)
+    else:
+        keys = get_keys(n_interp, times, n_interp.scale_offset, 1)
+    return keys[:, 0]
+
+
+def get_floats(n_interp, times):
+    """Float samples of a NiBSplineCompFloatInterpolator, shape (n,)."""
+    keys = get_keys(n_interp, times, n_interp.offset, 1, n_interp.bias, n_interp.multiplier)
+    return keys[:, 0]
+
+
+def quantize(points):
+    """Compress control points into shorts with a common bias and multiplier (half range), as NiBSplineData.append_comp_data."""
+    max_value = points.max()
+    min_value = points.min()
+    bias = 0.5 * (max_value + min_value)
+    # no need to compress a constant channel
+    multiplier = 0.5 * (max_value - min_value) if max_value > min_value else 1.0
+    shorts = np.clip(np.round((points - bias) * (SHORT_MAX / multiplier)), -SHORT_MAX, SHORT_MAX).astype(np.int16)
+    return shorts, float(bias), float(multiplier)
+
+
+def dequantize(shorts, bias, multiplier):
+    return bias + shorts * (multiplier / SHORT_MAX)
+
+
+def fit_channels(params, channels, max_control_points=None):
+    """
+    Fit compressed control points with a common basis to several channels of keys sampled at params (in [0, 1]).
+    Each channel is a tuple (keys, tolerance, get_error, normalize), with keys an (n, element_size) array.
+    Uses the fewest control points that keep every channel within its tolerance, after quantization.
+    Returns whether the tolerances were met, the number of control points and a (shorts, bias, multiplier) tuple per channel.
+    """
+    params = np.asarray(params, dtype=np.float64)
+    all_keys = np.concatenate([keys for keys, tolerance, get_error, normalize in channels], axis=1)
+    # a cubic spline needs at least degree + 1 points, more points than samples cannot improve the fit
+    min_control_points = DEGREE + 1
+    max_control_points = max(min_control_points, max_control_points or len(params))
+
+    def fit(num_control_points):
+        basis = get_basis(num_control_points, params)
+        # least squares fit of all channels at once
+        points = np.linalg.lstsq(basis, all_keys, rcond=None)[0]
+        results = []
+        within_tolerance = True
+        start = 0
+        for keys, tolerance, get_error, normalize in channels:
+            stop = start + keys.shape[1]
+            shorts, bias, multiplier = quantize(points[:, start:stop])
+            decoded = basis @ dequantize(shorts, bias, multiplier)
+            if normalize:
+                decoded /= np.linalg.norm(decoded, axis=-1, keepdims=True)
+            within_tolerance &= bool(np.all(get_error(decoded, keys) <= tolerance))
+            results.append((shorts, bias, multiplier))
+            start = stop
+        return within_tolerance, results
+
+    # bisect for the smallest number of control points within tolerance
+    best = max_control_points, fit(max_control_points)
+    low, high = min_control_points, max_control_points - 1
+    while low <= high:
+        middle = (low + high) // 2
+        result = fit(middle)
+        if result[0]:
+            best = middle, result
+            high = middle - 1
+        else:
+            low = middle + 1
+    num_control_points, (within_tolerance, results) = best
+    return within_tolerance, num_control_points, results
+
+
+def set_comp_transform(n_interp, times, translations, rotations, scales, tolerances, get_errors):
+    """
+    Fit the keys sampled at times to the compressed B-splines of an NiBSplineCompTransformInterpolator, whose
+    spline and basis data must be set. Channels without keys (empty arrays) and constant channels are stored as the
+    interpolator's static value. Tolerances and error functions are given as (translation, rotation, scale) tuples.
+    Returns whether all channels are within tolerance.
+    """
+    translations = np.asarray(translations, dtype=np.float64).reshape(-1, 3)
+    rotations = np.asarray(rotations, dtype=np.float64).reshape(-1, 4)
+    scales = np.asarray(scales, dtype=np.float64).reshape(-1, 1)
+    duration = n_interp.stop_time - n_interp.start_time
+    params = (np.asarray(times, dtype=np.float64) - n_interp.start_time) / duration if duration > 0 else np.zeros(len(times))
+
+    channels = []
+    offsets = []
+    for name, keys, tolerance, get_error in zip(("translation", "rotation", "scale"), (translations, rotations, scales),
+                                                tolerances, get_errors):
+        setattr(n_interp, name + "_offset", NO_DATA)
+        if not len(keys):
+            continue
+        if np.all(get_error(np.broadcast_to(keys[0], keys.shape), keys) <= tolerance):
+            # constant channel
+            if name == "translation":
+                n_interp.translation.x, n_interp.translation.y, n_interp.translation.z = keys[0]
+            elif name == "rotation":
+                n_interp.rotation.w, n_interp.rotation.x, n_interp.rotation.y, n_interp.rotation.z = keys[0]
+            else:
+                n_interp.scale = keys[0, 0]
+            continue
+        channels.append((keys, tolerance, get_error, name == "rotation"))
+        offsets.append(name)
+
+    n_interp.basis_data.num_control_points = 0
+    if not channels:
+        return True
+    within_tolerance, num_control_points, results = fit_channels(params, channels)
+    n_interp.basis_data.num_control_points = num_control_points
+    for name, (shorts, bias, multiplier) in zip(offsets, results):
+        offset = n_interp.spline_data.append_short_data([tuple(point) for point in shorts.tolist()])
+        setattr(n_interp, name + "_offset", offset)
+        setattr(n_interp, name + "_bias", bias)
+        setattr(n_interp, name + "_multiplier", multiplier)
+    return within_tolerance
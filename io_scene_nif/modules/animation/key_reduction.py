@@ -0,0 +1,131 @@
+"""This script contains helper methods to drop redundant keys from animation curves."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import numpy as np
+
+
+def lerp(start, end, fractions):
+    """Linear interpolation between two keys at all fractions."""
+    fractions = fractions.reshape((-1,) + (1,) * (np.ndim(start)))
+    return start + (end - start) * fractions
+
+
+def slerp(start, end, fractions):
+    """Spherical linear interpolation between two (w, x, y, z) quaternions at all fractions, along the shortest arc."""
+    cos_angle = np.dot(start, end)
+    if cos_angle < 0:
+        end = -end
+        cos_angle = -cos_angle
+    fractions = fractions[:, np.newaxis]
+    angle = np.arccos(min(cos_angle, 1.0))
+    # nearly identical quaternions, fall back to linear interpolation
+    if angle < 1e-6:
+        quats = lerp(start, end, fractions)
+    else:
+        quats = (np.sin((1 - fractions) * angle) * start + np.sin(fractions * angle) * end) / np.sin(angle)
+    return quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+
+
+def distance_error(approx, keys):
+    """Euclidean distance, for translations."""
+    return np.linalg.norm(approx - keys, axis=-1)
+
+
+def relative_error(approx, keys):
+    """Error relative to the magnitude of the key, for scales."""
+    return np.abs(approx - keys) / np.maximum(np.abs(keys), 1e-6)
+
+
+def absolute_error(approx, keys):
+    """Absolute difference, for single euler angles."""
+    return np.abs(approx - keys)
+
+
+def angle_error(approx, keys):
+    """Angle of the rotation between (w, x, y, z) quaternions."""
+    cos_half_angle = np.abs(np.einsum('ni,ni->n', approx, keys))
+    return 2 * np.arccos(np.minimum(cos_half_angle, 1.0))
+
+
+def reduce_keys(times, keys, tolerance, interpolate=lerp, get_error=distance_error):
+    """
+    Return the indices of the keys that are needed to reproduce the curve within tolerance, when interpolating
+    between the remaining keys. Constant curves reduce to their first key, other curves always keep both end keys.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    keys = np.asarray(keys, dtype=np.float64)
+    num_keys = len(times)
+    if num_keys < 2:
+        return np.arange(num_keys)
+    # constant channel
+    if np.all(get_error(np.broadcast_to(keys[0], keys.shape), keys) <= tolerance):
+        return np.zeros(1, dtype=int)
+    # Ramer-Douglas-Peucker along time, every segment is tested against all of its inner keys at once
+    keep = np.zeros(num_keys, dtype=bool)
+    keep[[0, -1]] = True
+    segments = [(0, num_keys - 1)]
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2:
+            continue
+        fractions = (times[start + 1:end] - times[start]) / (times[end] - times[start])
+        errors = get_error(interpolate(keys[start], keys[end], fractions), keys[start + 1:end])
+        worst = np.argmax(errors)
+        if errors[worst] > tolerance:
+            split = start + 1 + worst
+            keep[split] = True
+            segments.append((start, split))
+            segments.append((split, end))
+    return np.flatnonzero(keep)
+
+
+def reduce_translation_keys(times, translations, tolerance):
+    return reduce_keys(times, translations, tolerance, lerp, distance_error)
+
+
+def reduce_rotation_keys(times, quats, tolerance):
+    return reduce_keys(times, quats, tolerance, slerp, angle_error)
+
+
+def reduce_euler_keys(times, angles, tolerance):
+    return reduce_keys(times, angles, tolerance, lerp, absolute_error)
+
+
+def reduce_scale_keys(times, scales, tolerance):
+    return reduce_keys(times, scales, tolerance, lerp, relative_error)
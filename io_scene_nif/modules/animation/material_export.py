@@ -115,6 +115,8 @@ class MaterialAnimation:
                 n_key.value = fcurves[0].keyframe_points[i].co[1]
             else:
                 n_key.value.x, n_key.value.y, n_key.value.z = [fcu.keyframe_points[i].co[1] for fcu in fcurves]
+        # share the key data with identical curves exported before
+        n_key_data = block_store.intern_block(n_key_data)
         # if key data is present
         # then add the controller so it is exported
         if fcurves[0].keyframe_points:
@@ -154,7 +156,7 @@ class MaterialAnimation:
         n_uv_data = NifFormat.NiUVData()
         for fcu, n_uv_group in zip(fcurves, n_uv_data.uv_groups):
             if fcu:
-                NifLog.debug("Exporting {0} as NiUVData".format(fcu))
+                NifLog.debug("Exporting %s as NiUVData", fcu)
                 n_uv_group.num_keys = len(fcu.keyframe_points)
                 n_uv_group.interpolation = NifFormat.KeyType.LINEAR_KEY
                 n_uv_group.keys.update_size()
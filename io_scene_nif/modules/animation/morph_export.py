@@ -37,7 +37,10 @@
 #
 # ***** END LICENSE BLOCK *****
 
+from itertools import chain
+
 import bpy
+import numpy as np
 from pyffi.formats.nif import NifFormat
 from pyffi.formats.egm import EgmFormat
 from io_scene_nif.utility.util_global import EGMData
@@ -52,7 +55,7 @@ class MorphAnimation:
     def __init__(self, parent):
         self.animationhelper = parent
         self.fps = bpy.context.scene.render.fps
-        EGMData.data = None
+        EGMData.init(None)
 
     def export_morph(self, b_mesh, n_trishape, vertmap):
         # shape b_key morphing
@@ -73,8 +76,32 @@ class MorphAnimation:
             elif b_key.animation_data:
                 self.export_morph_animation(b_mesh, b_key, n_trishape, vertmap)
 
+    @staticmethod
+    def get_coords(b_points):
+        """Coordinates of all vertices or shape key points, read in bulk."""
+        coords = np.empty(len(b_points) * 3, dtype=np.float32)
+        b_points.foreach_get("co", coords)
+        return coords.reshape(-1, 3)
+
+    @staticmethod
+    def get_coords_2d(b_keyframe_points):
+        """Frame and value of all keyframe points, read in bulk."""
+        co = np.empty(len(b_keyframe_points) * 2, dtype=np.float32)
+        b_keyframe_points.foreach_get("co", co)
+        return co.reshape(-1, 2).astype(np.float64)
+
+    @staticmethod
+    def get_vertmap_indices(vertmap):
+        """Flatten vertmap (blender vertex -> nif vertices) into index arrays, so that nif[n_indices] = blender[b_indices]."""
+        num_n_vertices = [len(n_v_indices) if n_v_indices else 0 for n_v_indices in vertmap]
+        b_indices = np.repeat(np.arange(len(vertmap)), num_n_vertices)
+        n_indices = np.fromiter(chain.from_iterable(n_v_indices for n_v_indices in vertmap if n_v_indices), dtype=int, count=len(b_indices))
+        return b_indices, n_indices
+
     def export_egm(self, key_blocks):
-        EGMData.data = EgmFormat.Data(num_vertices=len(key_blocks[0].data))
+        EGMData.init(EgmFormat.Data(num_vertices=len(key_blocks[0].data)))
+        # note: key_blocks[0] is base b_key
+        base_coords = self.get_coords(key_blocks[0].data)
         for key_block in key_blocks:
             if key_block.name.startswith("EGM SYM"):
                 morph = EGMData.data.add_sym_morph()
@@ -83,12 +110,14 @@ class MorphAnimation:
             else:
                 continue
             NifLog.info("Exporting morph {0} to egm".format(key_block.name))
-            relative_vertices = []
-
-            # note: key_blocks[0] is base b_key
-            for vert, key_vert in zip(key_blocks[0].data, key_block.data):
-                relative_vertices.append(key_vert - vert)
-            morph.set_relative_vertices(relative_vertices)
+            relative_vertices = self.get_coords(key_block.data).astype(np.float64) - base_coords
+            # quantize as MorphRecord.set_relative_vertices does, but for all vertices at once
+            max_value = np.abs(relative_vertices).max() if len(relative_vertices) else 0.0
+            morph.scale = max_value / 32767.0
+            if max_value > 0:
+                relative_vertices = np.trunc(relative_vertices / morph.scale)
+            for vert, (x, y, z) in zip(morph.vertices, relative_vertices.astype(np.int16).tolist()):
+                vert.x, vert.y, vert.z = x, y, z
 
     def export_morph_animation(self, b_mesh, b_key, n_trishape, vertmap):
         
@@ -118,6 +147,10 @@ class MorphAnimation:
         # TODO [morph] just guessing here, data seems to be zero always
         morph_ctrl.num_unknown_ints = len(b_key.key_blocks)
         morph_ctrl.unknown_ints.update_size()
+
+        # scatter blender vertices onto their nif vertices in one go
+        b_indices, n_indices = self.get_vertmap_indices(vertmap)
+        base_coords = self.get_coords(b_mesh.vertices)
         for key_block_num, key_block in enumerate(b_key.key_blocks):
             # export morphed vertices
             n_morph = morph_data.morphs[key_block_num]
@@ -125,22 +158,16 @@ class MorphAnimation:
             NifLog.info("Exporting n_morph {0}: vertices".format(key_block.name))
             n_morph.arg = morph_data.num_vertices
             n_morph.vectors.update_size()
-            for b_v_index, (n_v_indices, b_vert) in enumerate(list(zip(vertmap, key_block.data))):
-                # see if this b_vert is used in the nif
-                if not n_v_indices:
-                    continue
-                # copy blender shapekey vertex
-                mv = b_vert.co.copy()
-                # make the consecutive keys relative to base shapekey
-                if key_block_num > 0:
-                    mv.x -= b_mesh.vertices[b_v_index].co.x
-                    mv.y -= b_mesh.vertices[b_v_index].co.y
-                    mv.z -= b_mesh.vertices[b_v_index].co.z
-                # update nif morph vectors
-                for n_v_index in n_v_indices:
-                    n_morph.vectors[n_v_index].x = mv.x
-                    n_morph.vectors[n_v_index].y = mv.y
-                    n_morph.vectors[n_v_index].z = mv.z
+            # copy blender shapekey vertices
+            coords = self.get_coords(key_block.data)
+            # make the consecutive keys relative to base shapekey
+            if key_block_num > 0:
+                coords -= base_coords
+            vectors = np.zeros((morph_data.num_vertices, 3), dtype=np.float32)
+            vectors[n_indices] = coords[b_indices]
+            # update nif morph vectors
+            for n_vector, (x, y, z) in zip(n_morph.vectors, vectors.tolist()):
+                n_vector.x, n_vector.y, n_vector.z = x, y, z
 
             # create interpolator for shape b_key (needs to be there even if there is no fcu)
             interpol = block_store.create_block("NiFloatInterpolator")
@@ -170,12 +197,15 @@ class MorphAnimation:
                 n_data.num_keys = len(fcurves[0].keyframe_points)
                 n_data.keys.update_size()
 
-            for i, b_keyframe in enumerate(fcurves[0].keyframe_points):
-                frame, value = b_keyframe.co
-                t = frame / self.fps
-                for n_data in (n_morph, n_floatdata):
-                    n_data.keys[i].arg = n_morph.interpolation
-                    n_data.keys[i].time = t
-                    n_data.keys[i].value = value
-                    # n_data.keys[i].forwardTangent = 0.0 # ?
-                    # n_data.keys[i].backwardTangent = 0.0 # ?
+            co = self.get_coords_2d(fcu.keyframe_points)
+            times = (co[:, 0] / self.fps).tolist()
+            values = co[:, 1].tolist()
+            for n_data in (n_morph, n_floatdata):
+                for n_key, t, value in zip(n_data.keys, times, values):
+                    n_key.arg = n_morph.interpolation
+                    n_key.time = t
+                    n_key.value = value
+                    # n_key.forwardTangent = 0.0 # ?
+                    # n_key.backwardTangent = 0.0 # ?
+            # share the float data with identical morph curves exported before
+            interpol.data = block_store.intern_block(interpol.data)
@@ -104,8 +104,7 @@ class MorphAnimation(Animation):
                     fcu = self.create_fcurves(shape_action, "value", (0,), flags=n_morphCtrl.flags, keyname=shape_key.name)
                     
                     # set keyframes
-                    for key in morph_data.keys:
-                        self.add_key(fcu, key.time, (key.value,), interp)
+                    self.add_keys(fcu, [key.time for key in morph_data.keys], [(key.value,) for key in morph_data.keys], interp)
 
     def import_egm_morphs(self, b_obj, v_map, n_verts):
         """Import all EGM morphs as shape keys for blender object."""
@@ -81,6 +81,9 @@ class ObjectAnimation:
             n_bool_key.arg = n_bool_data.data.interpolation
             n_bool_key.time = n_vis_key.time
             n_bool_key.value = n_vis_key.value
+        # share the key data with identical curves exported before
+        n_vis_data = block_store.intern_block(n_vis_data)
+        n_bool_data = block_store.intern_block(n_bool_data)
 
         # if alpha data is present (check this by checking if times were added) then add the controller so it is exported
         if fcurves[0].keyframe_points:
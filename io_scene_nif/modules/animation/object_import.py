@@ -57,5 +57,5 @@ class ObjectAnimation(Animation):
         b_obj_action = self.create_action(b_obj, b_obj.name + "-Anim")
 
         fcurves = self.create_fcurves(b_obj_action, "hide", (0,), n_vis_ctrl.flags)
-        for key in n_vis_ctrl.data.keys:
-            self.add_key(fcurves, key.time, (key.value,), "CONSTANT")
+        n_keys = n_vis_ctrl.data.keys
+        self.add_keys(fcurves, [key.time for key in n_keys], [(key.value,) for key in n_keys], "CONSTANT")
@@ -37,14 +37,17 @@
 #
 # ***** END LICENSE BLOCK *****
 
+from functools import partial
+
 import bpy
-import mathutils
+import numpy as np
 
 from pyffi.formats.nif import NifFormat
 
 from io_scene_nif.modules import armature
+from io_scene_nif.modules.animation import bspline, key_reduction
 from io_scene_nif.modules.object.block_registry import block_store
-from io_scene_nif.utility import nif_utils
+from io_scene_nif.utility import nif_utils, util_math
 from io_scene_nif.utility.util_logging import NifLog
 from io_scene_nif.utility.util_global import NifOp
 
@@ -54,23 +57,97 @@ class TransformAnimation:
     def __init__(self, parent):
         self.nif_export = parent
         self.fps = bpy.context.scene.render.fps
+        # key counts before and after key reduction, for reporting
+        self.num_keys_in = 0
+        self.num_keys_out = 0
 
     @staticmethod
-    def iter_frame_key(fcurves, MathutilsClass):
+    def get_frames_keys(fcurves):
         """
-        Iterator that yields a tuple of frame and key for all fcurves.
+        Frames and keys (shape n x len(fcurves)) of all keyframe points of the fcurves, read in bulk.
         Assumes the fcurves are sampled at the same time and all have the same amount of keys
-        Return the key in the desired MathutilsClass
         """
-        for point in zip(*[fcu.keyframe_points for fcu in fcurves]):
-            frame = point[0].co[0]
-            key = [k.co[1] for k in point]
-            yield frame, MathutilsClass(key)
+        if not fcurves:
+            return np.empty(0), np.empty((0, 0))
+        num_keys = min(len(fcu.keyframe_points) for fcu in fcurves)
+        keys = np.empty((num_keys, len(fcurves)))
+        for i, fcu in enumerate(fcurves):
+            co = np.empty(len(fcu.keyframe_points) * 2, dtype=np.float32)
+            fcu.keyframe_points.foreach_get("co", co)
+            co = co.reshape(-1, 2)[:num_keys]
+            keys[:, i] = co[:, 1]
+        return co[:, 0].astype(np.float64), keys
+
+    @staticmethod
+    def get_frames_samples(fcurves, frames):
+        """Frames and keys (shape n x len(fcurves)) of the fcurves, evaluated at the given frames."""
+        frames = np.asarray(frames, dtype=np.float64)
+        if not fcurves:
+            return np.empty(0), np.empty((0, 0))
+        keys = np.array([[fcu.evaluate(frame) for fcu in fcurves] for frame in frames.tolist()]).reshape(len(frames), len(fcurves))
+        return frames, keys
+
+    def reduce_curve(self, frames, keys, reduce_keys, tolerance):
+        """Drop the keys of a curve that are not needed to reproduce it within tolerance."""
+        if len(frames) < 2:
+            return frames, keys
+        kept = reduce_keys(frames, keys, tolerance)
+        self.num_keys_in += len(frames)
+        self.num_keys_out += len(kept)
+        return frames[kept], keys[kept]
+
+    def report_key_reduction(self):
+        if self.num_keys_in:
+            NifLog.info("Key reduction kept {0} of {1} keys (compression ratio {2:.2f})".format(
+                self.num_keys_out, self.num_keys_in, self.num_keys_in / max(self.num_keys_out, 1)))
+
+    def set_keys(self, n_keys, frames, values, set_value):
+        """Fill the keys of a pyffi key array with a plain list per column, at the cost of one assignment per field."""
+        n_keys.update_size()
+        for n_key, time, value in zip(n_keys, (frames / self.fps).tolist(), values.tolist()):
+            n_key.time = time
+            set_value(n_key, value)
+
+    @staticmethod
+    def set_quaternion(n_key, value):
+        n_key.value.w, n_key.value.x, n_key.value.y, n_key.value.z = value
 
-    def export_transforms(self, parent_block, b_obj, b_action, bone=None):
+    @staticmethod
+    def set_vector(n_key, value):
+        n_key.value.x, n_key.value.y, n_key.value.z = value
+
+    @staticmethod
+    def set_float(n_key, value):
+        n_key.value = value
+
+    def export_bspline(self, n_kfc, n_kfi, exp_fcurves, target_name, frames, quats, translations, scales):
+        """Fit the keys, sampled at frames, to the compressed b-splines of n_kfi."""
+        n_kfi.start_time = n_kfc.start_time
+        n_kfi.stop_time = n_kfc.stop_time
+        n_kfi.spline_data = block_store.create_block("NiBSplineData", exp_fcurves)
+        n_kfi.basis_data = block_store.create_block("NiBSplineBasisData", exp_fcurves)
+
+        # neighbouring quaternions must lie in the same hemisphere for the spline to take the short way
+        quats = util_math.quat_make_compatible(quats)
+        within_tolerance = bspline.set_comp_transform(
+            n_kfi, frames / self.fps, translations, quats, scales,
+            (NifOp.props.key_tolerance_translation, NifOp.props.key_tolerance_rotation, NifOp.props.key_tolerance_scale),
+            (key_reduction.distance_error, key_reduction.angle_error, key_reduction.relative_error))
+        if not within_tolerance:
+            NifLog.warn("B-spline animation of {0} exceeds the key tolerances".format(target_name))
+        n_kfi.basis_data = block_store.intern_block(n_kfi.basis_data)
+        n_kfi.spline_data = block_store.intern_block(n_kfi.spline_data)
+
+        # count the control points against the keys they replace
+        self.num_keys_in += len(quats) + len(translations) + len(scales)
+        num_channels = sum(offset != bspline.NO_DATA for offset in (n_kfi.translation_offset, n_kfi.rotation_offset, n_kfi.scale_offset))
+        self.num_keys_out += num_channels * n_kfi.basis_data.num_control_points
+
+    def export_transforms(self, parent_block, b_obj, b_action, bone=None, bind=None):
         """
         If bone == None, object level animation is exported.
         If a bone is given, skeletal animation is exported.
+        The decomposed bind matrix (scale, rotation, translation) can be passed as bind, else it is calculated.
         """
         
         # b_action may be None, then nothing is done.
@@ -115,18 +192,34 @@ class TransformAnimation:
             # bone isn't keyframed in this action, nothing to do here
             return
         # decompose the bind matrix
-        bind_scale, bind_rot, bind_trans = nif_utils.decompose_srt(bind_matrix)
-        n_kfc, n_kfi = self.nif_export.animationhelper.create_controller(parent_block, target_name, priority)
+        if bind:
+            bind_scale, bind_rot, bind_trans = bind
+        else:
+            bind_scale, bind_rot, bind_trans = nif_utils.decompose_srt(bind_matrix)
+        if NifOp.props.bspline_compression:
+            interpolator_type = "NiBSplineCompTransformInterpolator"
+        else:
+            interpolator_type = "NiTransformInterpolator"
+        n_kfc, n_kfi = self.nif_export.animationhelper.create_controller(parent_block, target_name, priority, interpolator_type)
 
         # fill in the non-trivial values
         start_frame, stop_frame = b_action.frame_range
         self.nif_export.animationhelper.set_flags_and_timing(n_kfc, exp_fcurves, start_frame, stop_frame)
 
-        # get the desired fcurves for each data type from exp_fcurves
-        quaternions = [fcu for fcu in exp_fcurves if fcu.data_path.endswith("quaternion")]
-        translations = [fcu for fcu in exp_fcurves if fcu.data_path.endswith("location")]
-        eulers = [fcu for fcu in exp_fcurves if fcu.data_path.endswith("euler")]
-        scales = [fcu for fcu in exp_fcurves if fcu.data_path.endswith("scale")]
+        use_bspline = isinstance(n_kfi, NifFormat.NiBSplineCompTransformInterpolator)
+        if use_bspline:
+            # the b-spline is fitted to the curves sampled at every frame, not just to the keyframes
+            bspline_frames = np.arange(int(start_frame), int(stop_frame) + 1)
+            get_frames_keys = partial(self.get_frames_samples, frames=bspline_frames)
+        else:
+            get_frames_keys = self.get_frames_keys
+
+        # get the desired fcurves for each data type from exp_fcurves, in the order of their channels
+        exp_fcurves_sorted = sorted(exp_fcurves, key=lambda fcu: fcu.array_index)
+        quaternions = [fcu for fcu in exp_fcurves_sorted if fcu.data_path.endswith("quaternion")]
+        translations = [fcu for fcu in exp_fcurves_sorted if fcu.data_path.endswith("location")]
+        eulers = [fcu for fcu in exp_fcurves_sorted if fcu.data_path.endswith("euler")]
+        scales = [fcu for fcu in exp_fcurves_sorted if fcu.data_path.endswith("scale")]
 
         # ensure that those groups that are present have all their fcurves
         for fcus, num_fcus in ( (quaternions, 4),
@@ -136,31 +229,63 @@ class TransformAnimation:
             if fcus and len(fcus) != num_fcus:
                 raise nif_utils.NifError("Incomplete key set {} for action {}. Ensure that if a bone is keyframed for a property, all channels are keyframed.".format(bonestr, b_action.name))
 
-        # go over all fcurves collected above and transform and store all their keys
-        quat_curve = []
-        euler_curve = []
-        trans_curve = []
-        scale_curve = []
-        for frame, quat in self.iter_frame_key(quaternions, mathutils.Quaternion):
-            quat = armature.export_keymat(bind_rot, quat.to_matrix().to_4x4(), bone).to_quaternion()
-            quat_curve.append((frame, quat))
-
-        for frame, euler in self.iter_frame_key(eulers, mathutils.Euler):
-            keymat = armature.export_keymat(bind_rot, euler.to_matrix().to_4x4(), bone)
-            euler = keymat.to_euler("XYZ", euler)
-            euler_curve.append((frame, euler))
-
-        for frame, trans in self.iter_frame_key(translations, mathutils.Vector):
-            keymat = armature.export_keymat(bind_rot, mathutils.Matrix.Translation(trans), bone)
-            trans = keymat.to_translation() + bind_trans
-            trans_curve.append((frame, trans))
-
-        for frame, scale in self.iter_frame_key(scales, mathutils.Vector):
-            # just use the first scale curve and assume even scale over all curves
-            scale_curve.append((frame, scale[0]))
-        
+        # go over all fcurves collected above and transform all their keys at once
+        quat_frames, quat_keys = get_frames_keys(quaternions)
+        if len(quat_frames):
+            quat_keys = armature.export_keymat_quaternions(bind_rot, util_math.quat_normalize(quat_keys), bone)
+
+        euler_frames, euler_keys = get_frames_keys(eulers)
+        if len(euler_frames):
+            euler_keys = armature.export_keymat_eulers(bind_rot, euler_keys, bone)
+
+        trans_frames, trans_keys = get_frames_keys(translations)
+        if len(trans_frames):
+            trans_keys = armature.export_keymat_translations(bind_rot, trans_keys, bone) + tuple(bind_trans)
+
+        scale_frames, scale_keys = get_frames_keys(scales)
+        # just use the first scale curve and assume even scale over all curves
+        scale_keys = scale_keys[:, 0] if len(scale_frames) else np.empty(0)
+
+        if use_bspline:
+            # b-splines store rotations as quaternions only
+            if len(euler_frames):
+                quat_keys = util_math.matrix_to_quat(util_math.euler_to_matrix(euler_keys))
+            # every present channel is sampled at the same frames, whichever channels are keyframed
+            self.export_bspline(n_kfc, n_kfi, exp_fcurves, target_name, bspline_frames,
+                                quat_keys.reshape(-1, 4), trans_keys.reshape(-1, 3), scale_keys)
+            return
+
+        # each euler axis is a separate key list
+        euler_curves = [(euler_frames, euler_keys[:, i]) for i in range(3)] if len(euler_frames) else []
+
+        if NifOp.props.reduce_keys:
+            quat_frames, quat_keys = self.reduce_curve(quat_frames, quat_keys, key_reduction.reduce_rotation_keys, NifOp.props.key_tolerance_rotation)
+            euler_curves = [self.reduce_curve(frames, keys, key_reduction.reduce_euler_keys, NifOp.props.key_tolerance_rotation)
+                            for frames, keys in euler_curves]
+            trans_frames, trans_keys = self.reduce_curve(trans_frames, trans_keys, key_reduction.reduce_translation_keys, NifOp.props.key_tolerance_translation)
+            scale_frames, scale_keys = self.reduce_curve(scale_frames, scale_keys, key_reduction.reduce_scale_keys, NifOp.props.key_tolerance_scale)
+            if n_kfi:
+                # constant channels are stored as the interpolator's static value instead of keys
+                if len(trans_frames) == 1:
+                    n_kfi.translation.x, n_kfi.translation.y, n_kfi.translation.z = trans_keys[0].tolist()
+                    trans_frames = trans_frames[:0]
+                if euler_curves and all(len(frames) == 1 for frames, keys in euler_curves):
+                    euler = [keys[0] for frames, keys in euler_curves]
+                    quat_frames = euler_curves[0][0]
+                    quat_keys = util_math.matrix_to_quat(util_math.euler_to_matrix([euler]))
+                    euler_curves = []
+                if len(quat_frames) == 1:
+                    n_kfi.rotation.w, n_kfi.rotation.x, n_kfi.rotation.y, n_kfi.rotation.z = quat_keys[0].tolist()
+                    quat_frames = quat_frames[:0]
+                if len(scale_frames) == 1:
+                    n_kfi.scale = float(scale_keys[0])
+                    scale_frames = scale_frames[:0]
+                if not (len(quat_frames) or euler_curves or len(trans_frames) or len(scale_frames)):
+                    # all channels are static, no need to add any keys
+                    return
+
         if n_kfi:
-            if max(len(c) for c in (quat_curve, euler_curve, trans_curve, scale_curve)) > 1:
+            if max(len(frames) for frames in (quat_frames, trans_frames, scale_frames, *(frames for frames, keys in euler_curves))) > 1:
                 # number of frames is > 1, so add transform data
                 n_kfd = block_store.create_block("NiTransformData", exp_fcurves)
                 n_kfi.data = n_kfd
@@ -169,18 +294,13 @@ class TransformAnimation:
                 # (see importer comments with import_kf_root: a single frame
                 # keyframe denotes an interpolator without further data)
                 # insufficient keys, so set the data and we're done!
-                if trans_curve:
-                    trans = trans_curve[0][1]
-                    n_kfi.translation.x, n_kfi.translation.y, n_kfi.translation.z = trans
-                if quat_curve:
-                    quat = quat_curve[0][1]
-                elif euler_curve:
-                    quat = euler_curve[0][1].to_quaternion()
-                if quat_curve or euler_curve:
-                    n_kfi.rotation.x = quat.x
-                    n_kfi.rotation.y = quat.y
-                    n_kfi.rotation.z = quat.z
-                    n_kfi.rotation.w = quat.w
+                if len(trans_frames):
+                    n_kfi.translation.x, n_kfi.translation.y, n_kfi.translation.z = trans_keys[0].tolist()
+                if len(euler_frames) and not len(quat_frames):
+                    quat_frames = euler_frames
+                    quat_keys = util_math.matrix_to_quat(util_math.euler_to_matrix(euler_keys))
+                if len(quat_frames):
+                    n_kfi.rotation.w, n_kfi.rotation.x, n_kfi.rotation.y, n_kfi.rotation.z = quat_keys[0].tolist()
                 # ignore scale for now...
                 n_kfi.scale = 1.0
                 # no need to add any keys, done
@@ -195,37 +315,28 @@ class TransformAnimation:
         #                  probably requires additional data like tangents and stuff
 
         # finally we can export the data calculated above
-        if euler_curve:
+        if euler_curves:
             n_kfd.rotation_type = NifFormat.KeyType.XYZ_ROTATION_KEY
             n_kfd.num_rotation_keys = 1  # *NOT* len(frames) this crashes the engine!
-            for i, coord in enumerate(n_kfd.xyz_rotations):
-                coord.num_keys = len(euler_curve)
+            for coord, (frames, keys) in zip(n_kfd.xyz_rotations, euler_curves):
+                coord.num_keys = len(frames)
                 coord.interpolation = NifFormat.KeyType.LINEAR_KEY
-                coord.keys.update_size()
-                for key, (frame, euler) in zip(coord.keys, euler_curve):
-                    key.time = frame / self.fps
-                    key.value = euler[i]
-        elif quat_curve:
+                self.set_keys(coord.keys, frames, keys, self.set_float)
+        elif len(quat_frames):
             n_kfd.rotation_type = NifFormat.KeyType.LINEAR_KEY
-            n_kfd.num_rotation_keys = len(quat_curve)
-            n_kfd.quaternion_keys.update_size()
-            for key, (frame, quat) in zip(n_kfd.quaternion_keys, quat_curve):
-                key.time = frame / self.fps
-                key.value.w = quat.w
-                key.value.x = quat.x
-                key.value.y = quat.y
-                key.value.z = quat.z
+            n_kfd.num_rotation_keys = len(quat_frames)
+            self.set_keys(n_kfd.quaternion_keys, quat_frames, quat_keys, self.set_quaternion)
 
         n_kfd.translations.interpolation = NifFormat.KeyType.LINEAR_KEY
-        n_kfd.translations.num_keys = len(trans_curve)
-        n_kfd.translations.keys.update_size()
-        for key, (frame, trans) in zip(n_kfd.translations.keys, trans_curve):
-            key.time = frame / self.fps
-            key.value.x, key.value.y, key.value.z = trans
+        n_kfd.translations.num_keys = len(trans_frames)
+        self.set_keys(n_kfd.translations.keys, trans_frames, trans_keys, self.set_vector)
 
         n_kfd.scales.interpolation = NifFormat.KeyType.LINEAR_KEY
-        n_kfd.scales.num_keys = len(scale_curve)
-        n_kfd.scales.keys.update_size()
-        for key, (frame, scale) in zip(n_kfd.scales.keys, scale_curve):
-            key.time = frame / self.fps
-            key.value = scale
+        n_kfd.scales.num_keys = len(scale_frames)
+        self.set_keys(n_kfd.scales.keys, scale_frames, scale_keys, self.set_float)
+
+        # share the key data with identical tracks exported before
+        if n_kfi:
+            n_kfi.data = block_store.intern_block(n_kfd)
+        else:
+            n_kfc.data = block_store.intern_block(n_kfd)
@@ -37,13 +37,13 @@
 #
 # ***** END LICENSE BLOCK *****
 
-import mathutils
+import numpy as np
 
 from functools import singledispatch
-from bisect import bisect_left
 from pyffi.formats.nif import NifFormat
 
-from io_scene_nif.modules import armature
+from io_scene_nif.modules import animation, armature
+from io_scene_nif.modules.animation import bspline
 from io_scene_nif.modules.animation.animation_import import Animation
 from io_scene_nif.utility import nif_utils
 from io_scene_nif.utility.util_logging import NifLog
@@ -52,19 +52,9 @@ from io_scene_nif.utility.util_logging import NifLog
 def interpolate(x_out, x_in, y_in):
     """
     sample (x_in I y_in) at x coordinates x_out
+    values outside of the input range are held constant, as a nif interpolator would
     """
-    y_out = []
-    intervals = zip(x_in, x_in[1:], y_in, y_in[1:])
-    slopes = [(y2 - y1) / (x2 - x1) for x1, x2, y1, y2 in intervals]
-    # if we had just one input, slope will be 0 for constant extrapolation
-    if not slopes:
-        slopes = [0, ]
-    for x in x_out:
-        i = bisect_left(x_in, x) - 1
-        # clamp to valid range
-        i = max(min(i, len(slopes) - 1), 0)
-        y_out.append(y_in[i] + slopes[i] * (x - x_in[i]))
-    return y_out
+    return np.interp(x_out, x_in, y_in)
 
 
 class TransformAnimation(Animation):
@@ -151,10 +141,10 @@ class TransformAnimation(Animation):
         if bone_name:
             b_obj = b_obj.pose.bones[bone_name]
 
-        translations = []
-        scales = []
-        rotations = []
-        eulers = []
+        times_trans = translations = ()
+        times_scale = scales = ()
+        times_rot = rotations = ()
+        times_euler = eulers = ()
         n_kfd = None
 
         # B-spline curve import
@@ -163,22 +153,21 @@ class TransformAnimation(Animation):
             # eg. bone stretching - see controlledblock.get_variable_1()
             # do not support this for now, no good representation in Blender
             if isinstance(n_kfc, NifFormat.NiBSplineCompFloatInterpolator):
-                # pyffi lacks support for this, but the following gets float keys
-                # keys = list(kfc._getCompKeys(kfc.offset, 1, kfc.bias, kfc.multiplier))
+                NifLog.info("Skipped B-spline on %s, float interpolators are not supported", bone_name)
                 return
-            times = list(n_kfc.get_times())
-            # just do these temp steps to avoid generating empty fcurves down the line
-            trans_temp = [mathutils.Vector(tup) for tup in n_kfc.get_translations()]
-            if trans_temp:
-                translations = zip(times, trans_temp)
-            rot_temp = [mathutils.Quaternion(tup) for tup in n_kfc.get_rotations()]
-            if rot_temp:
-                rotations = zip(times, rot_temp)
-            scale_temp = list(n_kfc.get_scales())
-            if scale_temp:
-                scales = zip(times, scale_temp)
-            # Bsplines are Bezier curves
-            interp_rot = interp_loc = interp_scale = "BEZIER"
+            # the decoded curve is sampled at every frame
+            times = bspline.get_times(n_kfc, animation.FPS)
+            # empty arrays avoid generating empty fcurves down the line
+            translations = bspline.get_translations(n_kfc, times)
+            times_trans = times
+            rotations = bspline.get_rotations(n_kfc, times)
+            times_rot = times
+            if len(rotations):
+                b_obj.rotation_mode = "QUATERNION"
+            scales = bspline.get_scales(n_kfc, times)
+            times_scale = times
+            # the samples lie on the curve, so keys can be joined linearly
+            interp_rot = interp_loc = interp_scale = "LINEAR"
         else:
             # ZT2 & Fallout
             n_kfd = n_kfc.data
@@ -193,27 +182,25 @@ class TransformAnimation(Animation):
                     # euler keys need not be sampled at the same time in KFs
                     # but we need complete key sets to do the space conversion
                     # so perform linear interpolation to import all keys properly
-
+                    xyz_keys = [n_kfd.xyz_rotations[i].keys for i in range(3)]
                     # get all the keys' times
-                    times_x = [key.time for key in n_kfd.xyz_rotations[0].keys]
-                    times_y = [key.time for key in n_kfd.xyz_rotations[1].keys]
-                    times_z = [key.time for key in n_kfd.xyz_rotations[2].keys]
+                    xyz_times = [[key.time for key in keys] for keys in xyz_keys]
                     # the unique time stamps we have to sample all curves at
-                    times_all = sorted(set(times_x + times_y + times_z))
+                    times_euler = np.unique(np.concatenate(xyz_times))
                     # the actual resampling
-                    x_r = interpolate(times_all, times_x, [key.value for key in n_kfd.xyz_rotations[0].keys])
-                    y_r = interpolate(times_all, times_y, [key.value for key in n_kfd.xyz_rotations[1].keys])
-                    z_r = interpolate(times_all, times_z, [key.value for key in n_kfd.xyz_rotations[2].keys])
-                eulers = zip(times_all, zip(x_r, y_r, z_r))
+                    eulers = np.stack([interpolate(times_euler, key_times, [key.value for key in keys]) if keys
+                                       else np.zeros(len(times_euler))
+                                       for key_times, keys in zip(xyz_times, xyz_keys)], axis=-1)
             else:
                 b_obj.rotation_mode = "QUATERNION"
-                rotations = [(key.time, key.value) for key in n_kfd.quaternion_keys]
+                times_rot = [key.time for key in n_kfd.quaternion_keys]
+                rotations = [(key.value.w, key.value.x, key.value.y, key.value.z) for key in n_kfd.quaternion_keys]
 
-            if n_kfd.scales.keys:
-                scales = [(key.time, key.value) for key in n_kfd.scales.keys]
+            times_scale = [key.time for key in n_kfd.scales.keys]
+            scales = [key.value for key in n_kfd.scales.keys]
 
-            if n_kfd.translations.keys:
-                translations = [(key.time, key.value) for key in n_kfd.translations.keys]
+            times_trans = [key.time for key in n_kfd.translations.keys]
+            translations = [(key.value.x, key.value.y, key.value.z) for key in n_kfd.translations.keys]
 
         # ZT2 - get extrapolation for every kfc
         if isinstance(n_kfc, NifFormat.NiKeyframeController):
@@ -221,37 +208,30 @@ class TransformAnimation(Animation):
         # fallout, Loki - we set extrapolation according to the root NiControllerSequence.cycle_type
         else:
             flags = None
-        
-        if eulers:
+
+        # all keys of a channel are converted to bone space in one go
+        if len(eulers):
             NifLog.debug('Rotation keys..(euler)')
             fcurves = self.create_fcurves(b_action, "rotation_euler", range(3), flags, bone_name)
-            for t, val in eulers:
-                key = mathutils.Euler(val)
-                if bone_name:
-                    key = armature.import_keymat(n_bone_bind_rot_inv, key.to_matrix().to_4x4()).to_euler()
-                self.add_key(fcurves, t, key, interp_rot)
-        elif rotations:
+            if bone_name:
+                eulers = armature.import_keymat_eulers(n_bone_bind_rot_inv, eulers)
+            self.add_keys(fcurves, times_euler, eulers, interp_rot)
+        elif len(rotations):
             NifLog.debug('Rotation keys...(quaternions)')
             fcurves = self.create_fcurves(b_action, "rotation_quaternion", range(4), flags, bone_name)
-            for t, val in rotations:
-                key = mathutils.Quaternion([val.w, val.x, val.y, val.z])
-                if bone_name:
-                    key = armature.import_keymat(n_bone_bind_rot_inv, key.to_matrix().to_4x4()).to_quaternion()
-                self.add_key(fcurves, t, key, interp_rot)
-        if translations:
+            if bone_name:
+                rotations = armature.import_keymat_quaternions(n_bone_bind_rot_inv, rotations)
+            self.add_keys(fcurves, times_rot, rotations, interp_rot)
+        if len(translations):
             NifLog.debug('Translation keys...')
             fcurves = self.create_fcurves(b_action, "location", range(3), flags, bone_name)
-            for t, val in translations:
-                key = mathutils.Vector([val.x, val.y, val.z])
-                if bone_name:
-                    key = armature.import_keymat(n_bone_bind_rot_inv, mathutils.Matrix.Translation(key - n_bone_bind_trans)).to_translation()
-                self.add_key(fcurves, t, key, interp_loc)
-        if scales:
+            if bone_name:
+                translations = armature.import_keymat_translations(n_bone_bind_rot_inv, translations, n_bone_bind_trans)
+            self.add_keys(fcurves, times_trans, translations, interp_loc)
+        if len(scales):
             NifLog.debug('Scale keys...')
             fcurves = self.create_fcurves(b_action, "scale", range(3), flags, bone_name)
-            for t, val in scales:
-                key = (val, val, val)
-                self.add_key(fcurves, t, key, interp_scale)
+            self.add_keys(fcurves, times_scale, np.repeat(np.asarray(scales, dtype=np.float64)[:, np.newaxis], 3, axis=1), interp_scale)
 
     def import_transforms(self, n_block, b_obj, bone_name=None):
         """Loads an animation attached to a nif block."""
@@ -38,8 +38,9 @@
 # ***** END LICENSE BLOCK *****
 
 import bpy
+import numpy as np
 from bpy_extras.io_utils import axis_conversion
-from io_scene_nif.utility import nif_utils
+from io_scene_nif.utility import nif_utils, util_math
 
 B_R_POSTFIX = "].R"
 B_L_POSTFIX = "].L"
@@ -142,6 +143,26 @@ def import_keymat(rest_rot_inv, key_matrix):
     return correction * (rest_rot_inv * key_matrix) * correction_inv
 
 
+def import_keymat_quaternions(rest_rot_inv, quats):
+    """Handles space conversions for an (n, 4) array of imported quaternion keys at once"""
+    pre = np.array(correction.to_quaternion() * rest_rot_inv.to_quaternion())
+    post = np.array(correction_inv.to_quaternion())
+    return util_math.quat_multiply(util_math.quat_multiply(pre, quats), post)
+
+
+def import_keymat_eulers(rest_rot_inv, eulers):
+    """Handles space conversions for an (n, 3) array of imported euler keys at once"""
+    pre = np.array(correction.to_3x3() * rest_rot_inv.to_3x3())
+    post = np.array(correction_inv.to_3x3())
+    return util_math.matrix_to_euler(pre @ util_math.euler_to_matrix(eulers) @ post)
+
+
+def import_keymat_translations(rest_rot_inv, translations, rest_trans):
+    """Handles space conversions for an (n, 3) array of imported translation keys at once"""
+    rot = np.array(correction.to_3x3() * rest_rot_inv.to_3x3())
+    return (np.asarray(translations, dtype=np.float64) - tuple(rest_trans)) @ rot.T
+
+
 def export_keymat(rest_rot, key_matrix, bone):
     """Handles space conversions for exported keys """
     if bone:
@@ -150,6 +171,34 @@ def export_keymat(rest_rot, key_matrix, bone):
         return rest_rot * key_matrix
 
 
+def export_keymat_quaternions(rest_rot, quats, bone):
+    """Handles space conversions for an (n, 4) array of exported quaternion keys at once"""
+    if bone:
+        pre = np.array(rest_rot.to_quaternion() * correction_inv.to_quaternion())
+        post = np.array(correction.to_quaternion())
+        return util_math.quat_multiply(util_math.quat_multiply(pre, quats), post)
+    return util_math.quat_multiply(np.array(rest_rot.to_quaternion()), quats)
+
+
+def export_keymat_eulers(rest_rot, eulers, bone):
+    """Handles space conversions for an (n, 3) array of exported euler keys at once, staying close to the original angles"""
+    matrices = util_math.euler_to_matrix(eulers)
+    if bone:
+        matrices = np.array(rest_rot.to_3x3() * correction_inv.to_3x3()) @ matrices @ np.array(correction.to_3x3())
+    else:
+        matrices = np.array(rest_rot.to_3x3()) @ matrices
+    return util_math.matrix_to_compatible_euler(matrices, eulers)
+
+
+def export_keymat_translations(rest_rot, translations, bone):
+    """Handles space conversions for an (n, 3) array of exported translation keys at once"""
+    if bone:
+        rot = np.array(rest_rot.to_3x3() * correction_inv.to_3x3())
+    else:
+        rot = np.array(rest_rot.to_3x3())
+    return np.asarray(translations, dtype=np.float64) @ rot.T
+
+
 def get_bind_matrix(bone):
     """Get a nif armature-space matrix from a blender bone. """
     bind = correction * correction_inv * bone.matrix_local * correction
@@ -109,7 +109,7 @@ class Armature:
         # now fix the linkage between the blocks
         for b_bone in bones:
             # link the bone's children to the bone
-            NifLog.debug("Linking children of b_bone {0}".format(b_bone.name))
+            NifLog.debug("Linking children of b_bone %s", b_bone.name)
             for child in b_bone.children:
                 bones_node[b_bone.name].add_child(bones_node[child.name])
             # if it is a root bone, link it to the armature
@@ -58,8 +58,14 @@ class Armature:
 
     def __init__(self):
         self.transform_anim = TransformAnimation()
-        # this is used to hold lists of bones for each armature during mark_armatures_bones
+        # this is used to hold sets of bones for each armature during mark_armatures_bones
         self.dict_armatures = {}
+        # every marked bone of all armatures, see is_bone
+        self.bones = set()
+        # armatures whose complete tree has been marked by populate_bone_tree
+        self.populated_armatures = set()
+        # children grouped by each node, see is_grouping_node
+        self.dict_grouping_nodes = {}
         # to get access to the nif bone in object mode
         self.name_to_block = {}
 
@@ -165,8 +171,8 @@ class Armature:
             else:
                 skelroot = ni_block
             if skelroot not in self.dict_armatures:
-                self.dict_armatures[skelroot] = []
-            NifLog.info("Selecting node '%s' as skeleton root".format(skelroot.name))
+                self.dict_armatures[skelroot] = set()
+            NifLog.info("Selecting node '%s' as skeleton root", skelroot.name)
             # add bones
             self.populate_bone_tree(skelroot)
             return  # done!
@@ -178,8 +184,8 @@ class Armature:
             if not skelroot:
                 skelroot = ni_block
                 # raise nif_utils.NifError("nif has no armature '%s'" % b_armature_obj.name)
-            NifLog.debug("Identified '{0}' as armature".format(skelroot.name))
-            self.dict_armatures[skelroot] = []
+            NifLog.debug("Identified '%s' as armature", skelroot.name)
+            self.dict_armatures[skelroot] = set()
             for bone_name in b_armature_obj.data.bones.keys():
                 # blender bone naming -> nif bone naming
                 nif_bone_name = armature.get_bone_name_for_nif(bone_name)
@@ -187,15 +193,15 @@ class Armature:
                 bone_block = skelroot.find(block_name=nif_bone_name)
                 # add it to the name list if there is a bone with that name
                 if bone_block:
-                    NifLog.info("Identified nif block '{0}' with bone '{1}' in selected armature".format(nif_bone_name, bone_name))
-                    self.dict_armatures[skelroot].append(bone_block)
+                    NifLog.info("Identified nif block '%s' with bone '%s' in selected armature", nif_bone_name, bone_name)
+                    self.mark_bone(bone_block, skelroot)
                     self.complete_bone_tree(bone_block, skelroot)
 
         # search for all NiTriShape or NiTriStrips blocks...
         if isinstance(ni_block, NifFormat.NiTriBasedGeom):
             # yes, we found one, get its skin instance
             if ni_block.is_skin():
-                NifLog.debug("Skin found on block '{0}'".format(ni_block.name))
+                NifLog.debug("Skin found on block '%s'", ni_block.name)
                 # it has a skin instance, so get the skeleton root
                 # which is an armature only if it's not a skinning influence
                 # so mark the node to be imported as an armature
@@ -203,8 +209,8 @@ class Armature:
                 skelroot = skininst.skeleton_root
                 if NifOp.props.skeleton == "EVERYTHING":
                     if skelroot not in self.dict_armatures:
-                        self.dict_armatures[skelroot] = []
-                        NifLog.debug("'{0}' is an armature".format(skelroot.name))
+                        self.dict_armatures[skelroot] = set()
+                        NifLog.debug("'%s' is an armature", skelroot.name)
                 elif NifOp.props.skeleton == "GEOMETRY_ONLY":
                     if skelroot not in self.dict_armatures:
                         raise nif_utils.NifError("Nif structure incompatible with '{0}' as armature: node '{1}' has '{2}' as armature".format(b_armature_obj.name, ni_block.name, skelroot.name))
@@ -213,9 +219,8 @@ class Armature:
                     # boneBlock can be None; see pyffi issue #3114079
                     if not boneBlock:
                         continue
-                    if boneBlock not in self.dict_armatures[skelroot]:
-                        self.dict_armatures[skelroot].append(boneBlock)
-                        NifLog.debug("'{0}' is a bone of armature '{1}'".format(boneBlock.name, skelroot.name))
+                    if self.mark_bone(boneBlock, skelroot):
+                        NifLog.debug("'%s' is a bone of armature '%s'", boneBlock.name, skelroot.name)
                     # now we "attach" the bone to the armature:
                     # we make sure all NiNodes from this bone all the way
                     # down to the armature NiNode are marked as bones
@@ -229,8 +234,21 @@ class Armature:
                 continue  # skip blocks that don't have transforms
             self.mark_armatures_bones(child)
 
+    def mark_bone(self, bone, skelroot):
+        """Add a bone to the bones of skelroot, returns whether it was not marked yet."""
+        bones = self.dict_armatures[skelroot]
+        if bone in bones:
+            return False
+        bones.add(bone)
+        self.bones.add(bone)
+        return True
+
     def populate_bone_tree(self, skelroot):
-        """Add all of skelroot's bones to its dict_armatures list."""
+        """Add all of skelroot's bones to its dict_armatures set."""
+        # the tree is marked completely on the first call, so later skins on the same armature find nothing new
+        if skelroot in self.populated_armatures:
+            return
+        self.populated_armatures.add(skelroot)
         for bone in skelroot.tree():
             if bone is skelroot:
                 continue
@@ -239,11 +257,10 @@ class Armature:
             if isinstance(bone, NifFormat.NiLODNode):
                 # LOD nodes are never bones
                 continue
-            if Object.is_grouping_node(bone):
+            if self.is_grouping_node(bone):
                 continue
-            if bone not in self.dict_armatures[skelroot]:
-                self.dict_armatures[skelroot].append(bone)
-                NifLog.debug("'{0}' marked as extra bone of armature '{1}'".format(bone.name, skelroot.name))
+            if self.mark_bone(bone, skelroot):
+                NifLog.debug("'%s' marked as extra bone of armature '%s'", bone.name, skelroot.name)
 
     def complete_bone_tree(self, bone, skelroot):
         """Make sure that the complete hierarchy from bone up to skelroot is marked in dict_armatures."""
@@ -254,11 +271,10 @@ class Armature:
         boneparent = bone._parent
         if boneparent != skelroot:
             # parent is not the skeleton root
-            if boneparent not in self.dict_armatures[skelroot]:
-                # neither is it marked as a bone: so mark the parent as a bone
-                self.dict_armatures[skelroot].append(boneparent)
+            if self.mark_bone(boneparent, skelroot):
+                # neither was it marked as a bone: so the parent is marked as a bone now
                 # store the coordinates for realignement autodetection 
-                NifLog.debug("'{0}' is a bone of armature '{1}'".format(boneparent.name, skelroot.name))
+                NifLog.debug("'%s' is a bone of armature '%s'", boneparent.name, skelroot.name)
             # now the parent is marked as a bone
             # recursion: complete the bone tree,
             # this time starting from the parent bone
@@ -266,10 +282,15 @@ class Armature:
 
     def is_bone(self, ni_block):
         """Tests a NiNode to see if it has been marked as a bone."""
-        if ni_block:
-            for bones in self.dict_armatures.values():
-                if ni_block in bones:
-                    return True
+        return ni_block in self.bones
+
+    def is_grouping_node(self, ni_block):
+        """Object.is_grouping_node, computed once per node. Returns a new list, which the caller may change."""
+        try:
+            geom_group = self.dict_grouping_nodes[ni_block]
+        except KeyError:
+            geom_group = self.dict_grouping_nodes[ni_block] = Object.is_grouping_node(ni_block)
+        return list(geom_group)
 
     def is_armature_root(self, ni_block):
         """Tests a block to see if it's an armature."""
@@ -37,8 +37,10 @@
 #
 # ***** END LICENSE BLOCK *****
 
+from io_scene_nif.utility.util_session import SessionDict
+
 HAVOK_SCALE = 6.996
 
 # dictionary mapping bhkRigidBody objects to objects imported in Blender;
 # we use this dictionary to set the physics constraints (ragdoll etc)
-DICT_HAVOK_OBJECTS = {}
+DICT_HAVOK_OBJECTS = SessionDict("havok_objects")
@@ -39,10 +39,12 @@
 
 import bpy
 import mathutils
+import numpy as np
 
 from pyffi.formats.nif import NifFormat
 
 from io_scene_nif.modules import collision
+from io_scene_nif.modules.collision import convex_decomposition
 from io_scene_nif.modules.object.block_registry import block_store
 from io_scene_nif.utility import nif_utils
 from io_scene_nif.utility.util_logging import NifLog
@@ -308,7 +310,9 @@ class Collision:
             # fix total mass
             n_col_body.mass += mass
 
-        if coll_ispacked:
+        if self.use_convex_decomposition(b_obj):
+            self.export_collision_decomposed(b_obj, n_col_body, layer, n_havok_mat)
+        elif coll_ispacked:
             self.export_collision_packed(b_obj, n_col_body, layer, n_havok_mat)
         else:
             if b_obj.nifcollision.export_bhklist:
@@ -390,11 +394,12 @@ class Collision:
             raise ValueError('Collision body already has a shape')
         n_col_body.shape = self.export_collision_object(b_obj, layer, n_havok_mat)
 
-    def export_collision_list(self, b_obj, n_col_body, layer, n_havok_mat):
+    def export_collision_list(self, b_obj, n_col_body, layer, n_havok_mat, n_shape=None):
         """Add collision object obj to the list of collision objects of n_col_body.
         If n_col_body has no collisions yet, a new list is created.
         If the current collision system is not a list of collisions
-        (bhkListShape), then a ValueError is raised."""
+        (bhkListShape), then a ValueError is raised.
+        If n_shape is given, it is added instead of exporting b_obj's collision shape."""
 
         # if no collisions have been exported yet to this parent_block
         # then create new collision tree on parent_block
@@ -409,7 +414,85 @@ class Collision:
             if not isinstance(n_col_shape, NifFormat.bhkListShape):
                 raise ValueError('Not a list of collisions')
 
-        n_col_shape.add_shape(self.export_collision_object(b_obj, layer, n_havok_mat))
+        if not n_shape:
+            n_shape = self.export_collision_object(b_obj, layer, n_havok_mat)
+        n_col_shape.add_shape(n_shape)
+
+    @staticmethod
+    def use_convex_decomposition(b_obj):
+        """Whether b_obj is a render mesh whose collision is generated as a list of convex hulls."""
+        return (NifOp.props.game in ('OBLIVION', 'FALLOUT_3', 'SKYRIM')
+                and NifOp.props.convex_decomposition
+                and b_obj.type == 'MESH' and b_obj.rigid_body and not b_obj.game.use_collision_bounds)
+
+    def export_collision_decomposed(self, b_obj, n_col_body, layer, n_havok_mat):
+        """Approximate the render mesh of b_obj by convex hulls and add them as bhkConvexVerticesShapes to the list of
+        collision objects of n_col_body. The collision is attached to b_obj's own node, so it stays in local space."""
+        # decompose the mesh as it is shown, with its modifiers applied
+        b_mesh = b_obj.to_mesh(bpy.context.scene, True, 'PREVIEW')
+        try:
+            if not b_mesh.vertices:
+                NifLog.warn("Skipping collision object {0} without vertices.".format(b_obj))
+                return
+
+            # read the mesh in bulk
+            vertices = np.empty(len(b_mesh.vertices) * 3, dtype=np.float32)
+            b_mesh.vertices.foreach_get("co", vertices)
+            vertices = vertices.reshape(-1, 3)
+            loop_starts = np.empty(len(b_mesh.polygons), dtype=np.int32)
+            loop_totals = np.empty(len(b_mesh.polygons), dtype=np.int32)
+            loop_vertices = np.empty(len(b_mesh.loops), dtype=np.int32)
+            b_mesh.polygons.foreach_get("loop_start", loop_starts)
+            b_mesh.polygons.foreach_get("loop_total", loop_totals)
+            b_mesh.loops.foreach_get("vertex_index", loop_vertices)
+        finally:
+            bpy.data.meshes.remove(b_mesh)
+        triangles = convex_decomposition.triangulate_polygons(loop_starts, loop_totals, loop_vertices)
+
+        NifLog.info("Generating convex decomposition for '{0}'".format(b_obj.name))
+        hulls = convex_decomposition.decompose(vertices, triangles,
+                                               concavity=NifOp.props.concavity_tolerance,
+                                               max_hulls=NifOp.props.max_convex_hulls)
+        if not hulls:
+            NifLog.warn("Could not generate convex hulls for '{0}', skipped collision.".format(b_obj.name))
+            return
+        NifLog.info("Generated {0} convex hulls for '{1}'".format(len(hulls), b_obj.name))
+
+        extent = vertices.max(axis=0) - vertices.min(axis=0)
+        radius = min(b_obj.game.radius, extent.sum() / (6.0 * self.HAVOK_SCALE))
+        for hull in hulls:
+            n_hull = self.export_convex_vertices_shape(b_obj, radius, hull.vertices, hull.normals, hull.distances)
+            self.export_collision_list(b_obj, n_col_body, layer, n_havok_mat, n_shape=n_hull)
+
+    def export_convex_vertices_shape(self, b_obj, radius, vertlist, fnormlist, fdistlist):
+        """Create a bhkConvexVerticesShape from the hull vertices and planes, given in blender units."""
+        if len(fnormlist) > 65535 or len(vertlist) > 65535:
+            raise nif_utils.NifError(
+                "ERROR%t|Too many polygons/vertices."
+                " Decimate/split your b_mesh and try again.")
+
+        colhull = block_store.create_block("bhkConvexVerticesShape", b_obj)
+        # colhull.material = n_havok_mat[0]
+        colhull.radius = radius
+        colhull.unknown_6_floats[2] = -0.0  # enables arrow detection
+        colhull.unknown_6_floats[5] = -0.0  # enables arrow detection
+        # note: unknown 6 floats are usually all 0
+        colhull.num_vertices = len(vertlist)
+        colhull.vertices.update_size()
+        for vhull, vert in zip(colhull.vertices, vertlist):
+            vhull.x = vert[0] / self.HAVOK_SCALE
+            vhull.y = vert[1] / self.HAVOK_SCALE
+            vhull.z = vert[2] / self.HAVOK_SCALE
+            # w component is 0
+        colhull.num_normals = len(fnormlist)
+        colhull.normals.update_size()
+        for nhull, norm, dist in zip(colhull.normals, fnormlist, fdistlist):
+            nhull.x = norm[0]
+            nhull.y = norm[1]
+            nhull.z = norm[2]
+            nhull.w = dist / self.HAVOK_SCALE
+
+        return colhull
 
     def export_collision_object(self, b_obj, layer, n_havok_mat):
         """Export object obj as box, sphere, capsule, or convex hull.
@@ -567,33 +650,7 @@ class Collision:
             fnormlist = [fnormlist[fdict[hsh]] for hsh in fkeys]
             fdistlist = [fdistlist[fdict[hsh]] for hsh in fkeys]
 
-            if len(fnormlist) > 65535 or len(vertlist) > 65535:
-                raise nif_utils.NifError(
-                    "ERROR%t|Too many polygons/vertices."
-                    " Decimate/split your b_mesh and try again.")
-
-            colhull = block_store.create_block("bhkConvexVerticesShape", b_obj)
-            # colhull.material = n_havok_mat[0]
-            colhull.radius = radius
-            colhull.unknown_6_floats[2] = -0.0  # enables arrow detection
-            colhull.unknown_6_floats[5] = -0.0  # enables arrow detection
-            # note: unknown 6 floats are usually all 0
-            colhull.num_vertices = len(vertlist)
-            colhull.vertices.update_size()
-            for vhull, vert in zip(colhull.vertices, vertlist):
-                vhull.x = vert[0] / self.HAVOK_SCALE
-                vhull.y = vert[1] / self.HAVOK_SCALE
-                vhull.z = vert[2] / self.HAVOK_SCALE
-                # w component is 0
-            colhull.num_normals = len(fnormlist)
-            colhull.normals.update_size()
-            for nhull, norm, dist in zip(colhull.normals, fnormlist, fdistlist):
-                nhull.x = norm[0]
-                nhull.y = norm[1]
-                nhull.z = norm[2]
-                nhull.w = dist / self.HAVOK_SCALE
-
-            return colhull
+            return self.export_convex_vertices_shape(b_obj, radius, vertlist, fnormlist, fdistlist)
 
         else:
             raise nif_utils.NifError(
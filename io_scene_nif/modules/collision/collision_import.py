@@ -65,7 +65,7 @@ class Collision:
     def __init__(self):
         # dictionary mapping bhkRigidBody objects to objects imported in Blender;
         # we use this dictionary to set the physics constraints (ragdoll etc)
-        collision.DICT_HAVOK_OBJECTS = {}
+        collision.DICT_HAVOK_OBJECTS.clear()
 
         # TODO [collision][havok][property] Need better way to set this, maybe user property
         if NifData.data._user_version_value_._value == 12 and NifData.data._user_version_2_value_._value == 83:
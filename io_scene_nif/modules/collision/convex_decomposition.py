@@ -0,0 +1,190 @@
+"""This script contains helper methods to approximate a mesh by a small set of convex hulls."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pyffi.utils.quickhull
+
+# decompositions are reused across exports as long as mesh and settings do not change,
+# the least recently used ones are dropped beyond MAX_CONVEX_DECOMPOSITIONS
+DICT_CONVEX_DECOMPOSITIONS = OrderedDict()
+MAX_CONVEX_DECOMPOSITIONS = 64
+
+# precision used for the hull construction and for merging coplanar hull planes
+HULL_PRECISION = 0.0001
+
+
+class ConvexHull:
+    """A convex hull, described by its extreme points and by its planes (normal, distance)."""
+
+    def __init__(self, vertices, normals, distances):
+        self.vertices = vertices
+        self.normals = normals
+        self.distances = distances
+
+
+def triangulate_polygons(loop_starts, loop_totals, loop_vertices):
+    """Fan triangulate polygons given as flat loop arrays, as found in a blender mesh.
+
+    :return: Array of shape (n, 3) with vertex indices.
+    """
+    loop_starts = np.asarray(loop_starts, dtype=np.int64)
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+    loop_vertices = np.asarray(loop_vertices, dtype=np.int64)
+    # ignore degenerate polygons
+    counts = np.maximum(loop_totals - 2, 0)
+    starts = np.repeat(loop_starts, counts)
+    # index of every triangle within its polygon fan, starting at 1
+    fan = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    return np.column_stack((loop_vertices[starts], loop_vertices[starts + fan], loop_vertices[starts + fan + 1]))
+
+
+def get_mesh_hash(vertices, triangles, concavity, max_hulls):
+    """Return a hash identifying a mesh together with the decomposition settings."""
+    mesh_hash = hashlib.sha1()
+    mesh_hash.update(np.ascontiguousarray(vertices, dtype=np.float64).tobytes())
+    mesh_hash.update(np.ascontiguousarray(triangles, dtype=np.int64).tobytes())
+    mesh_hash.update(repr((concavity, max_hulls)).encode())
+    return mesh_hash.hexdigest()
+
+
+def build_hull(points):
+    """Return the ConvexHull of the given points, or None if the points do not span a volume."""
+    hull_vertices, hull_triangles = pyffi.utils.quickhull.qhull3d([tuple(point) for point in points], precision=HULL_PRECISION)
+    if len(hull_vertices) < 4 or not hull_triangles:
+        return None
+    hull_vertices = np.array(hull_vertices, dtype=np.float64)
+    corners = hull_vertices[np.array(hull_triangles, dtype=np.int64)]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > HULL_PRECISION ** 2
+    normals = normals[valid] / lengths[valid, np.newaxis]
+    corners = corners[valid]
+    # orient all planes outwards, away from the hull center
+    center = hull_vertices.mean(axis=0)
+    flip = np.einsum('ni,ni->n', normals, center - corners[:, 0]) > 0
+    normals[flip] *= -1
+    distances = -np.einsum('ni,ni->n', normals, corners[:, 0])
+    # a flat hull (all points in one plane) has no volume
+    if np.all(np.abs(normals.dot(center) + distances) < HULL_PRECISION):
+        return None
+    # triangles of a single hull face share the same plane
+    planes = np.unique(np.round(np.column_stack((normals, distances)) / HULL_PRECISION).astype(np.int64), axis=0, return_index=True)[1]
+    return ConvexHull(hull_vertices, normals[planes], distances[planes])
+
+
+def get_concavity(hull, points):
+    """Return how deep the given surface points lie within the hull, zero if they all lie on its boundary."""
+    if hull is None:
+        return 0.0
+    # signed distance of every point to every plane, points inside have negative distances
+    depths = -(points.dot(hull.normals.T) + hull.distances)
+    return float(depths.min(axis=1).max())
+
+
+def split_part(vertices, triangles, part):
+    """Split a set of triangles in two, by the plane through its center perpendicular to its principal axis."""
+    centroids = vertices[triangles[part]].mean(axis=1)
+    offsets = centroids - centroids.mean(axis=0)
+    # principal axis of the triangle centers
+    _, _, axes = np.linalg.svd(offsets, full_matrices=False)
+    side = offsets.dot(axes[0]) > 0
+    return part[side], part[~side]
+
+
+def _evaluate_part(vertices, triangles, part):
+    """Build the hull of a part and measure its concavity."""
+    part_triangles = triangles[part]
+    points = vertices[np.unique(part_triangles)]
+    hull = build_hull(points)
+    # also sample the triangle centers, vertices alone miss concave faces
+    samples = np.concatenate((points, vertices[part_triangles].mean(axis=1)))
+    return hull, get_concavity(hull, samples)
+
+
+def decompose(vertices, triangles, concavity=0.05, max_hulls=16):
+    """Approximate a mesh by a set of convex hulls.
+
+    The mesh is split recursively along the principal axis of its most concave part,
+    until every part is convex within the tolerance or the maximal number of hulls is reached.
+
+    :param vertices: Array of shape (n, 3).
+    :param triangles: Array of shape (m, 3) of vertex indices.
+    :param concavity: Tolerated concavity, relative to the diagonal of the mesh bounding box.
+    :param max_hulls: Maximal number of hulls.
+    :return: List of ConvexHull.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if not len(triangles):
+        return []
+
+    mesh_hash = get_mesh_hash(vertices, triangles, concavity, max_hulls)
+    if mesh_hash in DICT_CONVEX_DECOMPOSITIONS:
+        DICT_CONVEX_DECOMPOSITIONS.move_to_end(mesh_hash)
+        return DICT_CONVEX_DECOMPOSITIONS[mesh_hash]
+
+    tolerance = concavity * np.linalg.norm(vertices.max(axis=0) - vertices.min(axis=0))
+    hulls = []
+    parts = [np.arange(len(triangles))]
+    while parts:
+        next_parts = []
+        for index, part in enumerate(parts):
+            hull, depth = _evaluate_part(vertices, triangles, part)
+            # hulls when this part is split and all remaining parts of this level are kept
+            num_hulls = len(hulls) + len(next_parts) + len(parts) - index + 1
+            # parts which are convex enough, too small to split, or exceed the hull budget become final
+            if depth <= tolerance or len(part) < 2 or num_hulls > max_hulls:
+                if hull:
+                    hulls.append(hull)
+                continue
+            first, second = split_part(vertices, triangles, part)
+            if not len(first) or not len(second):
+                if hull:
+                    hulls.append(hull)
+                continue
+            next_parts.extend((first, second))
+        parts = next_parts
+
+    DICT_CONVEX_DECOMPOSITIONS[mesh_hash] = hulls
+    while len(DICT_CONVEX_DECOMPOSITIONS) > MAX_CONVEX_DECOMPOSITIONS:
+        DICT_CONVEX_DECOMPOSITIONS.popitem(last=False)
+    return hulls
@@ -0,0 +1,326 @@
+"""This script contains helper methods to calculate the mass, center of gravity and inertia tensor of havok shapes."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import math
+
+import numpy as np
+import pyffi.utils.quickhull
+from pyffi.formats.nif import NifFormat
+
+from io_scene_nif.utility.util_logging import NifLog
+
+# second moment of the canonical tetrahedron (0,0,0),(1,0,0),(0,1,0),(0,0,1) is
+# 1/120 * ((2, 1, 1), (1, 2, 1), (1, 1, 2)) = 1/120 * (identity + ones)
+COVARIANCE_CORRECTION_SOLID = 1.0 / 120
+# same for the canonical triangle (1,0,0),(0,1,0),(0,0,1) per unit of area
+COVARIANCE_CORRECTION_HOLLOW = 1.0 / 12
+
+
+def _empty():
+    return 0.0, np.zeros(3), np.zeros((3, 3))
+
+
+def _covariance_to_inertia(covariance):
+    """Convert a (stack of) second moment matrices into inertia tensors."""
+    trace = np.trace(covariance, axis1=-2, axis2=-1)
+    return trace[..., np.newaxis, np.newaxis] * np.eye(3) - covariance
+
+
+def get_mass_center_inertia_polyhedron(vertices, triangles, density=1, solid=True):
+    """Return mass, center of gravity, and inertia tensor of a closed triangle mesh.
+
+    Each triangle forms a signed tetrahedron with the origin, all tetrahedra are integrated at once.
+    For hollow objects the triangles are integrated as thin shells instead.
+
+    :param vertices: Sequence or array of shape (n, 3).
+    :param triangles: Sequence or array of shape (m, 3) of vertex indices.
+    :return: Tuple of mass, center (3,) array and inertia (3, 3) array.
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if not len(triangles):
+        return _empty()
+
+    # (m, 3, 3): the three corners of every triangle
+    corners = vertices[triangles]
+    corner_sum = corners.sum(axis=1)
+    # sum of the outer products of the corners, plus the outer product of their sum
+    second_moments = np.einsum('nki,nkj->nij', corners, corners) + np.einsum('ni,nj->nij', corner_sum, corner_sum)
+
+    if solid:
+        # signed volume (times six) of the tetrahedron (origin, v0, v1, v2)
+        determinants = np.einsum('ni,ni->n', corners[:, 0], np.cross(corners[:, 1], corners[:, 2]))
+        masses = determinants / 6.0
+        centers = corner_sum * 0.25
+        covariance = np.einsum('n,nij->ij', determinants, second_moments) * COVARIANCE_CORRECTION_SOLID
+    else:
+        areas = np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1) / 2.0
+        masses = areas
+        centers = corner_sum / 3.0
+        covariance = np.einsum('n,nij->ij', areas, second_moments) * COVARIANCE_CORRECTION_HOLLOW
+
+    total_mass = masses.sum()
+    if total_mass == 0:
+        return _empty()
+    total_center = masses.dot(centers) / total_mass
+
+    # move second moment to the center of gravity
+    covariance -= total_mass * np.outer(total_center, total_center)
+    inertia = _covariance_to_inertia(covariance)
+
+    inertia *= density
+    total_mass *= density
+    # correct negative mass (triangles with inward facing normals)
+    if total_mass < 0:
+        total_mass = -total_mass
+        inertia = -inertia
+    return float(total_mass), total_center, inertia
+
+
+def get_mass_inertia_box(size, density=1, solid=True):
+    """Return mass and inertia tensor of a box with given edge lengths, centered at the origin."""
+    size = np.asarray(size, dtype=np.float64)
+    squares = size ** 2
+    if solid:
+        mass = density * np.prod(size)
+        # moment of every axis
+        moments = mass * squares / 12.0
+        return float(mass), np.diag(moments.sum() - moments)
+    # thin shell: pairs of plates, each plate perpendicular to one of the axes
+    inertia = np.zeros((3, 3))
+    mass = 0.0
+    for axis in range(3):
+        others = [i for i in range(3) if i != axis]
+        plate_mass = density * size[others[0]] * size[others[1]]
+        mass += 2 * plate_mass
+        # about its own normal, a plate behaves like a flat rectangle
+        inertia[axis, axis] += 2 * plate_mass * (squares[others[0]] + squares[others[1]]) / 12.0
+        # about the in plane axes, it is a rod offset by half the box size along the normal
+        for i, j in ((others[0], others[1]), (others[1], others[0])):
+            inertia[i, i] += 2 * plate_mass * (squares[j] / 12.0 + squares[axis] / 4.0)
+    return mass, inertia
+
+
+def get_mass_inertia_sphere(radius, density=1, solid=True):
+    """Return mass and inertia tensor of a sphere centered at the origin."""
+    if solid:
+        mass = density * 4 * math.pi * (radius ** 3) / 3
+        moment = 2 * mass * (radius ** 2) / 5
+    else:
+        mass = density * 4 * math.pi * (radius ** 2)
+        moment = 2 * mass * (radius ** 2) / 3
+    return mass, moment * np.eye(3)
+
+
+def get_mass_inertia_capsule(length, radius, density=1, solid=True):
+    """Return mass and inertia tensor of a capsule aligned with the z axis, centered at the origin.
+
+    :param length: Distance between the centers of both caps.
+    :param radius: Radius of the cylinder and caps.
+    """
+    if solid:
+        cylinder_mass = density * math.pi * (radius ** 2) * length
+        caps_mass = density * 4 * math.pi * (radius ** 3) / 3
+        moment_z = cylinder_mass * (radius ** 2) / 2 + caps_mass * 2 * (radius ** 2) / 5
+        # caps are half spheres, their center of gravity lies 3/8 radius beyond the cylinder end
+        moment_x = (cylinder_mass * ((length ** 2) / 12 + (radius ** 2) / 4)
+                    + caps_mass * (2 * (radius ** 2) / 5 + (length ** 2) / 4 + 3 * length * radius / 8))
+    else:
+        cylinder_mass = density * 2 * math.pi * radius * length
+        caps_mass = density * 4 * math.pi * (radius ** 2)
+        moment_z = cylinder_mass * (radius ** 2) + caps_mass * 2 * (radius ** 2) / 3
+        # hollow caps have their center of gravity at half the radius
+        moment_x = (cylinder_mass * ((length ** 2) / 12 + (radius ** 2) / 2)
+                    + caps_mass * (2 * (radius ** 2) / 3 + (length ** 2) / 4 + length * radius / 2))
+    return cylinder_mass + caps_mass, np.diag((moment_x, moment_x, moment_z))
+
+
+def combine_mass_center_inertia(mcis):
+    """Combine a list of (mass, center, inertia) tuples into a single one, the inertia tensors are moved to the
+    common center of gravity."""
+    if not mcis:
+        return _empty()
+    masses = np.array([mass for mass, _, _ in mcis], dtype=np.float64)
+    centers = np.array([center for _, center, _ in mcis], dtype=np.float64).reshape(-1, 3)
+    inertias = np.array([inertia for _, _, inertia in mcis], dtype=np.float64).reshape(-1, 3, 3)
+    total_mass = masses.sum()
+    if total_mass == 0:
+        return _empty()
+    total_center = masses.dot(centers) / total_mass
+    # parallel axis theorem, all sub shapes at once
+    offsets = centers - total_center
+    shifts = np.einsum('n,ni,nj->nij', masses, offsets, offsets)
+    total_inertia = inertias.sum(axis=0) + _covariance_to_inertia(shifts.sum(axis=0))
+    return float(total_mass), total_center, total_inertia
+
+
+def _rotate_z_to(direction):
+    """Return a rotation matrix whose third column is the given unit direction."""
+    # pick the axis least aligned with the direction to build an orthonormal basis
+    helper = np.zeros(3)
+    helper[np.argmin(np.abs(direction))] = 1.0
+    x_axis = np.cross(direction, helper)
+    x_axis /= np.linalg.norm(x_axis)
+    y_axis = np.cross(direction, x_axis)
+    return np.column_stack((x_axis, y_axis, direction))
+
+
+def get_mass_center_inertia(n_shape, density=1, solid=True):
+    """Return mass, center of gravity, and inertia tensor of a havok shape and its sub shapes.
+
+    :param n_shape: The havok shape, for example the shape of a bhkRigidBody.
+    :return: Tuple of mass, center (3,) array and inertia (3, 3) array.
+    """
+    if not n_shape:
+        return _empty()
+
+    if isinstance(n_shape, NifFormat.bhkBoxShape):
+        # the dimensions describe half the size of the box in each dimension
+        dims = n_shape.dimensions
+        mass, inertia = get_mass_inertia_box((dims.x * 2, dims.y * 2, dims.z * 2), density=density, solid=solid)
+        return mass, np.zeros(3), inertia
+
+    if isinstance(n_shape, NifFormat.bhkSphereShape):
+        mass, inertia = get_mass_inertia_sphere(n_shape.radius, density=density, solid=solid)
+        return mass, np.zeros(3), inertia
+
+    if isinstance(n_shape, NifFormat.bhkCapsuleShape):
+        first = np.array(n_shape.first_point.as_tuple())
+        second = np.array(n_shape.second_point.as_tuple())
+        axis = second - first
+        length = np.linalg.norm(axis)
+        mass, inertia = get_mass_inertia_capsule(length, n_shape.radius, density=density, solid=solid)
+        if length > 0:
+            rotation = _rotate_z_to(axis / length)
+            inertia = rotation.dot(inertia).dot(rotation.T)
+        return mass, (first + second) * 0.5, inertia
+
+    if isinstance(n_shape, NifFormat.bhkMultiSphereShape):
+        mcis = []
+        for n_sphere in n_shape.spheres:
+            mass, inertia = get_mass_inertia_sphere(n_sphere.radius, density=density, solid=solid)
+            mcis.append((mass, np.array(n_sphere.center.as_tuple()), inertia))
+        return combine_mass_center_inertia(mcis)
+
+    if isinstance(n_shape, NifFormat.bhkConvexVerticesShape):
+        # triangulate the hull first
+        vertices, triangles = pyffi.utils.quickhull.qhull3d([(vert.x, vert.y, vert.z) for vert in n_shape.vertices])
+        return get_mass_center_inertia_polyhedron(vertices, triangles, density=density, solid=solid)
+
+    if isinstance(n_shape, NifFormat.bhkPackedNiTriStripsShape):
+        n_data = n_shape.data
+        if not n_data:
+            return _empty()
+        vertices = [(vert.x, vert.y, vert.z) for vert in n_data.vertices]
+        triangles = [(n_tri.triangle.v_1, n_tri.triangle.v_2, n_tri.triangle.v_3) for n_tri in n_data.triangles]
+        return get_mass_center_inertia_polyhedron(vertices, triangles, density=density, solid=solid)
+
+    if isinstance(n_shape, NifFormat.bhkNiTriStripsShape):
+        return combine_mass_center_inertia(
+            [get_mass_center_inertia_polyhedron([(vert.x, vert.y, vert.z) for vert in n_data.vertices], list(n_data.get_triangles()),
+                                                density=density, solid=solid)
+             for n_data in n_shape.strips_data])
+
+    if isinstance(n_shape, NifFormat.bhkListShape):
+        return combine_mass_center_inertia(
+            [get_mass_center_inertia(n_sub_shape, density=density, solid=solid) for n_sub_shape in n_shape.sub_shapes])
+
+    if isinstance(n_shape, NifFormat.bhkTransformShape):
+        mass, center, inertia = get_mass_center_inertia(n_shape.shape, density=density, solid=solid)
+        # havok transforms are stored transposed, as written by the exporter: row vectors, translation in the last row
+        n_transform = n_shape.transform
+        rotation = np.array(n_transform.get_matrix_33().as_tuple())
+        translation = np.array((n_transform.m_41, n_transform.m_42, n_transform.m_43))
+        return mass, center.dot(rotation) + translation, rotation.T.dot(inertia).dot(rotation)
+
+    if isinstance(n_shape, NifFormat.bhkMoppBvTreeShape):
+        return get_mass_center_inertia(n_shape.shape, density=density, solid=solid)
+
+    raise NotImplementedError("Mass, center and inertia not supported for shape type '{0}'".format(n_shape.__class__.__name__))
+
+
+def set_mass_center_inertia(n_rigid_body, mass, center, inertia):
+    """Write mass, center of gravity and inertia tensor to a bhkRigidBody."""
+    n_rigid_body.mass = float(mass)
+    n_rigid_body.center.x, n_rigid_body.center.y, n_rigid_body.center.z = np.asarray(center).tolist()
+    rows = np.asarray(inertia).tolist()
+    n_inertia = n_rigid_body.inertia
+    n_inertia.m_11, n_inertia.m_12, n_inertia.m_13 = rows[0]
+    n_inertia.m_21, n_inertia.m_22, n_inertia.m_23 = rows[1]
+    n_inertia.m_31, n_inertia.m_32, n_inertia.m_33 = rows[2]
+    n_inertia.m_14 = n_inertia.m_24 = n_inertia.m_34 = 0
+
+
+def update_rigid_bodies(n_rigid_bodies, total_mass=None, solid=True):
+    """Update mass, center of gravity and inertia tensor of all rigid bodies in one pass.
+
+    :param n_rigid_bodies: List of bhkRigidBody blocks.
+    :param total_mass: If given, distribute this mass over all bodies according to their volume,
+        otherwise every body keeps its current mass.
+    :param solid: Whether to treat shapes as solid or as hollow shells.
+
+    Bodies with shapes that are not supported keep their mass, center and inertia as they are.
+    """
+    # geometry is only integrated once per body, at unit density
+    mcis = []
+    supported_bodies = []
+    for n_rigid_body in n_rigid_bodies:
+        try:
+            mcis.append(get_mass_center_inertia(n_rigid_body.shape, solid=solid))
+        except NotImplementedError as e:
+            NifLog.warn("{0}, keeping the mass and inertia of the rigid body".format(e))
+            continue
+        supported_bodies.append(n_rigid_body)
+    n_rigid_bodies = supported_bodies
+    if total_mass is not None:
+        calc_total_mass = sum(mass for mass, _, _ in mcis)
+        # to avoid zero division error later (if mass is zero then this does not matter anyway)
+        if calc_total_mass == 0:
+            calc_total_mass = 1
+        masses = [total_mass * mass / calc_total_mass for mass, _, _ in mcis]
+    else:
+        masses = [n_rigid_body.mass for n_rigid_body in n_rigid_bodies]
+
+    for n_rigid_body, (calc_mass, center, inertia), mass in zip(n_rigid_bodies, mcis, masses):
+        # lower bound on mass
+        if mass < 0.0001:
+            mass = 0.05
+        # inertia is linear in the mass for a fixed geometry
+        mass_correction = mass / calc_mass if calc_mass != 0 else 1
+        set_mass_center_inertia(n_rigid_body, mass, center, inertia * mass_correction)
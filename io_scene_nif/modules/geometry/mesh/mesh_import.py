@@ -177,7 +177,7 @@ class Mesh:
 
             b_loop_index += num_loops
         # at this point, deleted polygons (degenerate or duplicate) satisfy f_map[i] = None
-        NifLog.debug("{0} unique polygons".format(num_unique_faces))
+        NifLog.debug("%s unique polygons", num_unique_faces)
         return b_poly_offset, f_map
 
     @staticmethod
@@ -246,7 +246,7 @@ class Mesh:
                 # NIF vertex i maps to Blender vertex v_map[n_map_k]
                 v_map[n_vert_index] = v_map[n_map_k]
         # report
-        NifLog.debug("{0} unique vertex-normal pairs".format(str(len(n_map))))
+        NifLog.debug("%s unique vertex-normal pairs", len(n_map))
         # release memory
         del n_map
         return v_map
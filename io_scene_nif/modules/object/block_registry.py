@@ -37,17 +37,25 @@
 #
 # ***** END LICENSE BLOCK *****
 
+import hashlib
+import io
+
 from pyffi.formats.nif import NifFormat
+from pyffi.object_models.xml.array import Array
 
 from io_scene_nif.modules import armature
 from io_scene_nif.utility import nif_utils
+from io_scene_nif.utility.util_global import NifData
 from io_scene_nif.utility.util_logging import NifLog
+from io_scene_nif.utility.util_session import get_session
 
 
 class BlockRegistry:
 
     def __init__(self):
         self._block_to_obj = {}
+        self._interned = {}
+        self.num_interned = 0
 
     @property
     def block_to_obj(self): 
@@ -56,6 +64,8 @@ class BlockRegistry:
     @block_to_obj.setter
     def block_to_obj(self, value):
         self._block_to_obj = value
+        self._interned = {}
+        self.num_interned = 0
 
     def register_block(self, block, b_obj=None):
         """Helper function to register a newly created block in the list of
@@ -65,9 +75,9 @@ class BlockRegistry:
         @param b_obj: The Blender object.
         @return: C{block}"""
         if b_obj is None:
-            NifLog.info("Exporting {0} block".format(block.__class__.__name__))
+            NifLog.debug("Exporting %s block", block.__class__.__name__)
         else:
-            NifLog.info("Exporting {0} as {1} block".format(b_obj, block.__class__.__name__))
+            NifLog.debug("Exporting %s as %s block", b_obj, block.__class__.__name__)
         self._block_to_obj[block] = b_obj
         return block
 
@@ -85,12 +95,76 @@ class BlockRegistry:
             raise nif_utils.NifError("'{0}': Unknown block type (this is probably a bug).".format(block_type))
         return self.register_block(block, b_obj)
 
+    def intern_block(self, block, data=None):
+        """Share a fully filled data block with any identical block exported before it.
+
+        Blocks are compared on their serialized content, so only use this for
+        data blocks that hold no references or strings, such as key data.
+
+        @param block: The nif block, registered through L{create_block}.
+        @param data: The nif data being exported, whose version decides which fields are written.
+            Defaults to the data of the current export, see L{NifData}.
+        @return: The previously exported identical block, else C{block}."""
+        if data is None:
+            data = NifData.data
+        stream = io.BytesIO()
+        block.write(stream, data=data)
+        key = (block.__class__.__name__, hashlib.sha1(stream.getvalue()).digest())
+        n_block = self.find_shared_block(key)
+        if n_block is None:
+            return self.share_block(key, block)
+        self._block_to_obj.pop(block, None)
+        return n_block
+
+    @staticmethod
+    def get_block_key(block, data=None):
+        """Return the canonical field tuple of a block, for use as key in L{find_shared_block}.
+
+        Unlike C{get_hash}, floats are kept exact, and referenced blocks are included by their own fields.
+
+        @param block: The nif block.
+        @return: A tuple of the type name and the field values."""
+        return (block.__class__.__name__,) + BlockRegistry._get_fields_key(block, data)
+
+    @staticmethod
+    def _get_fields_key(value, data):
+        if isinstance(value, Array):
+            return tuple(BlockRegistry._get_fields_key(elem, data) for elem in value._elementList())
+        if hasattr(value, "_get_filtered_attribute_list"):
+            # structs and bit structs
+            return tuple(BlockRegistry._get_fields_key(getattr(value, "_{0}_value_".format(attr.name)), data)
+                         for attr in value._get_filtered_attribute_list(data))
+        value = value.get_value()
+        if isinstance(value, NifFormat.NiObject):
+            return BlockRegistry.get_block_key(value, data)
+        return value
+
+    def find_shared_block(self, key):
+        """Look up a block shared under key during this export.
+
+        @param key: A hashable key that identifies the block's content, starting with its type name.
+        @return: The shared block, or C{None} if there is none yet."""
+        n_block = self._interned.get(key)
+        if n_block is not None:
+            NifLog.debug("Sharing identical %s block", key[0])
+            self.num_interned += 1
+        return n_block
+
+    def share_block(self, key, block):
+        """Share a block under key, for L{find_shared_block}.
+
+        @param key: A hashable key that identifies the block's content, starting with its type name.
+        @param block: The nif block.
+        @return: C{block}"""
+        self._interned[key] = block
+        return block
+
     @staticmethod
     def store_longname(b_obj, n_name):
         """Save original name as object property, for export"""
         if b_obj.name != n_name:
             b_obj.niftools.longname = n_name
-            NifLog.debug("Stored long name for {0}".format(b_obj.name))
+            NifLog.debug("Stored long name for %s", b_obj.name)
 
     @staticmethod
     def import_name(n_block):
@@ -102,7 +176,7 @@ class BlockRegistry:
         if n_block is None:
             return ""
 
-        NifLog.debug("Importing name for {0} block from {1}".format(n_block.__class__.__name__, n_block.name))
+        NifLog.debug("Importing name for %s block from %s", n_block.__class__.__name__, n_block.name)
 
         n_name = n_block.name.decode()
 
@@ -114,4 +188,21 @@ class BlockRegistry:
         return n_name
 
 
-block_store = BlockRegistry()
+class SessionBlockRegistry:
+    """Forwards to the block registry of the session of the current thread, creating it on first use."""
+
+    @staticmethod
+    def get_registry():
+        session = get_session()
+        if session.block_store is None:
+            session.block_store = BlockRegistry()
+        return session.block_store
+
+    def __getattr__(self, name):
+        return getattr(self.get_registry(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get_registry(), name, value)
+
+
+block_store = SessionBlockRegistry()
@@ -42,6 +42,7 @@ import mathutils
 from pyffi.formats.nif import NifFormat
 
 from io_scene_nif.modules import armature
+from io_scene_nif.modules.collision import inertia
 from io_scene_nif.modules.geometry.mesh.mesh_export import Mesh
 from io_scene_nif.modules.object import PRN_DICT
 from io_scene_nif.modules.object.block_registry import block_store
@@ -179,30 +180,11 @@ class Object:
             # update rigid body center of gravity and mass
             if self.nif_export.IGNORE_BLENDER_PHYSICS:
                 # we are not using blender properties to set the mass
-                # so calculate mass automatically first calculate distribution of mass
-                total_mass = 0
-                for n_block in n_rigid_bodies:
-                    n_block.update_mass_center_inertia(solid=self.nif_export.EXPORT_OB_SOLID)
-                    total_mass += n_block.mass
-
-                # to avoid zero division error later (if mass is zero then this does not matter anyway)
-                if total_mass == 0:
-                    total_mass = 1
-
-                # now update the mass ensuring that total mass is EXPORT_OB_MASS
-                for n_block in n_rigid_bodies:
-                    mass = self.nif_export.EXPORT_OB_MASS * n_block.mass / total_mass
-                    # lower bound on mass
-                    if mass < 0.0001:
-                        mass = 0.05
-                    n_block.update_mass_center_inertia(mass=mass, solid=self.nif_export.EXPORT_OB_SOLID)
+                # so distribute EXPORT_OB_MASS according to the volume of each body
+                inertia.update_rigid_bodies(n_rigid_bodies, total_mass=self.nif_export.EXPORT_OB_MASS, solid=self.nif_export.EXPORT_OB_SOLID)
             else:
                 # using blender properties, so n_block.mass *should* have been set properly
-                for n_block in n_rigid_bodies:
-                    # lower bound on mass
-                    if n_block.mass < 0.0001:
-                        n_block.mass = 0.05
-                    n_block.update_mass_center_inertia(mass=n_block.mass, solid=self.nif_export.EXPORT_OB_SOLID)
+                inertia.update_rigid_bodies(n_rigid_bodies, solid=self.nif_export.EXPORT_OB_SOLID)
 
     def set_node_flags(self, b_obj, n_node):
         # default node flags
@@ -270,10 +252,13 @@ class Object:
             # but users may create track_to constraints directly on objects, so keep it for now
             has_track = self.has_track(b_obj)
 
+            # collision generated from the render mesh must be attached to the mesh's own node
+            has_generated_collision = self.nif_export.collisionhelper.use_convex_decomposition(b_obj)
+
             if is_collision:
                 self.nif_export.collisionhelper.export_collision(b_obj, n_parent)
                 return None  # done; stop here
-            elif b_action or has_children or is_multimaterial or has_track:
+            elif b_action or has_children or is_multimaterial or has_track or has_generated_collision:
                 # create a ninode as parent of this mesh for the hierarchy to work out
                 node = self.create_ninode(b_obj)
             else:
@@ -306,6 +291,8 @@ class Object:
         self.nif_export.animationhelper.object.export_visibility(node, b_action)
         # if it is a mesh, export the mesh as trishape children of this ninode
         if b_obj.type == 'MESH':
+            if self.nif_export.collisionhelper.use_convex_decomposition(b_obj):
+                self.nif_export.collisionhelper.export_collision(b_obj, node)
             return self.mesh_helper.export_tri_shapes(b_obj, node)
         # if it is an armature, export the bones as ninode children of this ninode
         elif b_obj.type == 'ARMATURE':
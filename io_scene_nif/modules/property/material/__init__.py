@@ -36,3 +36,8 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 # ***** END LICENSE BLOCK *****
+
+from io_scene_nif.utility.util_session import SessionDict
+
+# dictionary of imported materials by hash of their nif properties, to reuse materials within an import
+DICT_MATERIALS = SessionDict("materials")
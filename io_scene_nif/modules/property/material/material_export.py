@@ -50,12 +50,10 @@ class MaterialProp:
     def __init__(self, parent):
         self.nif_export = parent
         
-    def export_material_property(self, name, flags, ambient, diffuse, specular, emissive, gloss, alpha, emitmulti):
+    def export_material_property(self, name, flags, ambient, diffuse, specular, emissive, gloss, alpha, emitmulti, animated=False):
         """Return existing material property with given settings, or create
-        a new one if a material property with these settings is not found."""
-
-        # create n_block
-        matprop = NifFormat.NiMaterialProperty()
+        a new one if a material property with these settings is not found.
+        Animated material properties get their own controllers, so they are never shared."""
 
         # list which determines whether the material name is relevant or not  only for particular names this holds,
         # such as EnvMap2 by default, the material name does not affect rendering
@@ -74,6 +72,23 @@ class MaterialProp:
             NifLog.warn("Renaming material '{0}' to ''".format(name))
             name = ""
 
+        # search for duplicate
+        # (ignore the name string as sometimes import needs to create different materials even when NiMaterialProperty is the same)
+        # when optimization is enabled, ignore material name, unless it affects rendering
+        key_name = name
+        if self.nif_export.EXPORT_OPTIMIZE_MATERIALS and name not in specialnames:
+            key_name = None
+        key = ("NiMaterialProperty", key_name, flags,
+               (ambient.r, ambient.g, ambient.b), (diffuse.r, diffuse.g, diffuse.b),
+               (specular.r, specular.g, specular.b), (emissive.r, emissive.g, emissive.b),
+               gloss, alpha, emitmulti)
+        n_block = None if animated else block_store.find_shared_block(key)
+        if n_block is not None:
+            NifLog.warn("Merging materials '{0}' and '{1}' (they are identical in nif)".format(name, n_block.name))
+            return n_block
+
+        # create n_block
+        matprop = NifFormat.NiMaterialProperty()
         matprop.name = name
         matprop.flags = flags
         matprop.ambient_color.r = ambient.r
@@ -95,23 +110,7 @@ class MaterialProp:
         matprop.alpha = alpha
         matprop.emit_multi = emitmulti
 
-        # search for duplicate
-        # (ignore the name string as sometimes import needs to create different materials even when NiMaterialProperty is the same)
-        for n_block in block_store.block_to_obj:
-            if not isinstance(n_block, NifFormat.NiMaterialProperty):
-                continue
-
-            # when optimization is enabled, ignore material name
-            if self.nif_export.EXPORT_OPTIMIZE_MATERIALS:
-                ignore_strings = not(n_block.name in specialnames)
-            else:
-                ignore_strings = False
-
-            # check hash
-            first_index = 1 if ignore_strings else 0
-            if n_block.get_hash()[first_index:] == matprop.get_hash()[first_index:]:
-                NifLog.warn("Merging materials '{0}' and '{1}' (they are identical in nif)".format(matprop.name, n_block.name))
-                return n_block
-
         # no material property with given settings found, so use and register the new one
-        return matprop
+        if animated:
+            return matprop
+        return block_store.share_block(key, matprop)
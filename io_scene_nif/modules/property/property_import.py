@@ -44,8 +44,10 @@ import bpy
 from pyffi.formats.nif import NifFormat
 
 from io_scene_nif.modules.animation.material_import import MaterialAnimation
+from io_scene_nif.modules.property import material
 from io_scene_nif.modules.property.material.material_import import Material, NiMaterial
 from io_scene_nif.modules.property.texture.types.nitexturingsource_import import NiTextureProp
+from io_scene_nif.utility import nif_utils
 from io_scene_nif.utility.util_global import NifData
 from io_scene_nif.utility.util_logging import NifLog
 
@@ -91,6 +93,9 @@ if n_mat_prop or n_effect_shader_prop:  # TODO [shader] or bs_shader_property or
 
 class MeshProperty:
 
+    # properties that set up the mesh rather than its material
+    MESH_PROPERTIES = (NifFormat.NiStencilProperty,)
+
     def __init__(self):
         self.b_mesh = None
         self.n_block = None
@@ -106,11 +111,39 @@ class MeshProperty:
     def process_property_list(self, n_block, b_mesh):
         self.n_block = n_block
         self.b_mesh = b_mesh
+
+        # shapes with the same material properties share a single material
+        material_hash = None
+        if not b_mesh.materials:
+            material_hash = self.get_material_hash(n_block)
+            try:
+                b_mat = material.DICT_MATERIALS[material_hash]
+            except KeyError:
+                pass
+            else:
+                NifLog.debug("Reusing material %s", b_mat.name)
+                b_mesh.materials.append(b_mat)
+                for prop in n_block.properties:
+                    if isinstance(prop, self.MESH_PROPERTIES):
+                        self.process_property(prop)
+                return
+
         for prop in n_block.properties:
             NifLog.debug("About to process" + str(type(prop)))
             self.process_property(prop)
 
-        return
+        if material_hash is not None and b_mesh.materials:
+            material.DICT_MATERIALS[material_hash] = b_mesh.materials[0]
+
+    def get_material_hash(self, n_block):
+        """Return a key that identifies the material created from the properties of n_block."""
+        material_hash = tuple((prop.__class__.__name__, prop.get_hash())
+                              for prop in n_block.properties if not isinstance(prop, self.MESH_PROPERTIES))
+        # the uv animation of the geometry is imported into its material as well
+        n_ctrl = nif_utils.find_controller(n_block, NifFormat.NiUVController)
+        if n_ctrl and n_ctrl.data:
+            material_hash += (("NiUVController", n_ctrl.data.get_hash()),)
+        return material_hash
 
     def process_property(self, prop):
         """Base method to warn user that this property is not supported"""
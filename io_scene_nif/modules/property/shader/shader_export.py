@@ -38,6 +38,7 @@
 # ***** END LICENSE BLOCK *****
 from pyffi.formats.nif import NifFormat
 
+from io_scene_nif.modules.object.block_registry import block_store
 from io_scene_nif.modules.property.texture import texture_writer
 from io_scene_nif.utility import nif_utils
 
@@ -163,8 +164,15 @@ class BSShader:
         if b_obj.niftools_shader.bs_shadertype == 'BSEffectShaderProperty':
             bsshader.source_texture = texture_writer.export_texture_filename(self.base_mtex.texture)
             bsshader.greyscale_texture = texture_writer.export_texture_filename(self.glow_mtex.texture)
-
-        return bsshader
+            # effect shaders get a controller of their own, so they are not shared
+            return bsshader
+
+        # search for duplicate
+        key = block_store.get_block_key(bsshader)
+        n_block = block_store.find_shared_block(key)
+        if n_block is not None:
+            return n_block
+        return block_store.share_block(key, bsshader)
 
     @staticmethod
     def export_shader_flags(b_obj, shader):
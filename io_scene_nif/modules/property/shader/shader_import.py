@@ -40,6 +40,7 @@ import bpy
 from pyffi.formats.nif import NifFormat
 
 from io_scene_nif.modules.object.block_registry import block_store
+from io_scene_nif.modules.property import material
 from io_scene_nif.modules.property.texture.texture_import import TextureSlotManager
 from io_scene_nif.utility import nif_utils
 from io_scene_nif.utility.util_logging import NifLog
@@ -48,7 +49,6 @@ from io_scene_nif.utility.util_logging import NifLog
 class BSShader:
 
     def __init__(self):
-        self.dict_materials = {}
         self.texturehelper = TextureSlotManager()
 
     @staticmethod
@@ -86,9 +86,9 @@ class BSShader:
                 b_obj.niftools_shader[b_flag_name_2] = True
 
     def import_bsshader_material(self, bs_shader_property, bs_effect_shader_property, n_alpha_prop):
-        material_hash = self.get_bsshader_hash(bs_shader_property, bs_effect_shader_property)
+        material_hash = self.get_bsshader_hash(bs_shader_property, bs_effect_shader_property) + (n_alpha_prop.get_hash() if n_alpha_prop else None,)
         try:
-            return self.dict_materials[material_hash]
+            return material.DICT_MATERIALS[material_hash]
         except KeyError:
             pass
 
@@ -155,6 +155,9 @@ class BSShader:
                 b_mat.emit = bs_effect_shader_property.emissive_multiple
             b_mat.niftools_alpha.textureflag = bs_effect_shader_property.controller.flags
 
+        material.DICT_MATERIALS[material_hash] = b_mat
+        return b_mat
+
     def set_alpha_bsshader(self, b_mat, shader_property):
         NifLog.debug("Alpha prop detected")
         b_mat.use_transparency = True
@@ -163,7 +166,8 @@ class BSShader:
         return b_mat
 
     def get_bsshader_hash(self, bs_shader_property, bs_effect_shader_property):
-        return (bs_shader_property.get_hash()[1:] if bs_shader_property else None,  # skip first element, which is name
+        return ("BSShader",  # keep apart from the hashes of nif property lists
+                bs_shader_property.get_hash()[1:] if bs_shader_property else None,  # skip first element, which is name
                 bs_effect_shader_property.get_hash() if bs_effect_shader_property else None)
 
     # TODO [shader] Move move out when nolonger required to reference
@@ -37,9 +37,12 @@
 #
 # ***** END LICENSE BLOCK *****
 
-# dictionary of texture files, to reuse textures
+# dictionary of texture names by texture file, to reuse textures
 DICT_TEXTURES = {}
 
+# dictionary of embedded image names by hash of their dds data, to reuse identical embedded textures
+DICT_EMBEDDED_IMAGES = {}
+
 # TODO [property][texture] Move IMPORT_EMBEDDED_TEXTURES as a import property
 IMPORT_EMBEDDED_TEXTURES = False
 
@@ -0,0 +1,243 @@
+"""This module contains a block compression encoder and writer for dds textures with full mipmap chains."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import struct
+
+import numpy as np
+
+# dds header flags, see the DDS_HEADER documentation
+DDSD_CAPS = 0x1
+DDSD_HEIGHT = 0x2
+DDSD_WIDTH = 0x4
+DDSD_PIXELFORMAT = 0x1000
+DDSD_MIPMAPCOUNT = 0x20000
+DDSD_LINEARSIZE = 0x80000
+DDPF_FOURCC = 0x4
+DDSCAPS_COMPLEX = 0x8
+DDSCAPS_TEXTURE = 0x1000
+DDSCAPS_MIPMAP = 0x400000
+
+HEADER = struct.Struct("<4s7I44s2I4s5I5I")
+
+# marks the key of the source in the reserved header space, so converted files can be recognized
+KEY_MARKER = b"NIFK"
+KEY_SIZE = 20
+
+# four character code and bytes per 4x4 block of each format
+FORMATS = {
+    "BC1": (b"DXT1", 8),
+    "BC3": (b"DXT5", 16),
+    "BC5": (b"ATI2", 16),
+}
+
+
+def get_mipmaps(pixels, normal_map=False):
+    """Return the full mipmap chain of an image, down to 1x1, by averaging 2x2 texels.
+
+    :param pixels: The image as float array of shape (height, width, 4), in the range [0, 1].
+    :param normal_map: Renormalize the vectors encoded in rgb after averaging.
+    :return: List of the images per level, starting with pixels.
+    """
+    mipmaps = [pixels]
+    while pixels.shape[0] > 1 or pixels.shape[1] > 1:
+        for axis in (0, 1):
+            size = pixels.shape[axis] // 2
+            if size:
+                # each level halves the size, rounding down as the dds format expects
+                pixels = 0.5 * (pixels.take(range(0, 2 * size, 2), axis=axis) +
+                                pixels.take(range(1, 2 * size, 2), axis=axis))
+        if normal_map:
+            vectors = pixels[..., :3] * 2.0 - 1.0
+            norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+            pixels = pixels.copy()
+            pixels[..., :3] = np.where(norms > 1e-6, vectors / np.maximum(norms, 1e-6), vectors) * 0.5 + 0.5
+        mipmaps.append(pixels)
+    return mipmaps
+
+
+def get_blocks(pixels):
+    """Split an image into 4x4 blocks, in the order the block compressed formats store them.
+
+    :param pixels: Array of shape (height, width, channels).
+    :return: Array of shape (num_blocks, 16, channels), with the texels of each block by row.
+    """
+    height, width, channels = pixels.shape
+    # repeat the last row and column to fill partial blocks
+    pixels = np.pad(pixels, ((0, -height % 4), (0, -width % 4), (0, 0)), mode="edge")
+    blocks = pixels.reshape(pixels.shape[0] // 4, 4, pixels.shape[1] // 4, 4, channels).swapaxes(1, 2)
+    return blocks.reshape(-1, 16, channels)
+
+
+def pack_565(colors):
+    """Quantize rgb colors in the range [0, 255] to 16 bit 5:6:5 values."""
+    colors = np.rint(colors * (np.array((31, 63, 31)) / 255.0)).astype(np.uint16)
+    return (colors[..., 0] << 11) | (colors[..., 1] << 5) | colors[..., 2]
+
+
+def unpack_565(values):
+    """Expand 16 bit 5:6:5 values to rgb colors in the range [0, 255]."""
+    r = (values >> 11) & 31
+    g = (values >> 5) & 63
+    b = values & 31
+    return np.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=-1).astype(np.float64)
+
+
+def encode_color_blocks(blocks):
+    """Encode the rgb of each block as a bc1 color block, always in four color mode.
+
+    The end points are fitted along the principal axis of the block's colors.
+
+    :param blocks: Float array of shape (num_blocks, 16, 3), in the range [0, 255].
+    :return: Structured array of the encoded blocks, 8 bytes per block.
+    """
+    mean = blocks.mean(axis=1, keepdims=True)
+    centered = blocks - mean
+    covariance = np.einsum("nki,nkj->nij", centered, centered)
+    # power iteration for the principal axis, starting along the grey axis
+    axis = np.ones((len(blocks), 3))
+    for _ in range(8):
+        new_axis = np.einsum("nij,nj->ni", covariance, axis)
+        norm = np.linalg.norm(new_axis, axis=1, keepdims=True)
+        axis = np.where(norm > 1e-9, new_axis / np.maximum(norm, 1e-9), axis)
+    projection = np.einsum("nki,ni->nk", centered, axis)
+    start = np.clip(mean[:, 0] + projection.max(axis=1)[:, None] * axis, 0, 255)
+    end = np.clip(mean[:, 0] + projection.min(axis=1)[:, None] * axis, 0, 255)
+
+    color0 = pack_565(start)
+    color1 = pack_565(end)
+    # four color mode requires color0 > color1
+    swap = color0 < color1
+    color0, color1 = np.where(swap, color1, color0), np.where(swap, color0, color1)
+
+    decoded0 = unpack_565(color0)
+    decoded1 = unpack_565(color1)
+    palette = np.stack((decoded0, decoded1, (2 * decoded0 + decoded1) / 3, (decoded0 + 2 * decoded1) / 3), axis=1)
+    distances = ((blocks[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=-1)
+    indices = distances.argmin(axis=-1).astype(np.uint32)
+    # equal end points leave only the first color
+    indices[color0 == color1] = 0
+
+    packed = np.zeros(len(blocks), dtype=[("color0", "<u2"), ("color1", "<u2"), ("indices", "<u4")])
+    packed["color0"] = color0
+    packed["color1"] = color1
+    packed["indices"] = (indices << (2 * np.arange(16, dtype=np.uint32))).sum(axis=1, dtype=np.uint32)
+    return packed
+
+
+def encode_single_channel_blocks(blocks):
+    """Encode one channel of each block as a bc4 block, in eight value mode.
+
+    :param blocks: Float array of shape (num_blocks, 16), in the range [0, 255].
+    :return: Structured array of the encoded blocks, 8 bytes per block.
+    """
+    value0 = np.rint(blocks.max(axis=1))
+    value1 = np.rint(blocks.min(axis=1))
+    weights = np.array((0, 7, 1, 2, 3, 4, 5, 6)) / 7.0
+    palette = value0[:, None] * (1.0 - weights) + value1[:, None] * weights
+    indices = np.abs(blocks[:, :, None] - palette[:, None, :]).argmin(axis=-1).astype(np.uint64)
+    bits = (indices << (3 * np.arange(16, dtype=np.uint64))).sum(axis=1, dtype=np.uint64)
+
+    packed = np.zeros(len(blocks), dtype=[("value0", "u1"), ("value1", "u1"), ("indices", "u1", 6)])
+    packed["value0"] = value0
+    packed["value1"] = value1
+    packed["indices"] = (bits[:, None] >> (8 * np.arange(6, dtype=np.uint64))) & 0xff
+    return packed
+
+
+def encode(pixels, dds_format):
+    """Block compress an image.
+
+    :param pixels: Float array of shape (height, width, 4), in the range [0, 1], top row first.
+    :param dds_format: One of the keys of FORMATS.
+    :return: The encoded image data.
+    """
+    blocks = get_blocks(np.clip(pixels, 0.0, 1.0) * 255.0)
+    if dds_format == "BC1":
+        return encode_color_blocks(blocks[..., :3]).tobytes()
+    if dds_format == "BC3":
+        parts = (encode_single_channel_blocks(blocks[..., 3]), encode_color_blocks(blocks[..., :3]))
+    elif dds_format == "BC5":
+        parts = (encode_single_channel_blocks(blocks[..., 0]), encode_single_channel_blocks(blocks[..., 1]))
+    else:
+        raise ValueError("Unsupported dds format {0}".format(dds_format))
+    # interleave the two halves of every block
+    return np.concatenate([part.view(np.uint8).reshape(-1, 8) for part in parts], axis=1).tobytes()
+
+
+def get_header(width, height, num_mipmaps, dds_format, key=b""):
+    """Return the dds header for block compressed data.
+
+    :param key: KEY_SIZE bytes that identify the source, stored in the reserved space of the header.
+    """
+    fourcc, block_size = FORMATS[dds_format]
+    linear_size = max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * block_size
+    flags = DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_MIPMAPCOUNT | DDSD_LINEARSIZE
+    caps = DDSCAPS_TEXTURE | DDSCAPS_MIPMAP | DDSCAPS_COMPLEX
+    return HEADER.pack(b"DDS ", 124, flags, height, width, linear_size, 0, num_mipmaps, KEY_MARKER + key,
+                       32, DDPF_FOURCC, fourcc, 0, 0, 0, 0, 0,
+                       caps, 0, 0, 0, 0)
+
+
+def get_key(path):
+    """Return the key stored in the header of a dds file written by write_dds, or None."""
+    try:
+        with open(path, "rb") as stream:
+            header = stream.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) != HEADER.size:
+        return None
+    reserved = HEADER.unpack(header)[8]
+    if not reserved.startswith(KEY_MARKER):
+        return None
+    return reserved[len(KEY_MARKER):len(KEY_MARKER) + KEY_SIZE]
+
+
+def write_dds(path, pixels, dds_format, normal_map=False, key=b""):
+    """Write an image as block compressed dds file, with its full mipmap chain.
+
+    :param pixels: Float array of shape (height, width, 4), in the range [0, 1], top row first.
+    :param key: KEY_SIZE bytes that identify the source, see get_key.
+    """
+    mipmaps = get_mipmaps(pixels, normal_map)
+    height, width = pixels.shape[:2]
+    with open(path, "wb") as stream:
+        stream.write(get_header(width, height, len(mipmaps), dds_format, key))
+        for mipmap in mipmaps:
+            stream.write(encode(mipmap, dds_format))
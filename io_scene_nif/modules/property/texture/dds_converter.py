@@ -0,0 +1,145 @@
+"""This module contains the conversion of exported texture images to dds."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os.path
+
+import bpy
+import numpy as np
+
+from io_scene_nif.modules.property.texture import dds
+from io_scene_nif.utility.util_logging import NifLog
+
+
+class DdsConverter:
+    """Converts images to block compressed dds files with mipmaps, next to the source image.
+
+    The pixels are read from Blender on the main thread, the encoding runs on worker threads.
+    Every dds file records a hash of its source and settings, so unchanged images are not converted again.
+    """
+
+    # bump whenever the encoder output changes, to convert cached files again
+    VERSION = b"1"
+
+    def __init__(self):
+        self._executor = None
+        self._jobs = {}
+
+    @classmethod
+    def get_key(cls, file_path, normal_map):
+        """Hash the source file and conversion settings."""
+        sha1 = hashlib.sha1(cls.VERSION + (b"N" if normal_map else b"C"))
+        with open(file_path, "rb") as stream:
+            for chunk in iter(lambda: stream.read(1 << 20), b''):
+                sha1.update(chunk)
+        return sha1.digest()
+
+    @staticmethod
+    def get_format(pixels, normal_map):
+        """Choose the block compression format by slot type and whether the image has alpha."""
+        has_alpha = bool((pixels[..., 3] < 1.0).any())
+        if normal_map:
+            # two channel normal maps, unless the alpha holds for instance a specular mask
+            return "BC3" if has_alpha else "BC5"
+        return "BC3" if has_alpha else "BC1"
+
+    @classmethod
+    def write(cls, dds_path, pixels, normal_map, key):
+        dds_format = cls.get_format(pixels, normal_map)
+        dds.write_dds(dds_path, pixels, dds_format, normal_map, key)
+        return dds_format
+
+    def convert(self, b_image, normal_map=False):
+        """Start converting an image to a dds file with the same name, unless it is a dds file already or up to date.
+
+        :param b_image: The Blender image.
+        :param normal_map: Whether the image is a tangent space normal map.
+        """
+        if b_image is None or b_image.packed_file:
+            return
+        file_path = bpy.path.abspath(b_image.filepath)
+        if os.path.splitext(file_path)[1].lower() == ".dds":
+            return
+        dds_path = self.get_dds_path(b_image)
+        if dds_path in self._jobs:
+            return
+
+        try:
+            key = self.get_key(file_path, normal_map)
+        except OSError as e:
+            NifLog.warn("Cannot convert texture '{0}' to dds: {1}".format(file_path, e))
+            return
+        if dds.get_key(dds_path) == key:
+            NifLog.debug("Texture %s is up to date", dds_path)
+            self._jobs[dds_path] = None
+            return
+
+        width, height = b_image.size
+        # blender stores the bottom row first
+        pixels = np.array(b_image.pixels[:], dtype=np.float32).reshape(height, width, 4)[::-1]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+        self._jobs[dds_path] = self._executor.submit(self.write, dds_path, pixels, normal_map, key)
+
+    @staticmethod
+    def get_dds_path(b_image):
+        """The path of the dds file an image is converted to."""
+        return os.path.splitext(bpy.path.abspath(b_image.filepath))[0] + ".dds"
+
+    def is_converted(self, b_image):
+        """Whether a conversion of the image was started since the last finish, or its dds file is up to date."""
+        return b_image is not None and self.get_dds_path(b_image) in self._jobs
+
+    def finish(self):
+        """Wait for all conversions started since the last call, and report them."""
+        for dds_path, future in self._jobs.items():
+            if future is None:
+                continue
+            try:
+                NifLog.info("Converted texture {0} to {1}".format(dds_path, future.result()))
+            except (OSError, ValueError) as e:
+                NifLog.warn("Cannot convert texture '{0}' to dds: {1}".format(dds_path, e))
+        self._jobs = {}
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+dds_converter = DdsConverter()
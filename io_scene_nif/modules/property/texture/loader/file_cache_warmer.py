@@ -0,0 +1,111 @@
+"""This module contains the file system cache warming for deferred texture loading."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from concurrent.futures import ThreadPoolExecutor
+import os.path
+
+
+class FileCacheWarmer:
+    """Warms the operating system's file cache by reading image files on worker threads and discarding the data.
+
+    Nothing is decoded here: Blender's data must only be touched from the main thread, so the images are registered
+    by path and Blender decodes them on first use, only reading the files from the cache in place of the disk.
+    """
+
+    # signatures of the image formats Blender can load, by extension (targa files have none)
+    SIGNATURES = {
+        '.dds': b'DDS ',
+        '.png': b'\x89PNG',
+        '.bmp': b'BM',
+        '.jpg': b'\xff\xd8',
+        '.jpeg': b'\xff\xd8',
+        '.tga': b'',
+    }
+
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._executor = None
+
+    @classmethod
+    def has_signature(cls, path):
+        """Check whether the file format of path is known, so that is_supported can test it."""
+        return os.path.splitext(path)[1].casefold() in cls.SIGNATURES
+
+    @classmethod
+    def is_supported(cls, path):
+        """Check the file signature in place of decoding the image, as a cheap test whether Blender can load it."""
+        signature = cls.SIGNATURES[os.path.splitext(path)[1].casefold()]
+        try:
+            with open(path, "rb") as stream:
+                return stream.read(len(signature)) == signature
+        except OSError:
+            return False
+
+    @classmethod
+    def read_file(cls, path):
+        """Read a whole file, returning the number of bytes read."""
+        size = 0
+        try:
+            with open(path, "rb") as stream:
+                for chunk in iter(lambda: stream.read(cls.CHUNK_SIZE), b''):
+                    size += len(chunk)
+        except OSError:
+            # Blender reports unreadable images itself when it decodes them
+            pass
+        return size
+
+    def warm(self, path):
+        """Start reading a file into the file system cache in the background.
+
+        :return: A future for the number of bytes read.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor.submit(self.read_file, path)
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads, they are started again on the next warm."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+file_cache_warmer = FileCacheWarmer()
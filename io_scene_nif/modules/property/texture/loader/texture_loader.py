@@ -37,14 +37,16 @@
 #
 # ***** END LICENSE BLOCK *****
 
-from functools import reduce
-import operator
+import hashlib
+import io
 import os.path
 
 import bpy
 from pyffi.formats.nif import NifFormat
 
 from io_scene_nif.modules.property import texture
+from io_scene_nif.modules.property.texture.loader.file_cache_warmer import file_cache_warmer
+from io_scene_nif.modules.property.texture.loader.texture_path_index import texture_path_index
 from io_scene_nif.utility.util_global import NifOp
 from io_scene_nif.utility.util_logging import NifLog
 
@@ -68,7 +70,7 @@ class TextureLoader:
 
     def import_texture_source(self, source):
         """Convert a NiSourceTexture block, or simply a path string, to a Blender Texture object.
-        Stores it in the texture.DICT_TEXTURES dictionary to avoid future duplicate imports.
+        Stores its name in the texture.DICT_TEXTURES dictionary to avoid future duplicate imports.
         :return Texture object
         """
 
@@ -79,12 +81,12 @@ class TextureLoader:
         # calculate the texture hash key
         texture_hash = self.get_texture_hash(source)
 
-        try:
-            # look up the texture in the dictionary of imported textures and return it if found
-            return texture.DICT_TEXTURES[texture_hash]
-        except KeyError:
-            NifLog.debug("Storing {0} texture in map".format(str(source)))
-            pass
+        # look up the texture in the dictionary of imported textures and return it if found
+        # textures are stored by name, so ones the user removed since are imported again instead of referenced
+        b_texture = bpy.data.textures.get(texture.DICT_TEXTURES.get(texture_hash, ""))
+        if b_texture is not None:
+            return b_texture
+        NifLog.debug("Storing %s texture in map", source)
 
         if isinstance(source, NifFormat.NiSourceTexture) and not source.use_external and texture.IMPORT_EMBEDDED_TEXTURES:
             fn, b_image = self.import_embedded_texture_source(source)
@@ -105,46 +107,87 @@ class TextureLoader:
         b_texture.use_mipmap = True
 
         # save texture to avoid duplicate imports, and return it
-        texture.DICT_TEXTURES[texture_hash] = b_texture
+        texture.DICT_TEXTURES[texture_hash] = b_texture.name
         return b_texture
 
     def import_embedded_texture_source(self, source):
-
-        fn, tex = self.generate_image_name()
-
-        # save embedded texture as dds file
-        stream = open(tex, "wb")
+        """Load embedded pixel data straight from memory as a packed dds image.
+        Identical pixel data is stored under the same hash, so it is loaded only once.
+        """
+        # convert the embedded texture to dds in memory
+        stream = io.BytesIO()
         try:
-            NifLog.info("Saving embedded texture as {0}".format(tex))
             source.pixel_data.save_as_dds(stream)
         except ValueError:
             # value error means that the pixel format is not supported
-            b_image = None
-        else:
-            # saving dds succeeded so load the file
-            b_image = bpy.ops.image.open(tex)
-            # Blender will return an image object even if the file format is not supported,
-            # so to check if the image is actually loaded an error is forced via "b_image.size"
-            try:
-                b_image.size
-            except:  # RuntimeError: couldn't load image data in Blender
-                b_image = None  # not supported, delete image object
-        finally:
-            stream.close()
+            return ["image.dds", None]
+        dds = stream.getvalue()
+        digest = hashlib.sha1(dds).hexdigest()
+        fn = "image_{0}.dds".format(digest[:16])
+
+        # look up the image in the dictionary of embedded images and return it if found, None marks unsupported data
+        if digest in texture.DICT_EMBEDDED_IMAGES:
+            b_image_name = texture.DICT_EMBEDDED_IMAGES[digest]
+            if b_image_name is None:
+                return [fn, None]
+            b_image = bpy.data.images.get(b_image_name)
+            if b_image is not None:
+                return [fn, b_image]
+
+        NifLog.info("Loading embedded texture as {0}".format(fn))
+        mipmap = source.pixel_data.mipmaps[0]
+        b_image = bpy.data.images.new(name=fn, width=max(mipmap.width, 1), height=max(mipmap.height, 1), alpha=True)
+        # unpacking writes the image next to the nif, once for all nifs that embed it
+        b_image.filepath = os.path.join(os.path.dirname(NifOp.props.filepath), fn)
+        b_image.source = 'FILE'
+        b_image.pack(data=dds, data_len=len(dds))
+        # Blender will return an image object even if the file format is not supported,
+        # so to check if the image is actually loaded an error is forced via "b_image.size"
+        try:
+            b_image.size
+        except:  # RuntimeError: couldn't load image data in Blender
+            bpy.data.images.remove(b_image)
+            b_image = None  # not supported, delete image object
 
+        texture.DICT_EMBEDDED_IMAGES[digest] = b_image.name if b_image else None
         return [fn, b_image]
 
     @staticmethod
-    def generate_image_name():
-        """Find a file name (but avoid overwriting)"""
-        n = 0
-        while n < 1000:
-            fn = "image{:0>3d}.dds".format(n)
-            tex = os.path.join(os.path.dirname(NifOp.props.filepath), fn)
-            if not os.path.exists(tex):
-                break
-            n += 1
-        return fn, tex
+    def load_texture_index():
+        """Start the texture path index from the cache file of earlier sessions."""
+        cache_dir = bpy.utils.user_resource('CONFIG', path="io_scene_nif", create=True)
+        texture_path_index.load(os.path.join(cache_dir, "texture_index.json"))
+
+    @staticmethod
+    def save_texture_index():
+        """Store the texture path index for later sessions."""
+        try:
+            texture_path_index.save()
+        except OSError as e:
+            NifLog.warn("Could not save the texture cache: {0}".format(e))
+
+    @staticmethod
+    def load_image(tex, deferred=False):
+        """Load an image file, deferred or not.
+
+        A deferred image is only registered by path while its file is read into the file system cache in the background,
+        Blender decodes its pixels on first use.
+        :return The image, or None if its file format is not supported
+        """
+        if deferred and file_cache_warmer.has_signature(tex):
+            if not file_cache_warmer.is_supported(tex):
+                return None
+            file_cache_warmer.warm(tex)
+            return bpy.data.images.load(tex)
+
+        b_image = bpy.data.images.load(tex)
+        # Blender will return an image object even if the file format is not supported,
+        # so to check if the image is actually loaded an error is forced via "b_image.size"
+        try:
+            b_image.size
+        except:  # RuntimeError: couldn't load image data in Blender
+            return None  # not supported, delete image object
+        return b_image
 
     def import_external_source(self, source):
         b_image = None
@@ -160,7 +203,8 @@ class TextureLoader:
 
         fn = fn.replace('\\', os.sep)
         fn = fn.replace('/', os.sep)
-        # go searching for it
+        # go searching for it, starting from the directories cached by earlier sessions
+        self.load_texture_index()
         import_path = os.path.dirname(NifOp.props.filepath)
         search_path_list = [import_path]
         if bpy.context.user_preferences.filepaths.texture_directory:
@@ -185,38 +229,19 @@ class TextureLoader:
         for texdir in search_path_list:
             texdir = texdir.replace('\\', os.sep)
             texdir = texdir.replace('/', os.sep)
-            # go through all possible file names, try alternate extensions too; for linux, also try lower case versions of filenames
-            texfns = reduce(operator.add,
-                            [[fn[:-4] + ext, fn[:-4].lower() + ext]
-                             for ext in ('.DDS', '.dds', '.PNG', '.png',
-                                         '.TGA', '.tga', '.BMP', '.bmp',
-                                         '.JPG', '.jpg')])
-
-            texfns = [fn, fn.lower()] + list(set(texfns))
-            for texfn in texfns:
-                # now a little trick, to satisfy many Morrowind mods
-                if texfn[:9].lower() == 'textures' + os.sep and texdir[-9:].lower() == os.sep + 'textures':
-                    # strip one of the two 'textures' from the path
-                    tex = os.path.join(texdir[:-9], texfn)
-                else:
-                    tex = os.path.join(texdir, texfn)
-
-                # "ignore case" on linuxW
-                tex = bpy.path.resolve_ncase(tex)
-                NifLog.debug("Searching {0}".format(tex))
-                if os.path.exists(tex):
-                    # tries to load the file
-                    b_image = bpy.data.images.load(tex)
-                    # Blender will return an image object even if the file format is not supported,
-                    # so to check if the image is actually loaded an error is forced via "b_image.size"
-                    try:
-                        b_image.size
-                    except:  # RuntimeError: couldn't load image data in Blender
-                        b_image = None  # not supported, delete image object
-                    else:
-                        # file format is supported
-                        NifLog.debug("Found '{0}' at {1}".format(fn, tex))
-                        break
+            # now a little trick, to satisfy many Morrowind mods
+            if fn[:9].lower() == 'textures' + os.sep and texdir[-9:].lower() == os.sep + 'textures':
+                # strip one of the two 'textures' from the path
+                texdir = texdir[:-9]
+            # the index ignores case and tries alternate extensions too
+            for tex in texture_path_index.find(texdir, fn):
+                NifLog.debug("Searching %s", tex)
+                # tries to load the file
+                b_image = self.load_image(tex, NifOp.props.deferred_textures)
+                if b_image:
+                    # file format is supported
+                    NifLog.debug("Found '%s' at %s", fn, tex)
+                    break
             if b_image:
                 return [tex, b_image]
         else:
@@ -0,0 +1,209 @@
+"""This module contains an in-memory, case insensitive index of the texture files on disk."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import json
+import os
+
+
+class TexturePathIndex:
+    """Resolves texture paths against directory listings that are read once and reused for the whole session.
+
+    Every directory is listed on first use only, with the names case folded so that lookups ignore case
+    on every platform; any later lookup in the same directory is a dictionary hit.
+
+    The listings and the resolved texture paths can be saved to a cache file and loaded by a later session.
+    Cached directories are checked against their modification time once per session and listed again if changed.
+    """
+
+    # alternate extensions, in order of preference
+    EXTENSIONS = ('.dds', '.png', '.tga', '.bmp', '.jpg')
+
+    # bump whenever the layout of the cache file changes
+    CACHE_VERSION = 1
+
+    def __init__(self):
+        self.cache_path = None
+        self.clear()
+
+    def clear(self):
+        """Forget all directory listings, so that they are read again on the next lookup."""
+        # maps a directory to its (modification time, subdirectory names, file names) by case folded name
+        # file names are nested by case folded stem and extension
+        self._dirs = {}
+        # maps a texture reference to the (directory, modification time, paths) it resolved to
+        self._resolved = {}
+        # directories whose modification time has been checked in this session
+        self._checked = set()
+        self._dirty = True
+
+    def __len__(self):
+        """Number of directories listed."""
+        return len(self._dirs)
+
+    @staticmethod
+    def get_mtime(directory):
+        try:
+            return os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def is_current(self, directory, mtime):
+        """Check whether a directory is unchanged since it was last listed with the given modification time."""
+        try:
+            entry = self._dirs[directory]
+        except KeyError:
+            return False
+        if entry[0] != mtime:
+            return False
+        if directory not in self._checked:
+            if self.get_mtime(directory) != mtime:
+                return False
+            self._checked.add(directory)
+        return True
+
+    def list_dir(self, directory):
+        """Return the case folded listing of a directory, reading it from disk on first use only."""
+        try:
+            entry = self._dirs[directory]
+        except KeyError:
+            pass
+        else:
+            if self.is_current(directory, entry[0]):
+                return entry[1:]
+
+        mtime = self.get_mtime(directory)
+        subdirs = {}
+        files = {}
+        try:
+            for entry in os.scandir(directory):
+                if entry.is_dir():
+                    subdirs.setdefault(entry.name.casefold(), entry.name)
+                else:
+                    stem, ext = os.path.splitext(entry.name)
+                    files.setdefault(stem.casefold(), {}).setdefault(ext.casefold(), entry.name)
+        except OSError:
+            # missing or unreadable directories simply have no files
+            pass
+        self._dirs[directory] = mtime, subdirs, files
+        self._checked.add(directory)
+        self._dirty = True
+        return subdirs, files
+
+    def find(self, root, rel_path):
+        """Find the files matching rel_path within root, ignoring case.
+
+        :param root: The directory to search in.
+        :param rel_path: The texture path relative to root, using os.sep.
+        :return: The existing paths, the extension of rel_path first and then the alternate extensions by preference.
+        """
+        key = "\n".join((root, rel_path))
+        try:
+            directory, mtime, paths = self._resolved[key]
+        except KeyError:
+            pass
+        else:
+            # the reference resolved in the deepest directory that exists, so it is still valid if that is unchanged
+            if self.is_current(directory, mtime):
+                return list(paths)
+
+        directory, paths = self._find(root, rel_path)
+        self._resolved[key] = directory, self._dirs[directory][0], paths
+        self._dirty = True
+        return list(paths)
+
+    def _find(self, root, rel_path):
+        directory = os.path.normpath(root)
+        parts = [part for part in rel_path.split(os.sep) if part not in ('', '.')]
+        if not parts:
+            self.list_dir(directory)
+            return directory, []
+
+        for part in parts[:-1]:
+            if part == '..':
+                directory = os.path.dirname(directory)
+                continue
+            subdirs, files = self.list_dir(directory)
+            try:
+                directory = os.path.join(directory, subdirs[part.casefold()])
+            except KeyError:
+                return directory, []
+
+        subdirs, files = self.list_dir(directory)
+        stem, ext = os.path.splitext(parts[-1])
+        names = files.get(stem.casefold())
+        if not names:
+            return directory, []
+        ext = ext.casefold()
+        exts = (ext,) + tuple(alt_ext for alt_ext in self.EXTENSIONS if alt_ext != ext)
+        return directory, [os.path.join(directory, names[alt_ext]) for alt_ext in exts if alt_ext in names]
+
+    def load(self, cache_path):
+        """Use cache_path as cache file, starting from its contents if it holds a valid cache."""
+        if cache_path == self.cache_path:
+            return
+        self.clear()
+        self.cache_path = cache_path
+        try:
+            with open(cache_path, "r", encoding="utf-8") as stream:
+                cache = json.load(stream)
+            if cache["version"] != self.CACHE_VERSION:
+                return
+            self._dirs = {directory: tuple(entry) for directory, entry in cache["dirs"].items()}
+            self._resolved = {key: tuple(entry) for key, entry in cache["resolved"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            # no cache yet, or an unusable one, so start cold
+            self._dirs = {}
+            self._resolved = {}
+        else:
+            self._dirty = False
+
+    def save(self):
+        """Write the index to its cache file, if it changed since it was loaded."""
+        if not (self.cache_path and self._dirty):
+            return
+        cache = {"version": self.CACHE_VERSION, "dirs": self._dirs, "resolved": self._resolved}
+        # write to a temporary file first so an interrupted save never leaves a broken cache behind
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as stream:
+            json.dump(cache, stream)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+
+texture_path_index = TexturePathIndex()
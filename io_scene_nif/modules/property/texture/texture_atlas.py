@@ -0,0 +1,299 @@
+"""Packs the textures of compatible materials into an atlas, so their polygons can be exported as one shape."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import math
+import os.path
+
+import bpy
+import numpy as np
+
+from io_scene_nif.modules.property import texture
+from io_scene_nif.utility.util_global import NifOp
+from io_scene_nif.utility.util_logging import NifLog
+
+# texels of edge color around every packed image, against bleeding when filtering and mipmapping
+PADDING = 4
+
+# largest atlas side, groups that do not fit are exported per material
+MAX_SIZE = 4096
+
+
+def next_power_of_two(value):
+    return 1 << max(0, int(math.ceil(math.log2(value))))
+
+
+def pack_rects(sizes, padding=PADDING, max_size=MAX_SIZE):
+    """Pack rectangles in shelves, tallest first, into a power of two atlas.
+
+    :param sizes: List of (width, height) tuples.
+    :param padding: Free texels around every rectangle.
+    :param max_size: Largest allowed atlas width and height.
+    :return: (width, height) of the atlas and the (x, y) position of every rectangle, or None if they do not fit.
+    """
+    padded = [(width + 2 * padding, height + 2 * padding) for width, height in sizes]
+    area = sum(width * height for width, height in padded)
+    atlas_width = next_power_of_two(max(max(width for width, _ in padded), math.sqrt(area)))
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in sorted(range(len(sizes)), key=lambda j: padded[j][1], reverse=True):
+        width, height = padded[i]
+        if x + width > atlas_width:
+            # start a new shelf
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        positions[i] = (x + padding, y + padding)
+        x += width
+        shelf_height = max(shelf_height, height)
+    atlas_height = next_power_of_two(y + shelf_height)
+    if atlas_width > max_size or atlas_height > max_size:
+        return None
+    return (atlas_width, atlas_height), positions
+
+
+def paste(atlas, pixels, position, padding=PADDING):
+    """Copy an image into the atlas, and extend its edges into the padding."""
+    x, y = position
+    height, width = pixels.shape[:2]
+    atlas[y - padding:y + height + padding, x - padding:x + width + padding] = np.pad(
+        pixels, ((padding, padding), (padding, padding), (0, 0)), mode='edge')
+
+
+def get_uv_transform(position, size, atlas_size):
+    """Return (scale_u, scale_v, offset_u, offset_v) mapping uv coordinates of an image into the atlas."""
+    (x, y), (width, height), (atlas_width, atlas_height) = position, size, atlas_size
+    return width / atlas_width, height / atlas_height, x / atlas_width, y / atlas_height
+
+
+class TextureAtlas:
+    """Finds materials of a mesh that only differ in their diffuse and normal map images, packs these images into an atlas
+    and maps the polygons of every such material onto the first material of its group.
+
+    Pixels are kept in Blender's order, bottom row first, so atlas positions are in uv space.
+    """
+
+    def __init__(self):
+        # material index -> index of the material whose shape takes its polygons
+        self.targets = {}
+        # material index -> uv transform into its atlas
+        self.uv_transforms = {}
+        # target material index -> temporary material using the atlas images
+        self.materials = {}
+        self._datablocks = []
+
+    @staticmethod
+    def is_atlas_slot(b_mat_texslot):
+        """Whether the slot is a plain image diffuse or normal map texture, see Texture.determine_texture_types."""
+        b_texture = b_mat_texslot.texture
+        if b_mat_texslot.texture_coords != 'UV' or not b_mat_texslot.uv_layer:
+            return False
+        if b_texture.type != 'IMAGE' or b_texture.image is None or b_texture.image.source != 'FILE':
+            return False
+        if b_mat_texslot.use_map_emit or b_mat_texslot.use_map_specular or b_mat_texslot.use_map_color_spec:
+            return False
+        if b_mat_texslot.use_map_normal:
+            return b_texture.use_normal_map
+        return b_mat_texslot.use_map_color_diffuse and b_mat_texslot.blend_type != 'DARKEN'
+
+    @classmethod
+    def get_material_key(cls, b_mat):
+        """Return everything that is exported for a material except for its images, or None if it cannot be atlased."""
+        if b_mat is None or b_mat.animation_data:
+            return None
+        b_mat_texslots = texture.get_used_textslots(b_mat)
+        if not b_mat_texslots or not all(cls.is_atlas_slot(b_mat_texslot) for b_mat_texslot in b_mat_texslots):
+            return None
+        # all images of a material share its place in the atlas
+        if len(set(tuple(b_mat_texslot.texture.image.size) for b_mat_texslot in b_mat_texslots)) != 1:
+            return None
+        slots = tuple((b_mat_texslot.uv_layer, b_mat_texslot.blend_type, b_mat_texslot.use_map_color_diffuse,
+                       b_mat_texslot.use_map_normal, b_mat_texslot.use_map_alpha, b_mat_texslot.texture.use_normal_map)
+                      for b_mat_texslot in b_mat_texslots)
+        return (tuple(b_mat.niftools.ambient_color), tuple(b_mat.diffuse_color), tuple(b_mat.specular_color),
+                tuple(b_mat.niftools.emissive_color), tuple(b_mat.niftools.emissive_alpha),
+                b_mat.niftools.lightingeffect1, b_mat.niftools.lightingeffect2,
+                b_mat.specular_intensity, b_mat.specular_hardness, b_mat.emit, b_mat.alpha, b_mat.use_transparency,
+                b_mat.type, b_mat.offset_z, b_mat.niftools_alpha.alphaflag, b_mat.niftools_alpha.textureflag,
+                b_mat.niftools_alpha.materialflag, slots)
+
+    @staticmethod
+    def get_uv_ranges(b_mesh, uv_layer):
+        """Return the uv bounds of the polygons of every material index, as {index: (min, max)}."""
+        num_loops = len(b_mesh.loops)
+        num_polys = len(b_mesh.polygons)
+        uvs = np.empty(num_loops * 2, dtype=np.float32)
+        b_mesh.uv_layers[uv_layer].data.foreach_get("uv", uvs)
+        uvs = uvs.reshape(num_loops, 2)
+        material_indices = np.empty(num_polys, dtype=np.int32)
+        b_mesh.polygons.foreach_get("material_index", material_indices)
+        loop_totals = np.empty(num_polys, dtype=np.int32)
+        b_mesh.polygons.foreach_get("loop_total", loop_totals)
+        loop_starts = np.empty(num_polys, dtype=np.int32)
+        b_mesh.polygons.foreach_get("loop_start", loop_starts)
+        loop_materials = np.empty(num_loops, dtype=np.int32)
+        for material_index, loop_start, loop_total in zip(material_indices, loop_starts, loop_totals):
+            loop_materials[loop_start:loop_start + loop_total] = material_index
+        ranges = {}
+        for material_index in np.unique(material_indices):
+            material_uvs = uvs[loop_materials == material_index]
+            ranges[int(material_index)] = (material_uvs.min(), material_uvs.max())
+        return ranges
+
+    def get_groups(self, b_mesh, mesh_materials):
+        """Group the indices of materials that can share an atlas."""
+        groups = {}
+        uv_ranges = {}
+        eps = NifOp.props.epsilon
+        for material_index, b_mat in enumerate(mesh_materials):
+            key = self.get_material_key(b_mat)
+            if key is None:
+                continue
+            # tiling textures cannot be atlased, so every uv must stay within the image
+            inside = True
+            for b_mat_texslot in texture.get_used_textslots(b_mat):
+                uv_layer = b_mat_texslot.uv_layer
+                if uv_layer not in b_mesh.uv_layers:
+                    inside = False
+                    break
+                if uv_layer not in uv_ranges:
+                    uv_ranges[uv_layer] = self.get_uv_ranges(b_mesh, uv_layer)
+                uv_range = uv_ranges[uv_layer].get(material_index)
+                if uv_range is None or uv_range[0] < -eps or uv_range[1] > 1 + eps:
+                    inside = False
+                    break
+            if inside:
+                groups.setdefault(key, []).append(material_index)
+        return [material_indices for material_indices in groups.values() if len(material_indices) > 1]
+
+    def build(self, b_obj, mesh_materials):
+        """Pack the images of every group of compatible materials of a mesh object.
+
+        :param b_obj: The Blender mesh object.
+        :param mesh_materials: The materials exported for the mesh, by material index.
+        """
+        for group_index, material_indices in enumerate(self.get_groups(b_obj.data, mesh_materials)):
+            slots_per_material = [texture.get_used_textslots(mesh_materials[material_index])
+                                  for material_index in material_indices]
+            # materials using the very same images share their place in the atlas
+            image_keys = [tuple(b_mat_texslot.texture.image.name for b_mat_texslot in b_mat_texslots)
+                          for b_mat_texslots in slots_per_material]
+            unique_keys = []
+            for image_key in image_keys:
+                if image_key not in unique_keys:
+                    unique_keys.append(image_key)
+            unique_slots = [slots_per_material[image_keys.index(image_key)] for image_key in unique_keys]
+            sizes = [tuple(b_mat_texslots[0].texture.image.size) for b_mat_texslots in unique_slots]
+            packed = pack_rects(sizes)
+            if packed is None:
+                NifLog.warn("Textures of materials {0} do not fit in one atlas, exporting them separately.".format(
+                    ", ".join(mesh_materials[material_index].name for material_index in material_indices)))
+                continue
+            atlas_size, positions = packed
+
+            target_index = material_indices[0]
+            b_orig_mat = mesh_materials[target_index]
+            b_mat = b_orig_mat.copy()
+            self._datablocks.append(b_mat)
+            # export the copy under the name of the original, not as Material.001
+            b_mat.niftools.longname = b_orig_mat.niftools.longname or b_orig_mat.name
+            for slot_index, b_mat_texslot in enumerate(texture.get_used_textslots(b_mat)):
+                b_image = self.create_image(
+                    b_obj, group_index, b_mat_texslot, atlas_size, positions,
+                    [b_mat_texslots[slot_index].texture.image for b_mat_texslots in unique_slots])
+                b_mat_texslot.texture = b_mat_texslot.texture.copy()
+                b_mat_texslot.texture.image = b_image
+                self._datablocks.append(b_mat_texslot.texture)
+            self.materials[target_index] = b_mat
+
+            for material_index, image_key in zip(material_indices, image_keys):
+                i = unique_keys.index(image_key)
+                self.targets[material_index] = target_index
+                self.uv_transforms[material_index] = get_uv_transform(positions[i], sizes[i], atlas_size)
+            NifLog.info("Packed textures of {0} materials of {1} into a {2}x{3} atlas".format(
+                len(material_indices), b_obj.name, *atlas_size))
+
+    def create_image(self, b_obj, group_index, b_mat_texslot, atlas_size, positions, b_images):
+        """Paste the images into a new atlas image, saved next to the first image."""
+        normal_map = b_mat_texslot.use_map_normal
+        atlas_width, atlas_height = atlas_size
+        pixels = np.zeros((atlas_height, atlas_width, 4), dtype=np.float32)
+        # flat normals or black, fully opaque
+        pixels[...] = (0.5, 0.5, 1.0, 1.0) if normal_map else (0.0, 0.0, 0.0, 1.0)
+        for b_image, position in zip(b_images, positions):
+            width, height = b_image.size
+            paste(pixels, np.array(b_image.pixels[:], dtype=np.float32).reshape(height, width, 4), position)
+
+        file_name = "{0}_atlas{1}{2}.png".format(bpy.path.clean_name(b_obj.name), group_index, "_n" if normal_map else "")
+        b_image = bpy.data.images.new(file_name, atlas_width, atlas_height, alpha=True)
+        self._datablocks.append(b_image)
+        b_image.pixels[:] = pixels.ravel()
+        b_image.filepath_raw = os.path.join(os.path.dirname(b_images[0].filepath), file_name)
+        b_image.file_format = 'PNG'
+        b_image.save()
+        return b_image
+
+    def get_target(self, material_index):
+        """Return the index of the material whose shape takes the polygons of the given material."""
+        return self.targets.get(material_index, material_index)
+
+    def get_material(self, material_index, b_mat):
+        """Return the material to export for a target material, using the atlas images if it has any."""
+        return self.materials.get(material_index, b_mat)
+
+    def get_uv(self, material_index, uv):
+        """Map a uv coordinate of a polygon with the given material into its atlas."""
+        uv_transform = self.uv_transforms.get(material_index)
+        if uv_transform is None:
+            return uv
+        scale_u, scale_v, offset_u, offset_v = uv_transform
+        return uv[0] * scale_u + offset_u, uv[1] * scale_v + offset_v
+
+    def clear(self):
+        """Remove the temporary materials, textures and images from Blender."""
+        for b_datablock in reversed(self._datablocks):
+            if isinstance(b_datablock, bpy.types.Material):
+                bpy.data.materials.remove(b_datablock)
+            elif isinstance(b_datablock, bpy.types.Texture):
+                bpy.data.textures.remove(b_datablock)
+            else:
+                bpy.data.images.remove(b_datablock)
+        self._datablocks = []
+        self.targets = {}
+        self.uv_transforms = {}
+        self.materials = {}
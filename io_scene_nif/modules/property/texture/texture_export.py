@@ -42,6 +42,7 @@ from pyffi.formats.nif import NifFormat
 from io_scene_nif.modules.animation.animation_export import Animation
 from io_scene_nif.modules.object.block_registry import block_store
 from io_scene_nif.modules.property import texture
+from io_scene_nif.modules.property.texture.dds_converter import dds_converter
 from io_scene_nif.modules.property.texture.texture_writer import TextureWriter
 from io_scene_nif.utility import nif_utils
 from io_scene_nif.utility.util_global import NifOp
@@ -412,6 +413,16 @@ class Texture:
                 NifLog.warn("Non-UV texture in mesh '{0}', material '{1}'.\nEither delete all non-UV textures or "
                             "create a UV map for every texture associated with selected object and run the script again.".format(b_obj.name, b_mat.name))
 
+        if NifOp.props.convert_dds:
+            self.convert_textures()
+
+    def convert_textures(self):
+        """Convert the images of the texture slots found by determine_texture_types to dds."""
+        for b_mat_texslot in (self.base_mtex, self.glow_mtex, self.bump_mtex, self.gloss_mtex,
+                              self.dark_mtex, self.detail_mtex, self.ref_mtex, self.normal_mtex):
+            if b_mat_texslot and b_mat_texslot.texture.type == 'IMAGE':
+                dds_converter.convert(b_mat_texslot.texture.image, normal_map=b_mat_texslot is self.normal_mtex)
+
 
 def has_diffuse_textures(self, b_mat):
     if self.b_mat == b_mat:
@@ -43,6 +43,7 @@ import bpy
 from pyffi.formats.nif import NifFormat
 
 from io_scene_nif.modules.object.block_registry import block_store
+from io_scene_nif.modules.property.texture.dds_converter import dds_converter
 from io_scene_nif.utility import nif_utils
 from io_scene_nif.utility.util_global import NifOp
 from io_scene_nif.utility.util_logging import NifLog
@@ -62,34 +63,37 @@ class TextureWriter:
         :return: The exported NiSourceTexture block.
         """
 
-        # create NiSourceTexture
-        srctex = NifFormat.NiSourceTexture()
-        srctex.use_external = True
-        if filename is not None:
-            # preset filename
-            srctex.file_name = filename
-        elif n_texture is not None:
-            srctex.file_name = TextureWriter.export_texture_filename(n_texture)
-        else:
-            # this probably should not happen
-            NifLog.warn("Exporting source texture without texture or filename (bug?).")
+        if filename is None:
+            if n_texture is not None:
+                filename = TextureWriter.export_texture_filename(n_texture)
+            else:
+                # this probably should not happen
+                NifLog.warn("Exporting source texture without texture or filename (bug?).")
+                filename = ""
 
         # fill in default values (TODO: can we use 6 for everything?)
         if bpy.context.scene.niftools_scene.nif_version >= 0x0A000100:
-            srctex.pixel_layout = 6
+            pixel_layout = 6
         else:
-            srctex.pixel_layout = 5
+            pixel_layout = 5
+
+        # search for duplicate, texture paths are case insensitive in game
+        key = ("NiSourceTexture", filename.lower().replace('/', '\\'), pixel_layout)
+        srctex = block_store.find_shared_block(key)
+        if srctex is not None:
+            return srctex
+
+        # create NiSourceTexture
+        srctex = NifFormat.NiSourceTexture()
+        srctex.use_external = True
+        srctex.file_name = filename
+        srctex.pixel_layout = pixel_layout
         srctex.use_mipmaps = 1
         srctex.alpha_format = 3
         srctex.unknown_byte = 1
 
-        # search for duplicate
-        for block in block_store.block_to_obj:
-            if isinstance(block, NifFormat.NiSourceTexture) and block.get_hash() == srctex.get_hash():
-                return block
-
         # no identical source texture found, so use and register the new one
-        return block_store.register_block(srctex, n_texture)
+        return block_store.share_block(key, block_store.register_block(srctex, n_texture))
 
     def export_tex_desc(self, texdesc=None, uvlayers=None, b_mat_texslot=None):
         """Helper function for export_texturing_property to export each texture slot."""
@@ -128,9 +132,11 @@ class TextureWriter:
             if n_texture.image.packed_file:
                 NifLog.warn("Packed image in texture '{0}' ignored, exporting as '{1}' instead.".format(n_texture.name, filename))
 
-            # try and find a DDS alternative, force it if required
+            # try and find a DDS alternative, force it if required or converted
+            # images that could not be converted keep their own file
             ddsfilename = "%s%s" % (filename[:-4], '.dds')
-            if os.path.exists(ddsfilename) or NifOp.props.force_dds:
+            converted = NifOp.props.convert_dds and dds_converter.is_converted(n_texture.image)
+            if os.path.exists(ddsfilename) or NifOp.props.force_dds or converted:
                 filename = ddsfilename
 
             # sanitize file path
@@ -21,29 +21,29 @@ class NiTextureProp(TextureSlotManager):
             NiTextureProp.__instance = self
 
     def import_nitextureprop_textures(self, b_mat, n_texture_desc):
-        NifLog.debug("Importing {0}".format(n_texture_desc))
+        NifLog.debug("Importing %s", n_texture_desc)
 
         if n_texture_desc.has_base_texture:
             base = n_texture_desc.base_texture
-            NifLog.debug("Loading base texture {0}".format(base))
+            NifLog.debug("Loading base texture %s", base)
             b_texture = self.create_texture_slot(b_mat, base)
             self.update_diffuse_slot(b_texture)
 
         if n_texture_desc.has_dark_texture:
             dark = n_texture_desc.dark_texture
-            NifLog.debug("Loading dark texture {0}".format(dark))
+            NifLog.debug("Loading dark texture %s", dark)
             b_texture = self.create_texture_slot(b_mat, dark)
             self.update_dark_slot(b_texture)
 
         if n_texture_desc.has_detail_texture:
             detail = n_texture_desc.detail_texture
-            NifLog.debug("Loading detail texture {0}".format(detail))
+            NifLog.debug("Loading detail texture %s", detail)
             b_texture = self.create_texture_slot(b_mat, detail)
             self.update_detail_slot(b_texture)
 
         if n_texture_desc.has_bump_map_texture:
             bump = n_texture_desc.bump_map_texture
-            NifLog.debug("Loading bump texture {0}".format(bump))
+            NifLog.debug("Loading bump texture %s", bump)
             b_texture = self.create_texture_slot(b_mat, bump)
             self.update_bump_slot(b_texture)
             # TODO [property][texture][map] See if additional information that useful
@@ -54,37 +54,37 @@ class NiTextureProp(TextureSlotManager):
 
         if n_texture_desc.has_normal_texture:
             normal = n_texture_desc.normal_texture
-            NifLog.debug("Loading normal texture {0}".format(normal))
+            NifLog.debug("Loading normal texture %s", normal)
             b_texture = self.create_texture_slot(b_mat, normal)
             self.update_normal_slot(b_texture)
 
         if n_texture_desc.has_glow_texture:
             glow = n_texture_desc.glow_texture
-            NifLog.debug("Loading glow texture {0}".format(glow))
+            NifLog.debug("Loading glow texture %s", glow)
             b_texture = self.create_texture_slot(b_mat, glow)
             self.update_glow_slot(b_texture)
 
         if n_texture_desc.has_gloss_texture:
             gloss = n_texture_desc.gloss_texture
-            NifLog.debug("Loading gloss texture {0}".format(gloss))
+            NifLog.debug("Loading gloss texture %s", gloss)
             b_texture = self.create_texture_slot(b_mat, gloss)
             self.update_gloss_slot(b_texture)
 
         if n_texture_desc.has_decal_0_texture:
             decal_0 = n_texture_desc.decal_0_texture
-            NifLog.debug("Loading decal 0 texture {0}".format(decal_0))
+            NifLog.debug("Loading decal 0 texture %s", decal_0)
             b_texture = self.create_texture_slot(b_mat, decal_0)
             self.update_decal_slot_0(b_texture)
 
         if n_texture_desc.has_decal_1_texture:
             decal_1 = n_texture_desc.decal_1_texture
-            NifLog.debug("Loading decal 1 texture {0}".format(decal_1))
+            NifLog.debug("Loading decal 1 texture %s", decal_1)
             b_texture = self.create_texture_slot(b_mat, decal_1)
             self.update_decal_slot_1(b_texture)
 
         if n_texture_desc.has_decal_2_texture:
             decal_2 = n_texture_desc.decal_2_texture
-            NifLog.debug("Loading decal 2 texture {0}".format(decal_2))
+            NifLog.debug("Loading decal 2 texture %s", decal_2)
             b_texture = self.create_texture_slot(b_mat, decal_2)
             self.update_decal_slot_2(b_texture)
 
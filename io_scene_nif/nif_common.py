@@ -40,8 +40,15 @@
 import bpy
 import pyffi
 
-from io_scene_nif.utility.util_global import NifOp
+from io_scene_nif.modules import collision
+from io_scene_nif.modules.collision.convex_decomposition import DICT_CONVEX_DECOMPOSITIONS
+from io_scene_nif.modules.object.block_registry import block_store
+from io_scene_nif.modules.property import material, texture
+from io_scene_nif.modules.property.texture.loader.file_cache_warmer import file_cache_warmer
+from io_scene_nif.modules.property.texture.loader.texture_path_index import texture_path_index
+from io_scene_nif.utility.util_global import NifOp, NifData, KFData, EGMData
 from io_scene_nif.utility.util_logging import NifLog
+from io_scene_nif.utility.util_session import get_session
 
 
 class NifCommon:
@@ -54,7 +61,8 @@ class NifCommon:
     def __init__(self, operator, context):
         """Common initialization functions for executing the import/export operators: """
 
-        NifOp.init(operator, context)
+        # the helpers reach the session of this operation through the NifOp, NifData and block_store accessors
+        self.session = NifOp.init(operator, context)
 
         # print scripts info
         from . import bl_info
@@ -64,3 +72,33 @@ class NifCommon:
                                                                                                                 bpy.app.version_string,
                                                                                                                 pyffi.__version__))
 
+    @staticmethod
+    def end_session():
+        """Release the state of the finished operation, so neither the pyffi tree nor references into Blender
+        stay alive until the next one. The texture and convex decomposition caches are meant to be reused, and kept.
+        """
+        NifData.init(None)
+        KFData.init(None)
+        EGMData.init(None)
+        block_store.block_to_obj = {}
+        collision.DICT_HAVOK_OBJECTS.clear()
+        material.DICT_MATERIALS.clear()
+        # pending reads still finish, only the idle threads go away
+        file_cache_warmer.shutdown(wait=False)
+        NifLog.info(NifCommon.get_memory_report())
+        NifLog.flush()
+        # Blender frees the operator once it returns, later messages must not be reported to it
+        get_session().deactivate()
+
+    @staticmethod
+    def get_memory_report():
+        """Summarize what stays in memory between operations."""
+        retained = ((len(texture.DICT_TEXTURES), "textures"),
+                    (len(texture.DICT_EMBEDDED_IMAGES), "embedded images"),
+                    (len(texture_path_index), "indexed texture directories"),
+                    (len(DICT_CONVEX_DECOMPOSITIONS), "convex decompositions"),
+                    (len(block_store.block_to_obj), "blocks"),
+                    (len(collision.DICT_HAVOK_OBJECTS), "havok objects"),
+                    (len(material.DICT_MATERIALS), "materials"))
+        report = ", ".join("{0} {1}".format(count, name) for count, name in retained if count) or "nothing"
+        return "Retained {0}".format(report)
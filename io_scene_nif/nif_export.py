@@ -52,10 +52,11 @@ from io_scene_nif.modules.constraint.constraint_export import Constraint
 from io_scene_nif.modules.object.block_registry import block_store
 from io_scene_nif.modules.object.object_export import Object
 from io_scene_nif.modules.property.property_export import Property
+from io_scene_nif.modules.property.texture.dds_converter import dds_converter
 from io_scene_nif.modules.scene import scene_export
 from io_scene_nif.nif_common import NifCommon
 from io_scene_nif.utility import nif_utils
-from io_scene_nif.utility.util_global import NifOp, EGMData
+from io_scene_nif.utility.util_global import NifOp, NifData, EGMData
 from io_scene_nif.utility.util_logging import NifLog
 
 
@@ -171,6 +172,7 @@ class NifExport(NifCommon):
 
             # find nif version to write
             self.version, data = scene_export.get_version_data()
+            NifData.init(data)
 
             # write external animation to a KF tree
             if NifOp.props.animation in ('ANIM_KF', 'ALL_NIF_XNIF_XKF'):
@@ -280,7 +282,7 @@ class NifExport(NifCommon):
 
             elif NifOp.props.game in ('EMPIRE_EARTH_II',):
                 self.propertyhelper.object_property.export_vertex_color_property(root_block)
-                self.propertyhelper.object_property.export_z_buffer_property(root_block, flags=15, function=1)
+                self.propertyhelper.object_property.export_z_buffer_property(root_block, flags=15, func=1)
 
             # FIXME:
             """
@@ -308,6 +310,9 @@ class NifExport(NifCommon):
                         skelroot.children[i] = child
             """
 
+            # update rigid body mass, center of gravity and inertia (before scaling, the rigid bodies scale it along)
+            self.objecthelper.update_rigid_bodies()
+
             # apply scale
             if abs(NifOp.props.scale_correction_export) > NifOp.props.epsilon:
                 NifLog.info("Applying scale correction {0}".format(str(NifOp.props.scale_correction_export)))
@@ -368,8 +373,13 @@ class NifExport(NifCommon):
                 with open(egmfile, "wb") as stream:
                     EGMData.data.write(stream)
         finally:
+            dds_converter.finish()
+            self.animationhelper.transform.report_key_reduction()
+            if block_store.num_interned:
+                NifLog.info("Shared {0} identical data blocks".format(block_store.num_interned))
             # clear progress bar
             NifLog.info("Finished")
+            self.end_session()
 
         # save exported file (this is used by the test suite)
         self.root_blocks = [root_block]
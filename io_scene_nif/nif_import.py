@@ -55,6 +55,8 @@ from io_scene_nif.modules.geometry.vertex.skin_import import VertexGroup
 from io_scene_nif.modules.object.block_registry import block_store
 from io_scene_nif.modules.object.object_import import Object
 from io_scene_nif.modules.object.object_types.type_import import NiTypes
+from io_scene_nif.modules.property import material
+from io_scene_nif.modules.property.texture.loader.texture_loader import TextureLoader
 from io_scene_nif.modules.scene import scene_import
 
 from io_scene_nif.nif_common import NifCommon
@@ -71,6 +73,8 @@ class NifImport(NifCommon):
     def execute(self):
         """Main import function."""
         self.load_files()
+        # materials are only reused within one import
+        material.DICT_MATERIALS.clear()
 
         # find and store this list now of selected objects as creating new objects adds them to the selection list
         self.SELECTED_OBJECTS = bpy.context.selected_objects[:]
@@ -133,11 +137,13 @@ class NifImport(NifCommon):
                                 root.remove_child(child)
 
                 # import this root block
-                NifLog.debug("Root block: {0}".format(root.get_global_display()))
+                NifLog.debug(lambda: "Root block: {0}".format(root.get_global_display()))
                 self.import_root(root)
         finally:
+            TextureLoader.save_texture_index()
             # clear progress bar
             NifLog.info("Finished")
+            self.end_session()
 
         return {'FINISHED'}
 
@@ -216,7 +222,7 @@ class NifImport(NifCommon):
 
         # start with no grouping
         geom_group = []
-        NifLog.info("Importing data for block '{0}'".format(n_block.name.decode()))
+        NifLog.debug("Importing data for block '%s'", n_block.name.decode())
         if isinstance(n_block, NifFormat.NiTriBasedGeom) and NifOp.props.skeleton != "SKELETON_ONLY":
             return self.objecthelper.import_geometry_object(b_armature, n_block)
 
@@ -243,7 +249,7 @@ class NifImport(NifCommon):
 
             else:
                 # this may be a grouping node
-                geom_group = Object.is_grouping_node(n_block)
+                geom_group = self.armaturehelper.is_grouping_node(n_block)
 
                 # if importing animation, remove children that have morph controllers from geometry group
                 if NifOp.props.animation:
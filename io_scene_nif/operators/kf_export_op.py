@@ -82,12 +82,53 @@ class KfExportOperator(Operator, ExportHelper, NifOperatorCommon):
         description="For which game to export.",
         default='OBLIVION')
 
+    #: Export the actions whose names match this pattern.
+    action_filter = bpy.props.StringProperty(
+        name="Actions",
+        description="Export every action of the armature's bones whose name matches this pattern (* and ? are wildcards) to a kf file named after it. Leave empty to export only the active action.",
+        default="*")
+
+    #: Only animation is exported to kf files.
+    animation = bpy.props.StringProperty(
+        default='ANIM_KF', options={'HIDDEN'})
+
     #: Use BSAnimationNode (for Morrowind).
     bs_animation_node = bpy.props.BoolProperty(
         name="Use NiBSAnimationNode",
         description="Use NiBSAnimationNode (for Morrowind).",
         default=False)
 
+    #: Drop animation keys that can be reproduced by interpolation.
+    reduce_keys = bpy.props.BoolProperty(
+        name="Reduce Keys",
+        description="Drop animation keys that are reproduced by interpolating their neighbours within the tolerances, and store constant channels without keys.",
+        default=False)
+
+    #: Tolerated rotation error of key reduction.
+    key_tolerance_rotation = bpy.props.FloatProperty(
+        name="Rotation Tolerance",
+        description="Tolerated rotation error when reducing keys.",
+        subtype='ANGLE',
+        default=0.001745, min=0.0, max=0.1745, precision=4)
+
+    #: Tolerated translation error of key reduction.
+    key_tolerance_translation = bpy.props.FloatProperty(
+        name="Translation Tolerance",
+        description="Tolerated translation error when reducing keys, in blender units.",
+        default=0.0001, min=0.0, max=1.0, precision=4)
+
+    #: Tolerated relative scale error of key reduction.
+    key_tolerance_scale = bpy.props.FloatProperty(
+        name="Scale Tolerance",
+        description="Tolerated scale error when reducing keys, relative to the scale.",
+        default=0.0001, min=0.0, max=0.1, precision=4)
+
+    #: Export transform animation as compressed b-splines.
+    bspline_compression = bpy.props.BoolProperty(
+        name="B-Spline Compression",
+        description="Fit transform animation to compressed b-splines within the key tolerances (NiBSplineCompTransformInterpolator).",
+        default=False)
+
     #: Map game enum to nif version.
     version = {
         _game_to_enum(game): versions[-1]
@@ -96,8 +137,8 @@ class KfExportOperator(Operator, ExportHelper, NifOperatorCommon):
 
     def execute(self, context):
         """Execute the export operators: first constructs a
-        :class:`~io_scene_nif.nif_export.NifExport` instance and then
-        calls its :meth:`~io_scene_nif.nif_export.NifExport.execute`
+        :class:`~io_scene_nif.kf_export.KfExport` instance and then
+        calls its :meth:`~io_scene_nif.kf_export.KfExport.execute`
         method.
         """
         return kf_export.KfExport(self, context).execute()
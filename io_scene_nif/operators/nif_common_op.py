@@ -64,7 +64,7 @@ class NifOperatorCommon:
         ),
         name="Log Level",
         description="Level of verbosity on the console.",
-        default="DEBUG")  # TODO [general] Dev config, revert for release
+        default="INFO")
 
     # Name of file where Python profiler dumps the profile.
     profile_path = bpy.props.StringProperty(
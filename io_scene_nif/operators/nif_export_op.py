@@ -158,12 +158,75 @@ class NifExportOperator(Operator, ExportHelper, NifOperatorCommon):
         description="Force texture .dds extension.",
         default=True)
 
+    # Convert non-dds texture images to block compressed dds with mipmaps.
+    convert_dds = bpy.props.BoolProperty(
+        name="Convert To DDS",
+        description="Convert texture images to .dds files with mipmaps, next to the original images.",
+        default=False)
+
+    # Pack the textures of materials that only differ in their images into an atlas.
+    atlas_textures = bpy.props.BoolProperty(
+        name="Texture Atlas",
+        description="Pack the diffuse and normal maps of otherwise identical materials into an atlas, "
+                    "exporting their polygons as a single shape.",
+        default=False)
+
     # Whether or not to remove duplicate materials
     optimise_materials = bpy.props.BoolProperty(
         name="Optimise Materials",
         description="",
         default=True)
 
+    # Generate collision from render meshes.
+    convex_decomposition = bpy.props.BoolProperty(
+        name="Convex Decomposition",
+        description="Generate a list of convex hulls from the render mesh of rigid body objects without collision bounds.",
+        default=False)
+
+    # Tolerated concavity of generated convex hulls.
+    concavity_tolerance = bpy.props.FloatProperty(
+        name="Concavity Tolerance",
+        description="Tolerated concavity of a generated convex hull, relative to the object size.",
+        default=0.05,
+        min=0.001, max=1.0, precision=3)
+
+    # Maximum number of generated convex hulls per object.
+    max_convex_hulls = bpy.props.IntProperty(
+        name="Max Convex Hulls",
+        description="Maximum number of generated convex hulls per object.",
+        default=16, min=1, max=255)
+
+    # Drop animation keys that can be reproduced by interpolation.
+    reduce_keys = bpy.props.BoolProperty(
+        name="Reduce Keys",
+        description="Drop animation keys that are reproduced by interpolating their neighbours within the tolerances, and store constant channels without keys.",
+        default=False)
+
+    # Tolerated rotation error of key reduction.
+    key_tolerance_rotation = bpy.props.FloatProperty(
+        name="Rotation Tolerance",
+        description="Tolerated rotation error when reducing keys.",
+        subtype='ANGLE',
+        default=0.001745, min=0.0, max=0.1745, precision=4)
+
+    # Tolerated translation error of key reduction.
+    key_tolerance_translation = bpy.props.FloatProperty(
+        name="Translation Tolerance",
+        description="Tolerated translation error when reducing keys, in blender units.",
+        default=0.0001, min=0.0, max=1.0, precision=4)
+
+    # Tolerated relative scale error of key reduction.
+    key_tolerance_scale = bpy.props.FloatProperty(
+        name="Scale Tolerance",
+        description="Tolerated scale error when reducing keys, relative to the scale.",
+        default=0.0001, min=0.0, max=0.1, precision=4)
+
+    # Export transform animation as compressed b-splines.
+    bspline_compression = bpy.props.BoolProperty(
+        name="B-Spline Compression",
+        description="Fit transform animation to compressed b-splines within the key tolerances (NiBSplineCompTransformInterpolator).",
+        default=False)
+
     # Map game enum to nif version.
     version = {
         _game_to_enum(game): versions[-1]
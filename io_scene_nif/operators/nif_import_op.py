@@ -139,6 +139,12 @@ class NifImportOperator(Operator, ImportHelper, NifOperatorCommon, OrientationHe
         description="Merge vertices that have identical location and normal values.",
         default=False)
 
+    # Register textures by path and decode them on first use, warming the file system cache in the background.
+    deferred_textures = bpy.props.BoolProperty(
+        name="Deferred Texture Loading",
+        description="Register textures without decoding them, Blender decodes them on first use. Their files are read into the file system cache in the background.",
+        default=False)
+
     def execute(self, context):
         """Execute the import operators: first constructs a
         :class:`~io_scene_nif.nif_import.NifImport` instance and then
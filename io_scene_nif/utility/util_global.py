@@ -38,60 +38,61 @@
 # ***** END LICENSE BLOCK *****
 
 from io_scene_nif.utility.util_logging import NifLog
+from io_scene_nif.utility.util_session import NifSession, SessionAttribute, get_session
 
 
 class NifOp:
-    """A simple reference holder class but enables classes to be decoupled. 
-    This module require initialisation to function."""
+    """A simple reference holder class but enables classes to be decoupled.
+    Forwards to the session of the current thread, see NifSession."""
 
     def __init__(self):
         pass
 
-    op = None
-    props = None
-    context = None
+    op = SessionAttribute("op")
+    props = SessionAttribute("props")
+    context = SessionAttribute("context")
 
     @staticmethod
     def init(operator, context):
-        NifOp.op = operator
-        NifOp.props = operator.properties
-        NifOp.context = context
+        """Start a new session for the operator on the current thread."""
+        session = NifSession(operator, context).activate()
 
         # init loggers logging level
         NifLog.init(operator)
+        return session
 
 
 class NifData:
 
-    data = None
+    data = SessionAttribute("data")
 
     def __init__(self):
         pass
 
     @staticmethod
     def init(data):
-        NifData.data = data
+        get_session().data = data
 
 
 class KFData:
 
-    data = None
+    data = SessionAttribute("kf_data")
 
     def __init__(self):
         pass
 
     @staticmethod
     def init(data):
-        KFData.data = data
+        get_session().kf_data = data
 
 
 class EGMData:
 
-    data = None
+    data = SessionAttribute("egm_data")
 
     def __init__(self):
         pass
 
     @staticmethod
     def init(data):
-        EGMData.data = data
+        get_session().egm_data = data
@@ -39,6 +39,8 @@
 
 import logging
 
+from io_scene_nif.utility.util_session import get_session
+
 
 class _MockOperator:
     def report(self, level, message):
@@ -46,28 +48,86 @@ class _MockOperator:
 
 
 class NifLog:
-    """A simple custom exception class for export errors. This module require initialisation of an operator reference to function."""  
-    
-    # Injectable operator reference used to perform reporting, default to simple logging
+    """A simple custom exception class for export errors. This module require initialisation of an operator reference to function.
+
+    Messages below the log level of the session are dropped before they are formatted, so pass format arguments
+    rather than formatting in advance, as in ``NifLog.debug("Importing %s", n_block.name)``, or pass a callable
+    returning the message. Debug and info messages are kept in the session's buffer and reported to the operator
+    when the operation ends or before a warning or error.
+    """
+
+    # Injectable operator reference used to perform reporting outside of sessions, default to simple logging
     op = _MockOperator()
 
+    REPORT_TYPES = {
+        logging.DEBUG: 'DEBUG',
+        logging.INFO: 'INFO',
+        logging.WARNING: 'WARNING',
+        logging.ERROR: 'ERROR',
+    }
+
     @staticmethod
-    def debug(message):
+    def get_operator():
+        """The operator of the session of the current thread, or the default operator outside of sessions."""
+        operator = get_session().op
+        return operator if operator is not None else NifLog.op
+
+    @staticmethod
+    def is_enabled(level):
+        """Whether messages of the given level are reported in the current session."""
+        return level >= get_session().log_level
+
+    @staticmethod
+    def log(level, message, args):
+        session = get_session()
+        if level < session.log_level:
+            return
+        if callable(message):
+            message = message()
+        elif args:
+            message = message % args
+        if session.log_buffer is None:
+            NifLog.get_operator().report({NifLog.REPORT_TYPES[level]}, message)
+        elif level < logging.WARNING:
+            if len(session.log_buffer) == session.log_buffer.maxlen:
+                session.log_dropped += 1
+            session.log_buffer.append((level, message))
+        else:
+            # keep the order of the messages
+            NifLog.flush()
+            NifLog.get_operator().report({NifLog.REPORT_TYPES[level]}, message)
+
+    @staticmethod
+    def flush():
+        """Report the buffered messages of the current session to its operator."""
+        session = get_session()
+        if not session.log_buffer:
+            return
+        operator = NifLog.get_operator()
+        if session.log_dropped:
+            operator.report({'INFO'}, "{0} earlier messages were dropped".format(session.log_dropped))
+            session.log_dropped = 0
+        for level, message in session.log_buffer:
+            operator.report({NifLog.REPORT_TYPES[level]}, message)
+        session.log_buffer.clear()
+
+    @staticmethod
+    def debug(message, *args):
         """Report a debug message."""
-        NifLog.op.report({'DEBUG'}, message)
+        NifLog.log(logging.DEBUG, message, args)
 
     @staticmethod
-    def info(message):
+    def info(message, *args):
         """Report an informative message."""
-        NifLog.op.report({'INFO'}, message)
+        NifLog.log(logging.INFO, message, args)
 
     @staticmethod
-    def warn(message):
+    def warn(message, *args):
         """Report a warning message."""
-        NifLog.op.report({'WARNING'}, message)
+        NifLog.log(logging.WARNING, message, args)
 
     @staticmethod
-    def error(message):
+    def error(message, *args):
         """Report an error and return ``{'FINISHED'}``. To be called by
         the :meth:`execute` method, as::
 
@@ -79,12 +139,12 @@ class NifLog:
 
             The :ref:`error reporting <dev-design-error-reporting>` design.
         """
-        NifLog.op.report({'ERROR'}, message)
+        NifLog.log(logging.ERROR, message, args)
         return {'FINISHED'}
-    
+
     @staticmethod
     def init(operator):
-        NifLog.op = operator
         log_level_num = getattr(logging, operator.properties.log_level)
+        get_session().log_level = log_level_num
         logging.getLogger("niftools").setLevel(log_level_num)
         logging.getLogger("pyffi").setLevel(log_level_num)
@@ -0,0 +1,174 @@
+"""This script contains helper methods for vectorized rotation math on arrays of keys."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import numpy as np
+
+# quaternions are stored as (w, x, y, z), as in blender
+
+
+def quat_multiply(q1, q2):
+    """Hamilton product of two (arrays of) quaternions, broadcasting over leading dimensions."""
+    q1 = np.asarray(q1, dtype=np.float64)
+    q2 = np.asarray(q2, dtype=np.float64)
+    w1, x1, y1, z1 = np.moveaxis(q1, -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(q2, -1, 0)
+    return np.stack((w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+                     w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+                     w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+                     w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2), axis=-1)
+
+
+def quat_conjugate(quats):
+    """Conjugate, which is the inverse for unit quaternions."""
+    return np.asarray(quats, dtype=np.float64) * (1.0, -1.0, -1.0, -1.0)
+
+
+def quat_normalize(quats):
+    quats = np.asarray(quats, dtype=np.float64)
+    return quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+
+
+def quat_make_compatible(quats):
+    """Flip the sign of quaternions so each lies in the same hemisphere as its predecessor, for smooth interpolation."""
+    quats = np.array(quats, dtype=np.float64)
+    if len(quats) > 1:
+        flips = np.einsum('ni,ni->n', quats[1:], quats[:-1]) < 0
+        # every flip changes the sign of all following keys
+        signs = np.cumprod(np.where(flips, -1.0, 1.0))
+        quats[1:] *= signs[:, np.newaxis]
+    return quats
+
+
+def quat_to_matrix(quats):
+    """Convert (n, 4) unit quaternions to (n, 3, 3) rotation matrices."""
+    w, x, y, z = np.moveaxis(np.asarray(quats, dtype=np.float64), -1, 0)
+    return np.stack((np.stack((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)), axis=-1),
+                     np.stack((2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)), axis=-1),
+                     np.stack((2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)), axis=-1)), axis=-2)
+
+
+def matrix_to_quat(matrices):
+    """Convert (n, 3, 3) rotation matrices to (n, 4) unit quaternions."""
+    m = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+    quats = np.empty((len(m), 4))
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    # pick the numerically most stable formula per matrix
+    diag = np.stack((trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]), axis=-1)
+    case = np.argmax(diag, axis=-1)
+
+    i = case == 0
+    s = np.sqrt(trace[i] + 1.0) * 2
+    quats[i] = np.stack((0.25 * s, (m[i, 2, 1] - m[i, 1, 2]) / s, (m[i, 0, 2] - m[i, 2, 0]) / s, (m[i, 1, 0] - m[i, 0, 1]) / s), axis=-1)
+    i = case == 1
+    s = np.sqrt(1.0 + m[i, 0, 0] - m[i, 1, 1] - m[i, 2, 2]) * 2
+    quats[i] = np.stack(((m[i, 2, 1] - m[i, 1, 2]) / s, 0.25 * s, (m[i, 0, 1] + m[i, 1, 0]) / s, (m[i, 0, 2] + m[i, 2, 0]) / s), axis=-1)
+    i = case == 2
+    s = np.sqrt(1.0 + m[i, 1, 1] - m[i, 0, 0] - m[i, 2, 2]) * 2
+    quats[i] = np.stack(((m[i, 0, 2] - m[i, 2, 0]) / s, (m[i, 0, 1] + m[i, 1, 0]) / s, 0.25 * s, (m[i, 1, 2] + m[i, 2, 1]) / s), axis=-1)
+    i = case == 3
+    s = np.sqrt(1.0 + m[i, 2, 2] - m[i, 0, 0] - m[i, 1, 1]) * 2
+    quats[i] = np.stack(((m[i, 1, 0] - m[i, 0, 1]) / s, (m[i, 0, 2] + m[i, 2, 0]) / s, (m[i, 1, 2] + m[i, 2, 1]) / s, 0.25 * s), axis=-1)
+    # same convention as blender, positive w
+    quats[quats[:, 0] < 0] *= -1
+    return quats
+
+
+def euler_to_matrix(eulers):
+    """Convert (n, 3) XYZ euler angles to (n, 3, 3) rotation matrices, as mathutils.Euler.to_matrix()."""
+    cx, cy, cz = np.moveaxis(np.cos(eulers), -1, 0)
+    sx, sy, sz = np.moveaxis(np.sin(eulers), -1, 0)
+    # Rz * Ry * Rx
+    return np.stack((np.stack((cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz), axis=-1),
+                     np.stack((cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz), axis=-1),
+                     np.stack((-sy, sx * cy, cx * cy), axis=-1)), axis=-2)
+
+
+def _matrix_to_euler2(matrices):
+    """Both XYZ euler solutions of (n, 3, 3) rotation matrices."""
+    m = np.asarray(matrices, dtype=np.float64)
+    cy = np.hypot(m[..., 0, 0], m[..., 1, 0])
+    eul1 = np.stack((np.arctan2(m[..., 2, 1], m[..., 2, 2]),
+                     np.arctan2(-m[..., 2, 0], cy),
+                     np.arctan2(m[..., 1, 0], m[..., 0, 0])), axis=-1)
+    eul2 = np.stack((np.arctan2(-m[..., 2, 1], -m[..., 2, 2]),
+                     np.arctan2(-m[..., 2, 0], -cy),
+                     np.arctan2(-m[..., 1, 0], -m[..., 0, 0])), axis=-1)
+    # gimbal lock
+    locked = cy <= 16.0 * np.finfo(np.float32).eps
+    eul1[locked] = np.stack((np.arctan2(-m[locked, 1, 2], m[locked, 1, 1]),
+                             np.arctan2(-m[locked, 2, 0], cy[locked]),
+                             np.zeros(np.count_nonzero(locked))), axis=-1)
+    eul2[locked] = eul1[locked]
+    return eul1, eul2
+
+
+def matrix_to_euler(matrices):
+    """Convert (n, 3, 3) rotation matrices to (n, 3) XYZ euler angles, as mathutils.Matrix.to_euler()."""
+    eul1, eul2 = _matrix_to_euler2(matrices)
+    # pick the solution with the smallest angles
+    use_second = np.abs(eul1).sum(axis=-1) > np.abs(eul2).sum(axis=-1)
+    return np.where(use_second[..., np.newaxis], eul2, eul1)
+
+
+def euler_make_compatible(eulers, old_eulers):
+    """Shift (n, 3) euler angles by whole turns to lie close to old_eulers, as mathutils.Euler.make_compatible()."""
+    eulers = np.array(eulers, dtype=np.float64)
+    old_eulers = np.broadcast_to(np.asarray(old_eulers, dtype=np.float64), eulers.shape)
+    # correct differences of about 360 degrees first
+    delta = eulers - old_eulers
+    far = np.abs(delta) > 5.1
+    eulers[far] -= np.sign(delta[far]) * np.floor(np.abs(delta[far]) / (2 * np.pi) + 0.5) * 2 * np.pi
+    delta = eulers - old_eulers
+    # one axis off by more than 180 degrees while the others are small, evaluated on the same deltas like blender
+    large = np.abs(delta) > 3.2
+    small = np.abs(delta) < 1.6
+    for i in range(3):
+        j, k = (i + 1) % 3, (i + 2) % 3
+        flip = large[..., i] & small[..., j] & small[..., k]
+        eulers[flip, i] -= np.sign(delta[flip, i]) * 2 * np.pi
+    return eulers
+
+
+def matrix_to_compatible_euler(matrices, old_eulers):
+    """Convert (n, 3, 3) rotation matrices to the XYZ euler angles closest to old_eulers, as mathutils.Matrix.to_euler('XYZ', old)."""
+    eul1, eul2 = _matrix_to_euler2(matrices)
+    eul1 = euler_make_compatible(eul1, old_eulers)
+    eul2 = euler_make_compatible(eul2, old_eulers)
+    use_second = np.abs(eul1 - old_eulers).sum(axis=-1) > np.abs(eul2 - old_eulers).sum(axis=-1)
+    return np.where(use_second[..., np.newaxis], eul2, eul1)
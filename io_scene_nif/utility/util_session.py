@@ -0,0 +1,131 @@
+"""Per operation state, reached by the helpers through the session of the current thread."""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from collections import deque
+from collections.abc import MutableMapping
+import logging
+import threading
+
+# number of debug and info messages kept until they are reported, older ones are dropped
+LOG_BUFFER_SIZE = 1000
+
+
+class NifSession:
+    """Everything one import or export works on: the operator and its properties, the loaded data,
+    the block registry, the caches, and the operator the logger reports to.
+
+    A session becomes current for the thread that activates it. The NifOp, NifData, KFData and EGMData accessors,
+    block_store and the per session cache dictionaries all forward to the current session, so helpers need not
+    be passed the session, and separate threads can each run their own.
+    """
+
+    def __init__(self, operator=None, context=None):
+        self.op = operator
+        self.props = operator.properties if operator is not None else None
+        self.context = context
+        self.data = None
+        self.kf_data = None
+        self.egm_data = None
+        # created on first use, see block_registry.SessionBlockRegistry
+        self.block_store = None
+        self.materials = {}
+        self.havok_objects = {}
+        # see NifLog, messages are reported right away when there is no operator
+        self.log_level = logging.DEBUG
+        self.log_buffer = deque(maxlen=LOG_BUFFER_SIZE) if operator is not None else None
+        self.log_dropped = 0
+
+    def activate(self):
+        """Make this the session of the current thread."""
+        _local.session = self
+        return self
+
+    def deactivate(self):
+        """Return the current thread to the default session, so nothing refers to the finished operator anymore."""
+        if get_session() is self:
+            _local.session = _default_session
+
+
+_local = threading.local()
+
+# used outside of import and export, for instance by the unit tests
+_default_session = NifSession()
+
+
+def get_session():
+    """The session of the current thread."""
+    return getattr(_local, "session", _default_session)
+
+
+class SessionAttribute:
+    """Class attribute forwarding to an attribute of the current session."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        return getattr(get_session(), self.name)
+
+
+class SessionDict(MutableMapping):
+    """Module level dictionary forwarding to a dictionary of the current session."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def get_dict(self):
+        return getattr(get_session(), self.name)
+
+    def __getitem__(self, key):
+        return self.get_dict()[key]
+
+    def __setitem__(self, key, value):
+        self.get_dict()[key] = value
+
+    def __delitem__(self, key):
+        del self.get_dict()[key]
+
+    def __iter__(self):
+        return iter(self.get_dict())
+
+    def __len__(self):
+        return len(self.get_dict())
+
+    def clear(self):
+        self.get_dict().clear()
@@ -0,0 +1,172 @@
+"""Module for unit testing the B-spline decoder"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import numpy as np
+from nose.tools import assert_equal, assert_true
+
+from pyffi.formats.nif import NifFormat
+
+from io_scene_nif.modules.animation import bspline, key_reduction
+from io_scene_nif.utility import util_math
+
+
+def cox_de_boor(knots, i, p, u):
+    """Reference basis function, evaluated one value at a time."""
+    if p == 0:
+        return 1.0 if knots[i] <= u < knots[i + 1] else 0.0
+    value = 0.0
+    if knots[i + p] > knots[i]:
+        value += (u - knots[i]) / (knots[i + p] - knots[i]) * cox_de_boor(knots, i, p - 1, u)
+    if knots[i + p + 1] > knots[i + 1]:
+        value += (knots[i + p + 1] - u) / (knots[i + p + 1] - knots[i + 1]) * cox_de_boor(knots, i + 1, p - 1, u)
+    return value
+
+
+class TestBSpline:
+
+    def test_basis(self):
+        num_control_points = 9
+        params = np.linspace(0, 1, 41)
+        basis = bspline.get_basis(num_control_points, params)
+        assert_equal(basis.shape, (41, num_control_points))
+        assert_true(np.allclose(basis.sum(axis=1), 1.0))
+        knots = bspline.get_knots(num_control_points)
+        # the end point is excluded by the half open spans of the reference
+        for u, row in zip(params[:-1] * knots[-1], basis[:-1]):
+            expected = [cox_de_boor(knots, i, bspline.DEGREE, u) for i in range(num_control_points)]
+            assert_true(np.allclose(row, expected))
+        # clamped ends hit the first and last control points
+        assert_true(np.allclose(basis[0], np.eye(num_control_points)[0]))
+        assert_true(np.allclose(basis[-1], np.eye(num_control_points)[-1]))
+
+    def test_bezier(self):
+        # with degree + 1 control points, the B-spline is a cubic bezier curve
+        t = np.linspace(0, 1, 11)
+        bernstein = np.stack(((1 - t) ** 3, 3 * t * (1 - t) ** 2, 3 * t ** 2 * (1 - t), t ** 3), axis=-1)
+        assert_true(np.allclose(bspline.get_basis(4, t), bernstein))
+
+    def test_compressed_transform(self):
+        n_interp = NifFormat.NiBSplineCompTransformInterpolator()
+        n_interp.start_time = 0.0
+        n_interp.stop_time = 2.0
+        n_interp.basis_data = NifFormat.NiBSplineBasisData()
+        n_interp.basis_data.num_control_points = 6
+        n_interp.spline_data = NifFormat.NiBSplineData()
+        translations = [(i, 2 * i, -i) for i in range(6)]
+        rotations = [(1, 0, 0, 0)] * 6
+        n_interp.translation_offset, n_interp.translation_bias, n_interp.translation_multiplier = n_interp.spline_data.append_comp_data(translations)
+        n_interp.rotation_offset, n_interp.rotation_bias, n_interp.rotation_multiplier = n_interp.spline_data.append_comp_data(rotations)
+        n_interp.scale_offset = bspline.NO_DATA
+
+        times = bspline.get_times(n_interp, 30)
+        assert_equal(len(times), 61)
+        trans = bspline.get_translations(n_interp, times)
+        assert_equal(trans.shape, (61, 3))
+        # dequantized control points, as decoded by pyffi
+        points = np.array(list(n_interp.get_translations()))
+        assert_true(np.allclose(trans[0], points[0]))
+        assert_true(np.allclose(trans[-1], points[-1]))
+        assert_true(np.allclose(trans, bspline.get_basis(6, times / 2.0) @ points))
+        rots = bspline.get_rotations(n_interp, times)
+        assert_true(np.allclose(np.linalg.norm(rots, axis=-1), 1.0))
+        assert_equal(len(bspline.get_scales(n_interp, times)), 0)
+
+    def test_compressed_float(self):
+        n_interp = NifFormat.NiBSplineCompFloatInterpolator()
+        n_interp.start_time = 0.0
+        n_interp.stop_time = 1.0
+        n_interp.basis_data = NifFormat.NiBSplineBasisData()
+        n_interp.basis_data.num_control_points = 5
+        n_interp.spline_data = NifFormat.NiBSplineData()
+        # constant control points give a constant curve
+        n_interp.offset, n_interp.bias, n_interp.multiplier = n_interp.spline_data.append_comp_data([(0.5,)] * 5)
+        floats = bspline.get_floats(n_interp, bspline.get_times(n_interp, 30))
+        assert_equal(len(floats), 31)
+        assert_true(np.allclose(floats, 0.5))
+
+    def test_fit_comp_transform(self):
+        n_interp = NifFormat.NiBSplineCompTransformInterpolator()
+        n_interp.start_time = 0.0
+        n_interp.stop_time = 3.0
+        n_interp.basis_data = NifFormat.NiBSplineBasisData()
+        n_interp.spline_data = NifFormat.NiBSplineData()
+        times = np.linspace(0, 3, 91)
+        translations = np.stack((np.sin(times), np.cos(2 * times), times ** 2), axis=-1) * 10
+        half_angles = 0.5 * np.sin(times)
+        rotations = util_math.quat_normalize(np.stack((np.cos(half_angles), np.sin(half_angles), 0.3 * np.sin(half_angles), np.zeros(91)), axis=-1))
+        scales = np.ones(91)
+        tolerances = (0.01, 0.002, 0.0001)
+        assert_true(bspline.set_comp_transform(
+            n_interp, times, translations, rotations, scales, tolerances,
+            (key_reduction.distance_error, key_reduction.angle_error, key_reduction.relative_error)))
+        # fewer control points than samples
+        num_control_points = n_interp.basis_data.num_control_points
+        assert_true(4 <= num_control_points < 91)
+        # the constant scale is not stored as a curve
+        assert_equal(n_interp.scale_offset, bspline.NO_DATA)
+        assert_equal(n_interp.scale, 1.0)
+        assert_equal(len(bspline.get_scales(n_interp, times)), 0)
+        # decoding stays within the error bounds
+        decoded = bspline.get_translations(n_interp, times)
+        assert_true(np.all(key_reduction.distance_error(decoded, translations) <= tolerances[0]))
+        decoded = bspline.get_rotations(n_interp, times)
+        assert_true(np.all(key_reduction.angle_error(decoded, rotations) <= tolerances[1]))
+        # pyffi reads back all control points of the channel
+        assert_equal(len(list(n_interp.get_translations())), num_control_points)
+
+    def test_fit_translation_only(self):
+        # a bone with only location keys, sampled at every frame of the action
+        fps = 30
+        frames = np.arange(1, 61)
+        n_interp = NifFormat.NiBSplineCompTransformInterpolator()
+        n_interp.start_time = frames[0] / fps
+        n_interp.stop_time = frames[-1] / fps
+        n_interp.basis_data = NifFormat.NiBSplineBasisData()
+        n_interp.spline_data = NifFormat.NiBSplineData()
+        times = frames / fps
+        translations = np.stack((np.sin(times), times, np.zeros(len(times))), axis=-1)
+        tolerance = 0.01
+        assert_true(bspline.set_comp_transform(
+            n_interp, times, translations, np.empty((0, 4)), np.empty(0), (tolerance, 0.002, 0.0001),
+            (key_reduction.distance_error, key_reduction.angle_error, key_reduction.relative_error)))
+        assert_equal(n_interp.rotation_offset, bspline.NO_DATA)
+        assert_equal(n_interp.scale_offset, bspline.NO_DATA)
+        assert_true(n_interp.translation_offset != bspline.NO_DATA)
+        decoded = bspline.get_translations(n_interp, times)
+        assert_true(np.all(key_reduction.distance_error(decoded, translations) <= tolerance))
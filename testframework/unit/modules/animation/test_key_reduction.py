@@ -0,0 +1,77 @@
+"""Module for unit testing the animation key reduction"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import numpy as np
+from nose.tools import assert_equal, assert_true
+
+from io_scene_nif.modules.animation import key_reduction
+from io_scene_nif.utility import util_math
+
+
+class TestKeyReduction:
+
+    def test_constant(self):
+        times = np.linspace(0, 1, 10)
+        assert_equal(list(key_reduction.reduce_translation_keys(times, np.ones((10, 3)), 0.0)), [0])
+        assert_equal(list(key_reduction.reduce_scale_keys(times, np.full(10, 1.00001), 0.0001)), [0])
+
+    def test_collinear(self):
+        times = np.linspace(0, 1, 30)
+        translations = np.outer(times, (1.0, 2.0, -3.0))
+        assert_equal(list(key_reduction.reduce_translation_keys(times, translations, 1e-6)), [0, 29])
+
+    def test_error_bound(self):
+        times = np.linspace(0, 2, 61)
+        angles = np.sin(times * 3)
+        tolerance = 0.01
+        kept = key_reduction.reduce_euler_keys(times, angles, tolerance)
+        assert_true(2 < len(kept) < 61)
+        # interpolating between the kept keys stays within tolerance
+        assert_true(np.all(np.abs(np.interp(times, times[kept], angles[kept]) - angles) <= tolerance))
+
+    def test_rotations(self):
+        times = np.linspace(0, 1, 21)
+        # constant angular velocity about z is reproduced by slerp between the end keys
+        half_angles = times * 1.5
+        quats = np.stack((np.cos(half_angles), np.zeros(21), np.zeros(21), np.sin(half_angles)), axis=-1)
+        assert_equal(list(key_reduction.reduce_rotation_keys(times, quats, 1e-6)), [0, 20])
+        # a change of axis halfway needs the middle key
+        quats[10:] = util_math.quat_multiply(quats[10:], (np.cos(0.2), np.sin(0.2), 0, 0))
+        kept = key_reduction.reduce_rotation_keys(times, quats, 1e-3)
+        assert_true(10 in kept)
@@ -0,0 +1,124 @@
+"""Unit testing the marking of armatures and bones on import"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from nose.tools import assert_equal, assert_false, assert_true
+from pyffi.formats.nif import NifFormat
+
+from io_scene_nif.modules.armature.armature_import import Armature
+from io_scene_nif.utility.util_session import NifSession, get_session
+
+
+class _Properties:
+    skeleton = "EVERYTHING"
+    combine_shapes = True
+    filepath = "test.nif"
+
+
+class _Data:
+    version = 0x14000005
+
+
+def create_node(name, *children):
+    n_node = NifFormat.NiNode()
+    n_node.name = name
+    for n_child in children:
+        n_node.add_child(n_child)
+    return n_node
+
+
+def create_skinned_shape(name, n_bone):
+    n_shape = NifFormat.NiTriShape()
+    n_shape.name = name
+    n_shape.skin_instance = NifFormat.NiSkinInstance()
+    n_shape.skin_instance.data = NifFormat.NiSkinData()
+    n_shape.skin_instance.num_bones = 1
+    n_shape.skin_instance.bones.update_size()
+    n_shape.skin_instance.bones[0] = n_bone
+    return n_shape
+
+
+def set_parents(n_block, n_parent=None):
+    n_block._parent = n_parent
+    for n_child in getattr(n_block, "children", ()):
+        set_parents(n_child, n_block)
+
+
+class TestMarkArmaturesBones:
+
+    @classmethod
+    def setup_class(cls):
+        cls.previous = get_session()
+        session = NifSession().activate()
+        session.props = _Properties()
+        session.data = _Data()
+
+        cls.n_bones = [create_node("Bip01 Spine{0}".format(i)) for i in range(3)]
+        for n_bone, n_child in zip(cls.n_bones, cls.n_bones[1:]):
+            n_bone.add_child(n_child)
+        cls.n_grouping_node = create_node("Group", NifFormat.NiTriShape())
+        cls.n_grouping_node.children[0].name = "Group:0"
+        n_shapes = [create_skinned_shape("Body{0}".format(i), cls.n_bones[2]) for i in range(2)]
+        cls.n_scene = create_node("Scene", cls.n_bones[0], cls.n_grouping_node, *n_shapes)
+        # both skins share the scene as skeleton root
+        for n_shape in n_shapes:
+            n_shape.skin_instance.skeleton_root = cls.n_scene
+        set_parents(cls.n_scene)
+
+        cls.armature = Armature()
+        cls.armature.mark_armatures_bones(cls.n_scene)
+
+    @classmethod
+    def teardown_class(cls):
+        cls.previous.activate()
+
+    def test_armature_root(self):
+        assert_true(self.armature.is_armature_root(self.n_scene))
+        assert_false(self.armature.is_bone(self.n_scene))
+
+    def test_bones(self):
+        for n_bone in self.n_bones:
+            assert_true(self.armature.is_bone(n_bone))
+        assert_equal(self.armature.dict_armatures[self.n_scene], set(self.n_bones))
+
+    def test_grouping_node(self):
+        assert_false(self.armature.is_bone(self.n_grouping_node))
+        assert_equal(self.armature.is_grouping_node(self.n_grouping_node), [self.n_grouping_node.children[0]])
+        # callers may change the returned list
+        self.armature.is_grouping_node(self.n_grouping_node).clear()
+        assert_equal(len(self.armature.is_grouping_node(self.n_grouping_node)), 1)
@@ -0,0 +1,143 @@
+"""Unit testing the convex decomposition of collision meshes"""
+
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import nose
+
+import numpy as np
+import pyffi.utils.quickhull
+
+from io_scene_nif.modules.collision import convex_decomposition
+
+# unit cube, triangles facing outwards
+CUBE_VERTICES = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0),
+                 (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)]
+CUBE_TRIANGLES = [(0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7),
+                  (0, 1, 5), (0, 5, 4), (2, 3, 7), (2, 7, 6),
+                  (1, 2, 6), (1, 6, 5), (0, 4, 7), (0, 7, 3)]
+
+
+def get_l_shape():
+    """An L shaped prism as polygon loops, the two convex halves of each cap as quads."""
+    outline = [(0, 0), (2, 0), (2, 1), (1, 1), (1, 2), (0, 2)]
+    n = len(outline)
+    vertices = [(x, y, 0.0) for x, y in outline] + [(x, y, 1.0) for x, y in outline]
+    polygons = [[i, (i + 1) % n, n + (i + 1) % n, n + i] for i in range(n)]
+    for quad in ([0, 3, 2, 1], [0, 5, 4, 3]):
+        polygons.append(quad)
+        polygons.append([n + i for i in reversed(quad)])
+    loop_totals = [len(polygon) for polygon in polygons]
+    loop_starts = np.cumsum([0] + loop_totals[:-1])
+    loop_vertices = [vertex for polygon in polygons for vertex in polygon]
+    return vertices, convex_decomposition.triangulate_polygons(loop_starts, loop_totals, loop_vertices)
+
+
+def get_sphere():
+    """A sphere of 114 vertices, triangulated by its hull."""
+    polar, azimuth = np.meshgrid(np.linspace(0, np.pi, 9)[1:-1], np.linspace(0, 2 * np.pi, 16, endpoint=False), indexing='ij')
+    points = np.column_stack((np.sin(polar) * np.cos(azimuth), np.sin(polar) * np.sin(azimuth), np.cos(polar))).reshape(-1, 3)
+    points = [tuple(point) for point in points] + [(0, 0, 1), (0, 0, -1)]
+    return pyffi.utils.quickhull.qhull3d(points)
+
+
+def assert_covered(vertices, hulls):
+    """Check that every vertex lies inside at least one of the hulls."""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    inside = np.zeros(len(vertices), dtype=bool)
+    for hull in hulls:
+        inside |= np.all(vertices.dot(hull.normals.T) + hull.distances <= 1e-6, axis=1)
+    nose.tools.assert_true(inside.all())
+
+
+class TestDecompose:
+
+    def setup(self):
+        convex_decomposition.DICT_CONVEX_DECOMPOSITIONS.clear()
+
+    def test_triangulate(self):
+        # a quad and a pentagon, fan triangulated
+        triangles = convex_decomposition.triangulate_polygons([0, 4], [4, 5], [0, 1, 2, 3, 4, 5, 6, 7, 8])
+        nose.tools.assert_equal(triangles.tolist(), [[0, 1, 2], [0, 2, 3], [4, 5, 6], [4, 6, 7], [4, 7, 8]])
+
+    def test_convex(self):
+        for vertices, triangles in ((CUBE_VERTICES, CUBE_TRIANGLES), get_sphere()):
+            hulls = convex_decomposition.decompose(vertices, triangles)
+            nose.tools.assert_equal(len(hulls), 1)
+            assert_covered(vertices, hulls)
+
+    def test_concave(self):
+        vertices, triangles = get_l_shape()
+        hulls = convex_decomposition.decompose(vertices, triangles)
+        nose.tools.assert_greater_equal(len(hulls), 2)
+        assert_covered(vertices, hulls)
+
+    def test_max_hulls(self):
+        vertices, triangles = get_l_shape()
+        hulls = convex_decomposition.decompose(vertices, triangles, max_hulls=1)
+        nose.tools.assert_equal(len(hulls), 1)
+        assert_covered(vertices, hulls)
+
+
+class TestDecompositionCache:
+
+    def setup(self):
+        self.max_decompositions = convex_decomposition.MAX_CONVEX_DECOMPOSITIONS
+        convex_decomposition.MAX_CONVEX_DECOMPOSITIONS = 2
+        convex_decomposition.DICT_CONVEX_DECOMPOSITIONS.clear()
+
+    def teardown(self):
+        convex_decomposition.MAX_CONVEX_DECOMPOSITIONS = self.max_decompositions
+        convex_decomposition.DICT_CONVEX_DECOMPOSITIONS.clear()
+
+    @staticmethod
+    def decompose_cube(size):
+        return convex_decomposition.decompose(np.array(CUBE_VERTICES) * size, CUBE_TRIANGLES)
+
+    def test_reuse(self):
+        nose.tools.assert_is(self.decompose_cube(1.0), self.decompose_cube(1.0))
+
+    def test_bounded(self):
+        first = self.decompose_cube(1.0)
+        self.decompose_cube(2.0)
+        # using the first decomposition again keeps it over the second one
+        self.decompose_cube(1.0)
+        self.decompose_cube(3.0)
+        nose.tools.assert_equal(len(convex_decomposition.DICT_CONVEX_DECOMPOSITIONS), 2)
+        nose.tools.assert_is(self.decompose_cube(1.0), first)
+        nose.tools.assert_equal(len(convex_decomposition.DICT_CONVEX_DECOMPOSITIONS), 2)
@@ -0,0 +1,190 @@
+"""Unit testing of the vectorized mass, center and inertia calculations against pyffi"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import nose
+
+import numpy as np
+import pyffi.utils.inertia
+from pyffi.formats.nif import NifFormat
+
+from io_scene_nif.modules.collision import inertia
+
+# unit cube, triangles facing outwards
+CUBE_VERTICES = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0),
+                 (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)]
+CUBE_TRIANGLES = [(0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7),
+                  (0, 1, 5), (0, 5, 4), (2, 3, 7), (2, 7, 6),
+                  (1, 2, 6), (1, 6, 5), (0, 4, 7), (0, 7, 3)]
+
+
+def assert_mass_center_inertia(result, expected):
+    mass, center, inertia_tensor = result
+    exp_mass, exp_center, exp_inertia = expected
+    nose.tools.assert_almost_equal(mass, exp_mass, places=5)
+    nose.tools.assert_true(np.allclose(center, exp_center, atol=1e-6))
+    nose.tools.assert_true(np.allclose(inertia_tensor, exp_inertia, atol=1e-6))
+
+
+class TestInertia:
+
+    def test_polyhedron_solid(self):
+        vertices = [(x * 2.0 + 1, y * 3.0 - 2, z * 0.5 + 4) for x, y, z in CUBE_VERTICES]
+        assert_mass_center_inertia(inertia.get_mass_center_inertia_polyhedron(vertices, CUBE_TRIANGLES, density=3.0),
+                                   pyffi.utils.inertia.get_mass_center_inertia_polyhedron(vertices, CUBE_TRIANGLES, density=3.0))
+
+    def test_polyhedron_inverted(self):
+        triangles = [(a, c, b) for a, b, c in CUBE_TRIANGLES]
+        assert_mass_center_inertia(inertia.get_mass_center_inertia_polyhedron(CUBE_VERTICES, triangles),
+                                   pyffi.utils.inertia.get_mass_center_inertia_polyhedron(CUBE_VERTICES, triangles))
+
+    def test_polyhedron_matches_box(self):
+        mass, center, inertia_tensor = inertia.get_mass_center_inertia_polyhedron(CUBE_VERTICES, CUBE_TRIANGLES)
+        box_mass, box_inertia = inertia.get_mass_inertia_box((1, 1, 1))
+        nose.tools.assert_almost_equal(mass, box_mass)
+        nose.tools.assert_true(np.allclose(center, (0.5, 0.5, 0.5)))
+        nose.tools.assert_true(np.allclose(inertia_tensor, box_inertia))
+
+    def test_box(self):
+        mass, inertia_tensor = inertia.get_mass_inertia_box((1.0, 2.0, 3.0), density=4.0)
+        exp_mass, exp_inertia = pyffi.utils.inertia.getMassInertiaBox((1.0, 2.0, 3.0), density=4.0)
+        nose.tools.assert_almost_equal(mass, exp_mass)
+        nose.tools.assert_true(np.allclose(inertia_tensor, exp_inertia))
+
+    def test_sphere(self):
+        for solid in (True, False):
+            mass, inertia_tensor = inertia.get_mass_inertia_sphere(2.0, density=3.0, solid=solid)
+            exp_mass, exp_inertia = pyffi.utils.inertia.getMassInertiaSphere(2.0, density=3.0, solid=solid)
+            nose.tools.assert_almost_equal(mass, exp_mass)
+            nose.tools.assert_true(np.allclose(inertia_tensor, exp_inertia))
+
+    def test_capsule(self):
+        # pyffi approximates the capsule inertia by a cylinder, so only compare the mass
+        mass, _ = inertia.get_mass_inertia_capsule(3.0, 0.5, density=2.0)
+        exp_mass, _ = pyffi.utils.inertia.getMassInertiaCapsule(3.0, 0.5, density=2.0)
+        nose.tools.assert_almost_equal(mass, exp_mass)
+        # without cylinder, the capsule is a sphere
+        for solid in (True, False):
+            mass, inertia_tensor = inertia.get_mass_inertia_capsule(0.0, 0.5, solid=solid)
+            exp_mass, exp_inertia = inertia.get_mass_inertia_sphere(0.5, solid=solid)
+            nose.tools.assert_almost_equal(mass, exp_mass)
+            nose.tools.assert_true(np.allclose(inertia_tensor, exp_inertia))
+
+    def test_capsule_shape(self):
+        n_capsule = NifFormat.bhkCapsuleShape()
+        n_capsule.radius = 0.5
+        n_capsule.first_point.x, n_capsule.first_point.y, n_capsule.first_point.z = (1.0, 0.0, 0.0)
+        n_capsule.second_point.x, n_capsule.second_point.y, n_capsule.second_point.z = (1.0, 0.0, 4.0)
+        mass, center, inertia_tensor = inertia.get_mass_center_inertia(n_capsule)
+        exp_mass, exp_center, _ = n_capsule.get_mass_center_inertia()
+        nose.tools.assert_almost_equal(mass, exp_mass)
+        nose.tools.assert_true(np.allclose(center, exp_center))
+        # symmetric around the capsule axis
+        nose.tools.assert_almost_equal(inertia_tensor[0][0], inertia_tensor[1][1])
+
+    def test_packed_shape(self):
+        n_data = NifFormat.hkPackedNiTriStripsData()
+        n_data.num_vertices = len(CUBE_VERTICES)
+        n_data.vertices.update_size()
+        for n_vert, vert in zip(n_data.vertices, CUBE_VERTICES):
+            n_vert.x, n_vert.y, n_vert.z = vert
+        n_data.num_triangles = len(CUBE_TRIANGLES)
+        n_data.triangles.update_size()
+        for n_tri, tri in zip(n_data.triangles, CUBE_TRIANGLES):
+            n_tri.triangle.v_1, n_tri.triangle.v_2, n_tri.triangle.v_3 = tri
+        n_packed = NifFormat.bhkPackedNiTriStripsShape()
+        n_packed.data = n_data
+        n_mopp = NifFormat.bhkMoppBvTreeShape()
+        n_mopp.shape = n_packed
+        assert_mass_center_inertia(inertia.get_mass_center_inertia(n_mopp), n_mopp.get_mass_center_inertia())
+
+    def test_convex_vertices_shape(self):
+        n_convex = NifFormat.bhkConvexVerticesShape()
+        n_convex.num_vertices = len(CUBE_VERTICES)
+        n_convex.vertices.update_size()
+        for n_vert, vert in zip(n_convex.vertices, CUBE_VERTICES):
+            n_vert.x, n_vert.y, n_vert.z = vert
+        assert_mass_center_inertia(inertia.get_mass_center_inertia(n_convex), n_convex.get_mass_center_inertia())
+
+    def test_list_shape(self):
+        # concentric sub shapes, so pyffi's plain sum of the inertia tensors applies
+        n_box = NifFormat.bhkBoxShape()
+        n_box.dimensions.x, n_box.dimensions.y, n_box.dimensions.z = (0.5, 1.0, 1.5)
+        n_sphere = NifFormat.bhkSphereShape()
+        n_sphere.radius = 2.0
+        n_list = NifFormat.bhkListShape()
+        n_list.add_shape(n_box)
+        n_list.add_shape(n_sphere)
+        assert_mass_center_inertia(inertia.get_mass_center_inertia(n_list), n_list.get_mass_center_inertia())
+
+    def test_update_rigid_bodies(self):
+        n_bodies = []
+        for radius in (1.0, 2.0):
+            n_sphere = NifFormat.bhkSphereShape()
+            n_sphere.radius = radius
+            n_body = NifFormat.bhkRigidBody()
+            n_body.shape = n_sphere
+            n_bodies.append(n_body)
+        exp_bodies = [NifFormat.bhkRigidBody().deepcopy(n_body) for n_body in n_bodies]
+
+        inertia.update_rigid_bodies(n_bodies, total_mass=9.0)
+
+        # distribution of the mass follows the volume
+        nose.tools.assert_almost_equal(n_bodies[0].mass, 1.0, places=5)
+        nose.tools.assert_almost_equal(n_bodies[1].mass, 8.0, places=5)
+        for n_body, exp_body in zip(n_bodies, exp_bodies):
+            exp_body.update_mass_center_inertia(mass=n_body.mass)
+            nose.tools.assert_almost_equal(n_body.inertia.m_11, exp_body.inertia.m_11, places=4)
+            nose.tools.assert_almost_equal(n_body.inertia.m_33, exp_body.inertia.m_33, places=4)
+
+    def test_update_unsupported_shape(self):
+        n_sphere = NifFormat.bhkSphereShape()
+        n_sphere.radius = 1.0
+        n_body = NifFormat.bhkRigidBody()
+        n_body.shape = n_sphere
+        n_other_body = NifFormat.bhkRigidBody()
+        n_other_body.shape = NifFormat.bhkCompressedMeshShape()
+        n_other_body.mass = 3.0
+        n_other_body.inertia.m_11 = 0.5
+
+        inertia.update_rigid_bodies([n_body, n_other_body], total_mass=9.0)
+
+        # the unsupported body is left alone, the others get all the mass
+        nose.tools.assert_almost_equal(n_body.mass, 9.0, places=5)
+        nose.tools.assert_equal(n_other_body.mass, 3.0)
+        nose.tools.assert_equal(n_other_body.inertia.m_11, 0.5)
@@ -0,0 +1,135 @@
+"""Unit testing the interning of identical data blocks"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from nose.tools import assert_equal, assert_is, assert_is_not, assert_not_equal, assert_not_in
+from pyffi.formats.nif import NifFormat
+
+from io_scene_nif.modules.object.block_registry import BlockRegistry
+from io_scene_nif.utility.util_global import NifData
+from io_scene_nif.utility.util_session import NifSession, get_session
+
+
+class TestInternBlock:
+
+    @classmethod
+    def setup_class(cls):
+        cls.previous = get_session()
+        NifSession().activate()
+        NifData.init(NifFormat.Data(0x14000005, 11, 11))
+
+    @classmethod
+    def teardown_class(cls):
+        cls.previous.activate()
+
+    @staticmethod
+    def create_float_data(registry, values):
+        n_float_data = registry.create_block("NiFloatData")
+        n_float_data.data.num_keys = len(values)
+        n_float_data.data.interpolation = NifFormat.KeyType.LINEAR_KEY
+        n_float_data.data.keys.update_size()
+        for i, (n_key, value) in enumerate(zip(n_float_data.data.keys, values)):
+            n_key.time = i / 30
+            n_key.value = value
+        return n_float_data
+
+    def test_intern_identical(self):
+        registry = BlockRegistry()
+        n_first = registry.intern_block(self.create_float_data(registry, (0.0, 0.5, 1.0)))
+        n_second = self.create_float_data(registry, (0.0, 0.5, 1.0))
+        assert_is(registry.intern_block(n_second), n_first)
+        assert_not_in(n_second, registry.block_to_obj)
+        assert_equal(registry.num_interned, 1)
+
+    def test_intern_different(self):
+        registry = BlockRegistry()
+        n_first = registry.intern_block(self.create_float_data(registry, (0.0, 0.5, 1.0)))
+        n_second = self.create_float_data(registry, (0.0, 0.5, 1.0000001))
+        assert_is(registry.intern_block(n_second), n_second)
+        assert_is_not(n_second, n_first)
+        assert_equal(registry.num_interned, 0)
+
+    def test_reset(self):
+        registry = BlockRegistry()
+        registry.intern_block(self.create_float_data(registry, (1.0, 2.0)))
+        registry.block_to_obj = {}
+        n_block = self.create_float_data(registry, (1.0, 2.0))
+        assert_is(registry.intern_block(n_block), n_block)
+
+    def test_intern_version(self):
+        # consistency flags are only written since version 10.0.1.0
+        registry = BlockRegistry()
+        n_first = registry.intern_block(registry.create_block("NiTriShapeData"))
+        n_second = registry.create_block("NiTriShapeData")
+        n_second.consistency_flags = NifFormat.ConsistencyType.CT_VOLATILE
+        assert_is(registry.intern_block(n_second), n_second)
+        n_third = registry.create_block("NiTriShapeData")
+        n_third.consistency_flags = NifFormat.ConsistencyType.CT_VOLATILE
+        assert_is(registry.intern_block(n_third), n_second)
+        # older versions do not tell them apart
+        registry.block_to_obj = {}
+        n_first = registry.intern_block(registry.create_block("NiTriShapeData"), data=NifFormat.Data(0x04000002))
+        assert_is(registry.intern_block(n_third, data=NifFormat.Data(0x04000002)), n_first)
+
+    def test_share_block(self):
+        registry = BlockRegistry()
+        key = ("NiSourceTexture", "textures\\stone.dds", 6)
+        assert_is(registry.find_shared_block(key), None)
+        n_block = registry.share_block(key, registry.create_block("NiSourceTexture"))
+        assert_is(registry.find_shared_block(key), n_block)
+        assert_equal(registry.num_interned, 1)
+
+    def test_get_block_key(self):
+        n_shader = NifFormat.BSLightingShaderProperty()
+        n_shader.glossiness = 80.0001
+        n_shader.texture_set = NifFormat.BSShaderTextureSet()
+        n_shader.texture_set.num_textures = 9
+        n_shader.texture_set.textures.update_size()
+        n_shader.texture_set.textures[0] = "textures\\stone.dds"
+        key = BlockRegistry.get_block_key(n_shader)
+        assert_equal(key[0], "BSLightingShaderProperty")
+
+        # floats are compared exactly
+        n_shader.glossiness = 80.0
+        assert_not_equal(BlockRegistry.get_block_key(n_shader), key)
+        n_shader.glossiness = 80.0001
+        assert_equal(BlockRegistry.get_block_key(n_shader), key)
+
+        # referenced blocks are compared by content
+        n_shader.texture_set.textures[1] = "textures\\stone_n.dds"
+        assert_not_equal(BlockRegistry.get_block_key(n_shader), key)
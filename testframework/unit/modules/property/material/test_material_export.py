@@ -0,0 +1,81 @@
+"""Unit testing the sharing of exported material properties"""
+
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from collections import namedtuple
+from types import SimpleNamespace
+
+from nose.tools import assert_is, assert_is_not
+
+from io_scene_nif.modules.property.material.material_export import MaterialProp
+from io_scene_nif.utility.util_session import NifSession, get_session
+
+Color = namedtuple("Color", ("r", "g", "b"))
+
+
+class TestMaterialProp:
+
+    @classmethod
+    def setup_class(cls):
+        cls.previous = get_session()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.previous.activate()
+
+    def setup(self):
+        session = NifSession().activate()
+        session.props = SimpleNamespace(game='MORROWIND')
+        self.material_prop = MaterialProp(SimpleNamespace(EXPORT_OPTIMIZE_MATERIALS=True))
+
+    def export_material_property(self, animated=False):
+        white = Color(1.0, 1.0, 1.0)
+        return self.material_prop.export_material_property(
+            "Material", 0x0001, white, white, white, Color(0.0, 0.0, 0.0), 10.0, 1.0, 1.0, animated=animated)
+
+    def test_share_identical(self):
+        assert_is(self.export_material_property(), self.export_material_property())
+
+    def test_animated_not_shared(self):
+        # each animated material property gets its own controllers
+        n_matprop = self.export_material_property()
+        n_animated = self.export_material_property(animated=True)
+        assert_is_not(n_animated, n_matprop)
+        assert_is_not(self.export_material_property(animated=True), n_animated)
+        assert_is(self.export_material_property(), n_matprop)
@@ -0,0 +1,78 @@
+"""Unit testing the keys of materials shared between imported shapes"""
+
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from nose.tools import assert_equal, assert_not_equal
+from pyffi.formats.nif import NifFormat
+
+from io_scene_nif.modules.property.property_import import MeshProperty
+
+
+class TestMaterialHash:
+
+    @staticmethod
+    def create_shape():
+        n_geom = NifFormat.NiTriShape()
+        n_geom.add_property(NifFormat.NiMaterialProperty())
+        n_geom.add_property(NifFormat.NiStencilProperty())
+        return n_geom
+
+    @staticmethod
+    def add_uv_controller(n_geom, offset):
+        n_ctrl = NifFormat.NiUVController()
+        n_ctrl.data = NifFormat.NiUVData()
+        n_uvgroup = n_ctrl.data.uv_groups[0]
+        n_uvgroup.num_keys = 1
+        n_uvgroup.keys.update_size()
+        n_uvgroup.keys[0].value = offset
+        n_geom.add_controller(n_ctrl)
+
+    def test_identical_shapes(self):
+        assert_equal(MeshProperty().get_material_hash(self.create_shape()),
+                     MeshProperty().get_material_hash(self.create_shape()))
+
+    def test_uv_controller(self):
+        # the uv animation of the geometry ends up in its material
+        n_geom = self.create_shape()
+        n_animated = self.create_shape()
+        self.add_uv_controller(n_animated, 0.5)
+        assert_not_equal(MeshProperty().get_material_hash(n_geom), MeshProperty().get_material_hash(n_animated))
+        n_other = self.create_shape()
+        self.add_uv_controller(n_other, 0.25)
+        assert_not_equal(MeshProperty().get_material_hash(n_animated), MeshProperty().get_material_hash(n_other))
@@ -0,0 +1,77 @@
+"""Unit testing the file system cache warming for image files"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import tempfile
+
+from nose.tools import assert_equal, assert_false, assert_true
+
+from io_scene_nif.modules.property.texture.loader.file_cache_warmer import FileCacheWarmer
+
+
+class TestFileCacheWarmer:
+
+    @classmethod
+    def setup_class(cls):
+        cls.root = tempfile.mkdtemp()
+        cls.dds = os.path.join(cls.root, "image.DDS")
+        with open(cls.dds, "wb") as stream:
+            stream.write(b'DDS ' + bytes(124))
+        cls.fake_png = os.path.join(cls.root, "image.png")
+        with open(cls.fake_png, "wb") as stream:
+            stream.write(b'DDS ' + bytes(124))
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(cls.root)
+
+    def test_is_supported(self):
+        assert_true(FileCacheWarmer.is_supported(self.dds))
+        assert_false(FileCacheWarmer.is_supported(self.fake_png))
+        assert_false(FileCacheWarmer.is_supported(os.path.join(self.root, "missing.dds")))
+        assert_false(FileCacheWarmer.has_signature(os.path.join(self.root, "image.tif")))
+
+    def test_warm(self):
+        warmer = FileCacheWarmer(max_workers=2)
+        try:
+            assert_equal(warmer.warm(self.dds).result(), 128)
+            assert_equal(warmer.warm(os.path.join(self.root, "missing.dds")).result(), 0)
+        finally:
+            warmer.shutdown()
@@ -0,0 +1,120 @@
+"""Unit testing the case insensitive texture path index"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import tempfile
+
+from nose.tools import assert_equal
+
+from io_scene_nif.modules.property.texture.loader.texture_path_index import TexturePathIndex
+
+
+class TestTexturePathIndex:
+
+    @classmethod
+    def setup_class(cls):
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.root, "Textures", "Armor"))
+        for name in ("Iron.TGA", "iron.dds", "Steel.png"):
+            open(os.path.join(cls.root, "Textures", "Armor", name), "wb").close()
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(cls.root)
+
+    def test_ignore_case(self):
+        index = TexturePathIndex()
+        assert_equal(index.find(self.root, os.path.join("textures", "armor", "STEEL.PNG")),
+                     [os.path.join(self.root, "Textures", "Armor", "Steel.png")])
+
+    def test_extension_preference(self):
+        index = TexturePathIndex()
+        armor = os.path.join(self.root, "Textures", "Armor")
+        # the requested extension comes first, then the alternate extensions by preference
+        assert_equal(index.find(self.root, os.path.join("textures", "armor", "iron.tga")),
+                     [os.path.join(armor, "Iron.TGA"), os.path.join(armor, "iron.dds")])
+        assert_equal(index.find(self.root, os.path.join("textures", "armor", "iron.bmp")),
+                     [os.path.join(armor, "iron.dds"), os.path.join(armor, "Iron.TGA")])
+
+    def test_missing(self):
+        index = TexturePathIndex()
+        assert_equal(index.find(self.root, os.path.join("textures", "armor", "gold.dds")), [])
+        assert_equal(index.find(self.root, os.path.join("textures", "weapons", "iron.dds")), [])
+        assert_equal(index.find(os.path.join(self.root, "missing"), "iron.dds"), [])
+
+    def test_listing_reused(self):
+        index = TexturePathIndex()
+        rel_path = os.path.join("textures", "armor", "steel.png")
+        index.find(self.root, rel_path)
+        # files added after the first lookup are only seen once the index is cleared
+        new_file = os.path.join(self.root, "Textures", "Armor", "Steel.dds")
+        open(new_file, "wb").close()
+        try:
+            assert_equal(len(index.find(self.root, rel_path)), 1)
+            index.clear()
+            assert_equal(len(index.find(self.root, rel_path)), 2)
+        finally:
+            os.remove(new_file)
+
+    def test_cache(self):
+        index = TexturePathIndex()
+        cache_path = os.path.join(self.root, "texture_index.json")
+        index.load(cache_path)
+        rel_path = os.path.join("textures", "armor", "steel.png")
+        paths = index.find(self.root, rel_path)
+        index.save()
+
+        # a new session finds the same files from the cache file
+        index = TexturePathIndex()
+        index.load(cache_path)
+        assert_equal(index.find(self.root, rel_path), paths)
+
+        # but notices directories that changed since
+        armor = os.path.join(self.root, "Textures", "Armor")
+        new_file = os.path.join(armor, "Steel.dds")
+        open(new_file, "wb").close()
+        os.utime(armor, ns=(0, 0))
+        try:
+            index = TexturePathIndex()
+            index.load(cache_path)
+            assert_equal(index.find(self.root, rel_path), paths + [new_file])
+        finally:
+            os.remove(new_file)
+            os.remove(cache_path)
@@ -0,0 +1,106 @@
+"""Unit testing the dds block compression encoder"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from nose.tools import assert_equal, assert_true
+
+from io_scene_nif.modules.property.texture import dds
+
+
+def decode_color_blocks(data):
+    blocks = np.frombuffer(data, dtype=[("color0", "<u2"), ("color1", "<u2"), ("indices", "<u4")])
+    color0 = dds.unpack_565(blocks["color0"])
+    color1 = dds.unpack_565(blocks["color1"])
+    palette = np.stack((color0, color1, (2 * color0 + color1) / 3, (color0 + 2 * color1) / 3), axis=1)
+    indices = (blocks["indices"][:, None] >> (2 * np.arange(16, dtype=np.uint32))) & 3
+    return np.take_along_axis(palette, indices[..., None].astype(int).repeat(3, axis=-1), axis=1)
+
+
+def decode_single_channel_blocks(data):
+    blocks = np.frombuffer(data, dtype=np.uint8).reshape(-1, 8)
+    bits = np.zeros(len(blocks), dtype=np.uint64)
+    for i in range(6):
+        bits |= blocks[:, 2 + i].astype(np.uint64) << np.uint64(8 * i)
+    indices = (bits[:, None] >> (3 * np.arange(16, dtype=np.uint64))) & np.uint64(7)
+    weights = np.array((0, 7, 1, 2, 3, 4, 5, 6)) / 7.0
+    palette = blocks[:, :1] * (1.0 - weights) + blocks[:, 1:2] * weights
+    return np.take_along_axis(palette, indices.astype(int), axis=1)
+
+
+class TestDds:
+
+    @classmethod
+    def setup_class(cls):
+        y, x = np.mgrid[0:32, 0:24]
+        cls.pixels = np.stack((x / 24, y / 32, np.full(x.shape, 0.5), (x + y) / 56), axis=-1)
+        cls.blocks = dds.get_blocks(cls.pixels * 255)
+
+    def test_mipmaps(self):
+        mipmaps = dds.get_mipmaps(self.pixels)
+        assert_equal([mipmap.shape[:2] for mipmap in mipmaps], [(32, 24), (16, 12), (8, 6), (4, 3), (2, 1), (1, 1)])
+        assert_true(np.allclose(mipmaps[-1][0, 0], self.pixels[:, :16].mean(axis=(0, 1)), atol=0.05))
+
+    def test_color_blocks(self):
+        decoded = decode_color_blocks(dds.encode(self.pixels, "BC1"))
+        assert_true(np.sqrt(((decoded - self.blocks[..., :3]) ** 2).mean()) < 8)
+        # a solid color is exact
+        solid = np.ones((4, 4, 4)) * (1.0, 0.0, 0.0, 1.0)
+        assert_true(np.array_equal(decode_color_blocks(dds.encode(solid, "BC1"))[0, 0], (255, 0, 0)))
+
+    def test_single_channel_blocks(self):
+        data = np.frombuffer(dds.encode(self.pixels, "BC5"), dtype=np.uint8).reshape(-1, 16)
+        for channel, half in ((0, data[:, :8]), (1, data[:, 8:])):
+            decoded = decode_single_channel_blocks(half.tobytes())
+            assert_true(np.abs(decoded - self.blocks[..., channel]).max() < 3)
+
+    def test_write_dds(self):
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, "test.dds")
+            dds.write_dds(path, self.pixels, "BC3", key=b"k" * dds.KEY_SIZE)
+            # header, then 16 bytes per 4x4 block of each mipmap level
+            num_blocks = 8 * 6 + 4 * 3 + 2 * 2 + 1 + 1 + 1
+            assert_equal(os.path.getsize(path), dds.HEADER.size + 16 * num_blocks)
+            assert_equal(dds.get_key(path), b"k" * dds.KEY_SIZE)
+        finally:
+            shutil.rmtree(folder)
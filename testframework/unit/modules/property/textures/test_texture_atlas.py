@@ -0,0 +1,82 @@
+"""Unit testing the texture atlas packing"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import numpy as np
+from nose.tools import assert_equal, assert_is_none, assert_true
+
+from io_scene_nif.modules.property.texture import texture_atlas
+
+
+class TestTextureAtlas:
+
+    @classmethod
+    def setup_class(cls):
+        cls.sizes = [(64, 64), (128, 32), (32, 128), (16, 16)]
+        cls.atlas_size, cls.positions = texture_atlas.pack_rects(cls.sizes)
+
+    def test_atlas_size(self):
+        width, height = self.atlas_size
+        assert_equal(width & (width - 1), 0)
+        assert_equal(height & (height - 1), 0)
+
+    def test_no_overlap(self):
+        pad = texture_atlas.PADDING
+        used = np.zeros(self.atlas_size[::-1], dtype=int)
+        for (x, y), (width, height) in zip(self.positions, self.sizes):
+            assert_true(x >= pad and y >= pad)
+            used[y - pad:y + height + pad, x - pad:x + width + pad] += 1
+        assert_equal(used.max(), 1)
+
+    def test_too_large(self):
+        assert_is_none(texture_atlas.pack_rects([(4096, 4096), (16, 16)]))
+
+    def test_paste_and_uv(self):
+        atlas = np.zeros(self.atlas_size[::-1] + (4,), dtype=np.float32)
+        pixels = np.random.RandomState(0).rand(32, 128, 4).astype(np.float32)
+        texture_atlas.paste(atlas, pixels, self.positions[1])
+        scale_u, scale_v, offset_u, offset_v = texture_atlas.get_uv_transform(
+            self.positions[1], self.sizes[1], self.atlas_size)
+        # the texel centers of the image map onto the same texels in the atlas
+        for row, column in ((0, 0), (31, 127), (10, 77)):
+            u = (column + 0.5) / 128 * scale_u + offset_u
+            v = (row + 0.5) / 32 * scale_v + offset_v
+            np.testing.assert_array_equal(atlas[int(v * self.atlas_size[1]), int(u * self.atlas_size[0])], pixels[row, column])
+        # the edges are extended into the padding
+        x, y = self.positions[1]
+        np.testing.assert_array_equal(atlas[y - 1, x - 1], pixels[0, 0])
@@ -0,0 +1,96 @@
+"""Unit testing the selection and file names of actions for kf export"""
+
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from types import SimpleNamespace
+from unittest import mock
+
+from nose.tools import assert_equal
+
+from io_scene_nif import kf_export
+from io_scene_nif.kf_export import KfExport
+from io_scene_nif.utility.util_session import NifSession, get_session
+
+
+def create_action(name, *data_paths):
+    return SimpleNamespace(name=name, fcurves=[SimpleNamespace(data_path=data_path) for data_path in data_paths])
+
+
+class TestKfActions:
+
+    @classmethod
+    def setup_class(cls):
+        cls.previous = get_session()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.previous.activate()
+
+    def setup(self):
+        self.session = NifSession().activate()
+        self.b_armature = SimpleNamespace(data=SimpleNamespace(bones={"Bip01": None, "Bip01 Head": None}),
+                                          animation_data=None)
+        self.b_actions = [create_action("Walk", 'pose.bones["Bip01"].location', 'pose.bones["Bip01"].scale'),
+                          create_action("WalkHead", 'pose.bones["Bip01 Head"].rotation_quaternion'),
+                          create_action("Run", 'pose.bones["Bip01"].location'),
+                          create_action("WalkDoor", 'location', 'rotation_euler'),
+                          create_action("WalkOther", 'pose.bones["Bip02"].location'),
+                          create_action("WalkEmpty")]
+
+    def get_actions(self, action_filter):
+        self.session.props = SimpleNamespace(action_filter=action_filter)
+        with mock.patch.object(kf_export, "bpy", SimpleNamespace(data=SimpleNamespace(actions=self.b_actions))):
+            return [b_action.name for b_action in KfExport.get_actions(self.b_armature)]
+
+    def test_filter(self):
+        assert_equal(self.get_actions("Walk*"), ["Walk", "WalkHead"])
+        assert_equal(self.get_actions("R?n"), ["Run"])
+
+    def test_bone_actions_only(self):
+        # object actions, actions of other armatures and empty actions are skipped
+        assert_equal(self.get_actions("*"), ["Walk", "WalkHead", "Run"])
+
+    def test_active_action(self):
+        assert_equal(self.get_actions(""), [])
+        self.b_armature.animation_data = SimpleNamespace(action=self.b_actions[3])
+        assert_equal(self.get_actions(""), ["WalkDoor"])
+
+    def test_file_names(self):
+        b_actions = [create_action(name) for name in ("Walk", "walk", "WALK", "a/b", "a?b", "Run")]
+        assert_equal(KfExport.get_file_names(b_actions), ["Walk", "walk.001", "WALK.002", "a_b", "a_b.001", "Run"])
@@ -0,0 +1,98 @@
+"""Unit testing the level gated, buffered logging"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+from nose.tools import assert_equal
+
+from io_scene_nif.utility.util_logging import NifLog
+from io_scene_nif.utility.util_session import NifSession, get_session
+
+
+class _Properties:
+    log_level = "INFO"
+
+
+class _Operator:
+    properties = _Properties()
+
+    def __init__(self):
+        self.reports = []
+
+    def report(self, level, message):
+        self.reports.append((level, message))
+
+
+class _Unprintable:
+    def __str__(self):
+        raise AssertionError("message was formatted")
+
+
+class TestNifLog:
+
+    @classmethod
+    def setup_class(cls):
+        cls.previous = get_session()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.previous.activate()
+
+    def setup(self):
+        self.operator = _Operator()
+        NifSession(self.operator).activate()
+        NifLog.init(self.operator)
+
+    def test_below_level_not_formatted(self):
+        NifLog.debug("Importing %s", _Unprintable())
+        NifLog.debug(lambda: str(_Unprintable()))
+        NifLog.flush()
+        assert_equal(self.operator.reports, [])
+
+    def test_buffered_until_warning(self):
+        NifLog.info("Importing %s of %s", 1, 2)
+        assert_equal(self.operator.reports, [])
+        NifLog.warn("Missing texture")
+        assert_equal(self.operator.reports, [({'INFO'}, "Importing 1 of 2"), ({'WARNING'}, "Missing texture")])
+
+    def test_dropped(self):
+        session = get_session()
+        for i in range(session.log_buffer.maxlen + 3):
+            NifLog.info("Message %d", i)
+        NifLog.flush()
+        assert_equal(self.operator.reports[0], ({'INFO'}, "3 earlier messages were dropped"))
+        assert_equal(self.operator.reports[1], ({'INFO'}, "Message 3"))
@@ -0,0 +1,93 @@
+"""Module for unit testing the vectorized rotation math"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import numpy as np
+from nose.tools import assert_true, assert_equal
+
+from io_scene_nif.utility import util_math
+
+
+class TestRotationMath:
+
+    @classmethod
+    def setup_class(cls):
+        rng = np.random.RandomState(0)
+        cls.quats = util_math.quat_normalize(rng.normal(size=(50, 4)))
+        # stay clear of gimbal lock
+        cls.eulers = rng.uniform(-1.5, 1.5, size=(50, 3))
+
+    def test_quat_matrix_roundtrip(self):
+        quats = util_math.matrix_to_quat(util_math.quat_to_matrix(self.quats))
+        # q and -q are the same rotation
+        assert_true(np.allclose(np.abs(np.einsum('ni,ni->n', quats, self.quats)), 1.0))
+        assert_true(np.all(quats[:, 0] >= 0))
+
+    def test_quat_multiply(self):
+        product = util_math.quat_multiply(self.quats[:-1], self.quats[1:])
+        matrices = util_math.quat_to_matrix(self.quats)
+        assert_true(np.allclose(util_math.quat_to_matrix(product), matrices[:-1] @ matrices[1:]))
+        identity = util_math.quat_multiply(self.quats, util_math.quat_conjugate(self.quats))
+        assert_true(np.allclose(identity, (1, 0, 0, 0)))
+
+    def test_euler_matrix_roundtrip(self):
+        matrices = util_math.euler_to_matrix(self.eulers)
+        assert_true(np.allclose(util_math.matrix_to_euler(matrices), self.eulers))
+        # rotation about x first, then y, then z
+        x, y, z = (util_math.euler_to_matrix(np.eye(3) * self.eulers[0]))
+        assert_true(np.allclose(z @ y @ x, matrices[0]))
+
+    def test_euler_gimbal_lock(self):
+        eulers = util_math.matrix_to_euler(util_math.euler_to_matrix([(0.3, np.pi / 2, 0)]))
+        assert_true(np.allclose(util_math.euler_to_matrix(eulers), util_math.euler_to_matrix([(0.3, np.pi / 2, 0)])))
+
+    def test_quat_make_compatible(self):
+        quats = self.quats * np.where(np.arange(50) % 3, 1, -1)[:, np.newaxis]
+        compatible = util_math.quat_make_compatible(quats)
+        assert_true(np.all(np.einsum('ni,ni->n', compatible[1:], compatible[:-1]) >= 0))
+        assert_true(np.allclose(np.abs(compatible), np.abs(quats)))
+        assert_equal(compatible.shape, (50, 4))
+
+    def test_compatible_euler(self):
+        # whole turns are removed to stay close to the reference
+        shifted = self.eulers + (2 * np.pi, -2 * np.pi, 0)
+        assert_true(np.allclose(util_math.euler_make_compatible(shifted, self.eulers), self.eulers))
+        # the same rotation, expressed close to a reference beyond 180 degrees
+        reference = self.eulers + (2 * np.pi, 0, 0)
+        eulers = util_math.matrix_to_compatible_euler(util_math.euler_to_matrix(self.eulers), reference)
+        assert_true(np.allclose(eulers, reference))
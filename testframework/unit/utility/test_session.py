@@ -0,0 +1,101 @@
+"""Unit testing the per operation session state"""
+
+# ***** BEGIN LICENSE BLOCK *****
+#
+# Copyright © 2020, NIF File Format Library and Tools contributors.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above
+#   copyright notice, this list of conditions and the following
+#   disclaimer in the documentation and/or other materials provided
+#   with the distribution.
+#
+# * Neither the name of the NIF File Format Library and Tools
+#   project nor the names of its contributors may be used to endorse
+#   or promote products derived from this software without specific
+#   prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# ***** END LICENSE BLOCK *****
+
+import threading
+from types import SimpleNamespace
+
+from nose.tools import assert_equal, assert_is, assert_is_none, assert_is_not
+
+from io_scene_nif.modules.object.block_registry import block_store
+from io_scene_nif.modules.property import material
+from io_scene_nif.utility.util_global import NifData, NifOp
+from io_scene_nif.utility.util_logging import NifLog
+from io_scene_nif.utility.util_session import NifSession, get_session
+
+
+class TestSession:
+
+    @classmethod
+    def setup_class(cls):
+        cls.previous = get_session()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.previous.activate()
+
+    def test_accessors(self):
+        session = NifSession().activate()
+        NifData.init("nif data")
+        material.DICT_MATERIALS["hash"] = "material"
+        assert_is(get_session(), session)
+        assert_equal(session.data, "nif data")
+        assert_equal(session.materials, {"hash": "material"})
+        assert_is(block_store.get_registry(), session.block_store)
+
+    def test_threads(self):
+        results = {}
+
+        def run(index):
+            NifSession().activate()
+            NifData.init(index)
+            block_store.block_to_obj = {index: None}
+            results[index] = NifData.data, list(block_store.block_to_obj)
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert_equal(results, {index: (index, [index]) for index in range(4)})
+
+    def test_new_session(self):
+        NifSession().activate()
+        NifData.init("nif data")
+        NifSession().activate()
+        assert_is_none(NifData.data)
+        assert_equal(len(material.DICT_MATERIALS), 0)
+
+    def test_deactivate(self):
+        operator = SimpleNamespace(properties="props")
+        session = NifSession(operator, "context").activate()
+        assert_is(NifOp.props, "props")
+        session.deactivate()
+        assert_is_not(get_session(), session)
+        assert_is_none(NifOp.props)
+        assert_is_not(NifLog.get_operator(), operator)